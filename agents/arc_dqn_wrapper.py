@@ -24,6 +24,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sim.state import State
 from sim.dynamics import step_dynamics
+from sim.params import DynamicsParams
+from agents.stats import StatsTracker
 
 
 @dataclass
@@ -58,6 +60,102 @@ class ARCWrapperConfig:
     # Stability bonus/penalty
     stability_bonus: float = 0.1  # Bonus for maintaining low arousal
     instability_penalty: float = 0.0  # Penalty for high arousal (disabled by default)
+    
+    # Debugging: keep per-step histories (memory grows with episode length)
+    keep_history: bool = False
+
+
+# Per-episode channels; `high_arousal` counts steps with arousal above a_safe
+ARC_EPISODE_CHANNELS = ("arousal", "valence", "risk", "risk_memory", "u_mem", "uncertainty", "shift_active", "high_arousal")
+
+
+def default_arc_config(config: ARCWrapperConfig) -> Dict[str, Any]:
+    """Return default ARC configuration matching v2.yaml."""
+    return {
+        # Initial state values
+        "phi0": 0.75, "g0": 0.75, "p0": 0.75, "i0": 0.70,
+        "s0": 0.30, "v0": 0.55, "a0": 0.30, "mf0": 0.25,
+        "ms0": 0.20, "u0": 0.20,
+        
+        # Thresholds
+        "a_safe": config.a_safe,
+        "s_safe": config.s_safe,
+        
+        # ARC weights
+        "arc_w_u": config.arc_w_u,
+        "arc_w_a": config.arc_w_a,
+        "arc_w_s": config.arc_w_s,
+        
+        # Control gains
+        "arc_k_dmg": config.arc_k_dmg,
+        "arc_k_att": config.arc_k_att,
+        "arc_k_calm": config.arc_k_calm,
+        "arc_k_mem_block": config.arc_k_mem_block,
+        "arc_k_reapp": 0.55,
+        
+        # Performance parameters
+        "omega_s": 0.35,
+        "perf_bias": 0.25,
+        "perf_gain": 0.85,
+        "w_u": 0.25,
+        "w_a": 0.30,
+        "w_s": 0.20,
+        
+        # Attention/Uncertainty dynamics
+        "k_u_att": 0.30,
+        
+        # Integration dynamics
+        "k_i_att": 0.25,
+        "k_i_u": 0.06,
+        "mu_i": 0.03,
+        
+        # Precision dynamics
+        "k_p_pe": 0.15,
+        "k_p_u": 0.05,
+        "k_p_i": 0.12,
+        "mu_p": 0.015,
+        
+        # Gating dynamics
+        "k_g_i": 0.08,
+        "k_g_p": 0.12,
+        "k_g_u": 0.08,
+        "k_g_a": 0.10,
+        "mu_g": 0.015,
+        
+        # Phi dynamics
+        "k_phi_gp": 0.08,
+        "mu_phi": 0.015,
+        
+        # Narrative intensity (rumination) dynamics
+        "k_s_u": 0.08,
+        "k_s_pe": 0.06,
+        "k_s_dmg": 0.25,
+        "mu_s": 0.025,
+        
+        # Arousal dynamics
+        "k_a_pe": 0.15,
+        "k_a_u": 0.12,
+        "k_a_s": 0.08,
+        "k_a_calm": 0.40,
+        "mu_a": 0.05,
+        
+        # Valence dynamics
+        "k_v_r": 0.25,
+        "k_v_pe": 0.08,
+        "k_v_u": 0.05,
+        "k_v_reapp": 0.12,
+        "mu_v": 0.04,
+        
+        # Memory dynamics
+        "eta0": 0.18,
+        "k_eta_a": 0.60,
+        "w_mem_pe": 0.55,
+        "w_mem_a": 0.30,
+        "w_mem_v": 0.25,
+        "mu_mf": 0.06,
+        "k_ms": 0.02,
+        "mu_ms": 0.01,
+    }
 
 
 class ARCGymWrapper(gym.Wrapper):
@@ -74,6 +172,9 @@ class ARCGymWrapper(gym.Wrapper):
     directly modulate learning rate (that's internal to the algorithm).
     Instead, we can influence learning through reward shaping or
     by adding the affective state to observations.
+    
+    For many parallel envs, `agents.arc_vec_wrapper.ARCVecEnvWrapper`
+    applies the same rules to a whole VecEnv in one vectorized pass.
     """
     
     def __init__(
@@ -94,18 +195,13 @@ class ARCGymWrapper(gym.Wrapper):
         else:
             # Default configuration matching v2.yaml
             self.arc_cfg = self._default_arc_config()
+        self.arc_params = DynamicsParams.from_config(self.arc_cfg)
         
         # Initialize ASSB state
         self.assb_state = self._init_assb_state()
         
-        # Tracking
-        self.arousal_history: List[float] = []
-        self.valence_history: List[float] = []
-        self.risk_history: List[float] = []
-        self.risk_memory_history: List[float] = []
-        self.u_mem_history: List[float] = []
-        self.uncertainty_history: List[float] = []
-        self.shift_active_history: List[bool] = []
+        # Tracking: O(1) running aggregates per episode (+ histories with keep_history)
+        self._ep_stats = StatsTracker(window=0, keep_history=self.config.keep_history)
         self.episode_steps = 0
         self.phase_changed = False
         self.current_phase = 0
@@ -146,91 +242,7 @@ class ARCGymWrapper(gym.Wrapper):
     
     def _default_arc_config(self) -> Dict[str, Any]:
         """Return default ARC configuration matching v2.yaml."""
-        return {
-            # Initial state values
-            "phi0": 0.75, "g0": 0.75, "p0": 0.75, "i0": 0.70,
-            "s0": 0.30, "v0": 0.55, "a0": 0.30, "mf0": 0.25,
-            "ms0": 0.20, "u0": 0.20,
-            
-            # Thresholds
-            "a_safe": self.config.a_safe,
-            "s_safe": self.config.s_safe,
-            
-            # ARC weights
-            "arc_w_u": self.config.arc_w_u,
-            "arc_w_a": self.config.arc_w_a,
-            "arc_w_s": self.config.arc_w_s,
-            
-            # Control gains
-            "arc_k_dmg": self.config.arc_k_dmg,
-            "arc_k_att": self.config.arc_k_att,
-            "arc_k_calm": self.config.arc_k_calm,
-            "arc_k_mem_block": self.config.arc_k_mem_block,
-            "arc_k_reapp": 0.55,
-            
-            # Performance parameters
-            "omega_s": 0.35,
-            "perf_bias": 0.25,
-            "perf_gain": 0.85,
-            "w_u": 0.25,
-            "w_a": 0.30,
-            "w_s": 0.20,
-            
-            # Attention/Uncertainty dynamics
-            "k_u_att": 0.30,
-            
-            # Integration dynamics
-            "k_i_att": 0.25,
-            "k_i_u": 0.06,
-            "mu_i": 0.03,
-            
-            # Precision dynamics
-            "k_p_pe": 0.15,
-            "k_p_u": 0.05,
-            "k_p_i": 0.12,
-            "mu_p": 0.015,
-            
-            # Gating dynamics
-            "k_g_i": 0.08,
-            "k_g_p": 0.12,
-            "k_g_u": 0.08,
-            "k_g_a": 0.10,
-            "mu_g": 0.015,
-            
-            # Phi dynamics
-            "k_phi_gp": 0.08,
-            "mu_phi": 0.015,
-            
-            # Narrative intensity (rumination) dynamics
-            "k_s_u": 0.08,
-            "k_s_pe": 0.06,
-            "k_s_dmg": 0.25,
-            "mu_s": 0.025,
-            
-            # Arousal dynamics
-            "k_a_pe": 0.15,
-            "k_a_u": 0.12,
-            "k_a_s": 0.08,
-            "k_a_calm": 0.40,
-            "mu_a": 0.05,
-            
-            # Valence dynamics
-            "k_v_r": 0.25,
-            "k_v_pe": 0.08,
-            "k_v_u": 0.05,
-            "k_v_reapp": 0.12,
-            "mu_v": 0.04,
-            
-            # Memory dynamics
-            "eta0": 0.18,
-            "k_eta_a": 0.60,
-            "w_mem_pe": 0.55,
-            "w_mem_a": 0.30,
-            "w_mem_v": 0.25,
-            "mu_mf": 0.06,
-            "k_ms": 0.02,
-            "mu_ms": 0.01,
-        }
+        return default_arc_config(self.config)
     
     def _init_assb_state(self) -> State:
         """Initialize ASSB state."""
@@ -355,13 +367,7 @@ class ARCGymWrapper(gym.Wrapper):
         self.episode_steps = 0
         
         # Clear per-episode tracking
-        self.arousal_history = []
-        self.valence_history = []
-        self.risk_history = []
-        self.risk_memory_history = []
-        self.u_mem_history = []
-        self.uncertainty_history = []
-        self.shift_active_history = []
+        self._ep_stats.reset()
         
         # Add ARC info
         info["arc_arousal"] = self.assb_state.a
@@ -416,17 +422,16 @@ class ARCGymWrapper(gym.Wrapper):
             reward=reward,
             u_exog=u_exog,
             control=control,
-            cfg=self.arc_cfg,
+            cfg=self.arc_params,
         )
         
         # Track metrics
-        self.arousal_history.append(self.assb_state.a)
-        self.valence_history.append(self.assb_state.v)
-        self.risk_history.append(arc_signals["risk"])
-        self.risk_memory_history.append(float(arc_signals.get("risk_memory", 0.0)))
-        self.u_mem_history.append(float(arc_signals.get("u_mem", 1.0)))
-        self.uncertainty_history.append(float(arc_signals.get("uncertainty", u_exog)))
-        self.shift_active_history.append(bool(shift_active))
+        a = self.assb_state.a
+        values = (a, self.assb_state.v, arc_signals["risk"], float(arc_signals.get("risk_memory", 0.0)),
+                  float(arc_signals.get("u_mem", 1.0)), float(arc_signals.get("uncertainty", u_exog)),
+                  float(shift_active), float(a > self.config.a_safe))
+        for name, x in zip(ARC_EPISODE_CHANNELS, values):
+            self._ep_stats.add(name, x)
         
         # Apply reward shaping
         shaped_reward = self._shape_reward(reward, arc_signals)
@@ -449,22 +454,29 @@ class ARCGymWrapper(gym.Wrapper):
         return self._augment_observation(obs), shaped_reward, terminated, truncated, info
     
     def get_arc_metrics(self) -> Dict[str, float]:
-        """Get summary ARC metrics for the episode."""
-        if not self.arousal_history:
+        """Get summary ARC metrics for the episode (from the running aggregates, O(1))."""
+        st = self._ep_stats
+        if not st.count("arousal"):
             return {"mean_arousal": 0.0, "max_arousal": 0.0, "mean_risk": 0.0}
         
         return {
-            "mean_arousal": np.mean(self.arousal_history),
-            "max_arousal": np.max(self.arousal_history),
-            "mean_valence": np.mean(self.valence_history),
-            "mean_risk": np.mean(self.risk_history),
-            "high_arousal_ratio": np.mean([a > self.config.a_safe for a in self.arousal_history]),
-            "mean_risk_memory": float(np.mean(self.risk_memory_history)) if self.risk_memory_history else 0.0,
-            "mean_u_mem": float(np.mean(self.u_mem_history)) if self.u_mem_history else 1.0,
-            "min_u_mem": float(np.min(self.u_mem_history)) if self.u_mem_history else 1.0,
-            "mean_uncertainty": float(np.mean(self.uncertainty_history)) if self.uncertainty_history else 0.0,
-            "shift_active_ratio": float(np.mean(self.shift_active_history)) if self.shift_active_history else 0.0,
+            "mean_arousal": st.mean("arousal"),
+            "max_arousal": st.max("arousal"),
+            "mean_valence": st.mean("valence"),
+            "mean_risk": st.mean("risk"),
+            "high_arousal_ratio": st.mean("high_arousal"),
+            "mean_risk_memory": st.mean("risk_memory"),
+            "mean_u_mem": st.mean("u_mem"),
+            "min_u_mem": st.min("u_mem"),
+            "mean_uncertainty": st.mean("uncertainty"),
+            "shift_active_ratio": st.mean("shift_active"),
         }
+    
+    def get_arc_history(self) -> Dict[str, List[float]]:
+        """Per-step values of the current episode by channel (needs `config.keep_history`)."""
+        if not self.config.keep_history:
+            raise RuntimeError("ARC histories are not kept; set ARCWrapperConfig(keep_history=True)")
+        return {name: self._ep_stats.values(name) for name in ARC_EPISODE_CHANNELS}
 
 
 def make_arc_wrapped_env(
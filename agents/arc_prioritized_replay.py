@@ -0,0 +1,202 @@
+"""
+ARC-prioritized replay for Stable-Baselines3 DQN.
+
+`ARCGatedReplayBuffer` can only skip transitions or bias sampling toward a
+recent window. This buffer samples every transition in proportion to a
+priority kept in a `SumTree` (O(log n) sampling and updates):
+
+    p_i = (|td_i| + eps) ** alpha * arc_i
+    arc_i = (1 + risk_bonus * risk_i + shift_bonus * shift_active_i)
+            * clip(u_mem_i, u_mem_floor, 1) ** u_mem_power
+
+`risk`, `shift_active` and `u_mem` are the `arc_risk`, `arc_shift_active` and
+`arc_u_mem` info fields stored with each transition. Risky transitions and
+those seen during a detected shift are replayed more; transitions stored
+while the memory gate was closed are replayed less. New transitions get the
+largest TD priority seen so far.
+
+Samples carry importance-sampling weights `(N * P(i)) ** -beta`, normalized by
+the batch maximum, with beta annealed from `beta_start` to `beta_end`.
+`ARCPrioritizedDQN` multiplies each sample's Huber loss by that weight and
+updates the sampled priorities with the batch's TD errors in one vectorized
+call. The buffer is a plain SB3 `ReplayBuffer` subclass, so it can also be
+passed as `replay_buffer_class` to other DQNs. Their priorities then stay
+at the insertion value.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+import numpy as np
+import torch as th
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecNormalize
+
+from agents.arc_weighted_dqn import ARCWeightedDQN, ARCWeightReplayBuffer
+from agents.stats import RunningStat
+from agents.sum_tree import SumTree
+
+
+@dataclass
+class ARCPrioritizedReplayConfig:
+    alpha: float = 0.6
+    eps: float = 1e-6
+
+    # Importance sampling: beta goes from beta_start to beta_end over beta_anneal_samples sample() calls
+    beta_start: float = 0.4
+    beta_end: float = 1.0
+    beta_anneal_samples: int = 100_000
+
+    # ARC blend
+    risk_bonus: float = 1.0
+    shift_bonus: float = 1.0
+    u_mem_power: float = 1.0
+    u_mem_floor: float = 0.1
+
+
+class ARCPrioritizedReplayBufferSamples(NamedTuple):
+    """`ARCReplayBufferSamples` plus IS weights and the sum-tree index of each sample."""
+    observations: th.Tensor
+    actions: th.Tensor
+    next_observations: th.Tensor
+    dones: th.Tensor
+    rewards: th.Tensor
+    weights: th.Tensor
+    is_weights: th.Tensor
+    indices: np.ndarray
+
+
+class ARCPrioritizedReplayBuffer(ARCWeightReplayBuffer):
+    """Sum-tree prioritized replay with priorities blended from TD error and stored ARC signals."""
+
+    def __init__(
+        self,
+        buffer_size: int,
+        observation_space: spaces.Space,
+        action_space: spaces.Space,
+        device: Union[th.device, str] = "auto",
+        n_envs: int = 1,
+        optimize_memory_usage: bool = False,
+        handle_timeout_termination: bool = True,
+        arc_config: Optional[ARCPrioritizedReplayConfig] = None,
+    ):
+        if optimize_memory_usage:
+            # The slot after `pos` doubles as next_obs there, so it cannot be given its own priority
+            raise ValueError("ARCPrioritizedReplayBuffer does not support optimize_memory_usage")
+        super().__init__(
+            buffer_size=buffer_size,
+            observation_space=observation_space,
+            action_space=action_space,
+            device=device,
+            n_envs=n_envs,
+            optimize_memory_usage=optimize_memory_usage,
+            handle_timeout_termination=handle_timeout_termination,
+        )
+        self.arc_config = arc_config or ARCPrioritizedReplayConfig()
+        self.risk = np.zeros((self.buffer_size, self.n_envs), dtype=np.float32)
+        self.shift_active = np.zeros((self.buffer_size, self.n_envs), dtype=bool)
+
+        # Leaf of transition (pos, env) is pos * n_envs + env
+        self.tree = SumTree(self.buffer_size * self.n_envs)
+        self.max_td = 1.0
+        self.n_sample_calls: int = 0
+        self.n_priority_updates: int = 0
+        self.is_weight_stat = RunningStat()
+
+    def _arc_factor(self, batch_inds: np.ndarray, env_indices: np.ndarray) -> np.ndarray:
+        cfg = self.arc_config
+        u_mem = np.clip(self.u_mem[batch_inds, env_indices], cfg.u_mem_floor, 1.0).astype(np.float64)
+        bonus = (1.0 + cfg.risk_bonus * self.risk[batch_inds, env_indices]
+                 + cfg.shift_bonus * self.shift_active[batch_inds, env_indices])
+        return bonus * u_mem ** cfg.u_mem_power
+
+    def _set_priorities(self, leaves: np.ndarray, td: np.ndarray) -> None:
+        batch_inds, env_indices = np.divmod(leaves, self.n_envs)
+        self.tree.update(leaves, td ** self.arc_config.alpha * self._arc_factor(batch_inds, env_indices))
+
+    def add(
+        self,
+        obs: np.ndarray,
+        next_obs: np.ndarray,
+        action: np.ndarray,
+        reward: np.ndarray,
+        done: np.ndarray,
+        infos: list[dict[str, Any]],
+    ) -> None:
+        pos = self.pos
+        self.risk[pos] = [info.get("arc_risk", 0.0) for info in infos]
+        self.shift_active[pos] = [bool(info.get("arc_shift_active", False)) for info in infos]
+        super().add(obs=obs, next_obs=next_obs, action=action, reward=reward, done=done, infos=infos)
+
+        leaves = pos * self.n_envs + np.arange(self.n_envs)
+        self._set_priorities(leaves, np.full(self.n_envs, self.max_td))
+
+    def beta(self) -> float:
+        cfg = self.arc_config
+        frac = min(1.0, self.n_sample_calls / max(1, cfg.beta_anneal_samples))
+        return cfg.beta_start + frac * (cfg.beta_end - cfg.beta_start)
+
+    def sample(self, batch_size: int, env: Optional[VecNormalize] = None) -> ARCPrioritizedReplayBufferSamples:
+        # Stratified: one prefix sum from each of batch_size equal slices of the total
+        total = self.tree.total
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * (total / batch_size)
+        leaves = self.tree.find(values)
+        batch_inds, env_indices = np.divmod(leaves, self.n_envs)
+
+        n = self.size() * self.n_envs
+        is_weights = (n * self.tree.get(leaves) / total) ** -self.beta()
+        is_weights /= is_weights.max()
+        self.is_weight_stat.add_many(is_weights)
+        self.n_sample_calls += 1
+
+        data = tuple(map(self.to_torch, self._sample_arrays(batch_inds, env_indices, env)))
+        return ARCPrioritizedReplayBufferSamples(
+            *data,
+            is_weights=self.to_torch(is_weights.astype(np.float32).reshape(-1, 1)),
+            indices=leaves,
+        )
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        """Re-prioritize the sampled transitions `indices` from their new TD errors."""
+        td = np.abs(np.asarray(td_errors, dtype=np.float64)).ravel() + self.arc_config.eps
+        self.max_td = max(self.max_td, float(td.max()))
+        self._set_priorities(np.asarray(indices, dtype=np.int64), td)
+        self.n_priority_updates += 1
+
+    def get_priority_stats(self) -> dict[str, float]:
+        return {
+            "sample_calls": float(self.n_sample_calls),
+            "priority_updates": float(self.n_priority_updates),
+            "beta": float(self.beta()),
+            "priority_total": float(self.tree.total),
+            "max_td_error": float(self.max_td),
+            "mean_is_weight": float(self.is_weight_stat.mean) if self.is_weight_stat.count else 1.0,
+        }
+
+
+class ARCPrioritizedDQN(ARCWeightedDQN):
+    """
+    DQN on `ARCPrioritizedReplayBuffer`: IS-weighted Huber loss and batched priority updates.
+
+    u_mem already lowers the sampling priority. With `use_u_mem_loss_weight`
+    each loss is also scaled by the clipped stored u_mem, as in `ARCWeightedDQN`.
+    The IS weights are logged as `train/is_weight_*` and the u_mem factor, when
+    applied, as `train/arc_weight_*`.
+    """
+
+    def __init__(self, *args, w_min: float = 0.3, use_u_mem_loss_weight: bool = False, **kwargs):
+        if kwargs.get("replay_buffer_class") is None:
+            kwargs["replay_buffer_class"] = ARCPrioritizedReplayBuffer
+        self.use_u_mem_loss_weight = use_u_mem_loss_weight
+        super().__init__(*args, w_min=w_min, **kwargs)
+
+    def _loss_weight_terms(self, replay_data: ARCPrioritizedReplayBufferSamples) -> Dict[str, th.Tensor]:
+        terms = {"is_weight": replay_data.is_weights}
+        if self.use_u_mem_loss_weight:
+            terms.update(super()._loss_weight_terms(replay_data))
+        return terms
+
+    def _on_td_errors(self, replay_data: ARCPrioritizedReplayBufferSamples, td_errors: th.Tensor) -> None:
+        self.replay_buffer.update_priorities(replay_data.indices, td_errors.cpu().numpy())
@@ -10,10 +10,24 @@ Motivation:
 This buffer reads ARC signals from `infos` (produced by `ARCGymWrapper`) and can
 skip storing transitions when `arc_u_mem` is low (optional) and can bias replay
 toward recent transitions when the agent is in "shift mode" (`arc_shift_active`).
+With several sub-envs, a row is skipped only when every sub-env's gate is closed,
+and shift mode is on when any sub-env is in it. `arc_u_mem`, `arc_risk` and
+`arc_shift_active` are kept per transition in float16 or uint8 columns
+(`get_arc_columns`).
+
+`compact=True` stores the rest in less memory:
+- float observations as float16 (unless `compact_obs_float16=False`),
+- one copy of each observation: next_obs is read from the following slot;
+  only transitions whose successor slot holds something else (episode ends,
+  skipped rows) keep their own next_obs in a side table,
+- dones/timeouts as bools and Discrete actions in the smallest unsigned int.
+Samples come back in the original dtypes. `bytes_per_transition()` reports the
+footprint, e.g. to size 1M-transition buffers.
 """
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
 from typing import Any, Optional, Union
 
@@ -21,6 +35,8 @@ import numpy as np
 import torch as th
 from gymnasium import spaces
 from stable_baselines3.common.buffers import ReplayBuffer
+from stable_baselines3.common.type_aliases import ReplayBufferSamples
+from stable_baselines3.common.vec_env import VecNormalize
 
 
 @dataclass
@@ -38,6 +54,13 @@ class ARCGatedReplayConfig:
     shift_recent_window: int = 5000
     shift_recent_fraction: float = 1.0
 
+    # Per-transition ARC columns: "float16" or "uint8" (values in [0, 1], quantized to 1/255)
+    arc_column_dtype: str = "float16"
+
+    # Compact storage (optional)
+    compact: bool = False
+    compact_obs_float16: bool = True
+
 
 class ARCGatedReplayBuffer(ReplayBuffer):
     """ReplayBuffer that can skip storing transitions when ARC gates memory."""
@@ -53,6 +76,11 @@ class ARCGatedReplayBuffer(ReplayBuffer):
         handle_timeout_termination: bool = True,
         arc_config: Optional[ARCGatedReplayConfig] = None,
     ):
+        arc_config = arc_config or ARCGatedReplayConfig()
+        if arc_config.arc_column_dtype not in ("float16", "uint8"):
+            raise ValueError(f"arc_column_dtype must be 'float16' or 'uint8', got {arc_config.arc_column_dtype!r}")
+        if arc_config.compact and optimize_memory_usage:
+            raise ValueError("compact mode already keeps a single copy of next_obs; leave optimize_memory_usage off")
         super().__init__(
             buffer_size=buffer_size,
             observation_space=observation_space,
@@ -62,7 +90,14 @@ class ARCGatedReplayBuffer(ReplayBuffer):
             optimize_memory_usage=optimize_memory_usage,
             handle_timeout_termination=handle_timeout_termination,
         )
-        self.arc_config = arc_config or ARCGatedReplayConfig()
+        self.arc_config = arc_config
+
+        column_dtype = np.dtype(arc_config.arc_column_dtype)
+        self.u_mem = np.zeros((self.buffer_size, self.n_envs), dtype=column_dtype)
+        self.risk = np.zeros((self.buffer_size, self.n_envs), dtype=column_dtype)
+        self.shift_active = np.zeros((self.buffer_size, self.n_envs), dtype=bool)
+        if arc_config.compact:
+            self._compact_storage()
 
         self.n_added: int = 0
         self.n_skipped: int = 0
@@ -71,6 +106,49 @@ class ARCGatedReplayBuffer(ReplayBuffer):
         self.n_sample_calls: int = 0
         self.n_recent_sample_calls: int = 0
 
+    def _compact_storage(self) -> None:
+        # np.zeros pages are only committed when written, so the arrays replaced here never took memory
+        self._obs_dtype = self.observations.dtype
+        obs_dtype = self._obs_dtype
+        if self.arc_config.compact_obs_float16 and np.issubdtype(obs_dtype, np.floating):
+            obs_dtype = np.float16
+        self.observations = np.zeros(self.observations.shape, dtype=obs_dtype)
+        self.next_observations = None
+        # Transitions whose next_obs is not in the following slot, keyed by pos * n_envs + env
+        self.next_obs_detached = np.zeros((self.buffer_size, self.n_envs), dtype=bool)
+        self._detached_next_obs: dict[int, np.ndarray] = {}
+
+        self._action_dtype = self.actions.dtype
+        if isinstance(self.action_space, spaces.Discrete) and int(self.action_space.start) >= 0:
+            largest = int(self.action_space.start + self.action_space.n - 1)
+            self.actions = np.zeros(self.actions.shape, dtype=np.min_scalar_type(largest))
+        self.dones = np.zeros(self.dones.shape, dtype=bool)
+        self.timeouts = np.zeros(self.timeouts.shape, dtype=bool)
+
+    def _encode_column(self, values: np.ndarray) -> np.ndarray:
+        if self.u_mem.dtype == np.uint8:
+            return np.round(np.clip(values, 0.0, 1.0) * 255.0).astype(np.uint8)
+        return values.astype(np.float16)
+
+    def _decode_column(self, values: np.ndarray) -> np.ndarray:
+        if values.dtype == np.uint8:
+            return values.astype(np.float32) / 255.0
+        return values.astype(np.float32)
+
+    def get_arc_columns(self, batch_inds: np.ndarray, env_indices: np.ndarray) -> dict[str, np.ndarray]:
+        """Stored `arc_u_mem`, `arc_risk` and `arc_shift_active` of the given transitions, as float32."""
+        return {
+            "u_mem": self._decode_column(self.u_mem[batch_inds, env_indices]),
+            "risk": self._decode_column(self.risk[batch_inds, env_indices]),
+            "shift_active": self.shift_active[batch_inds, env_indices].astype(np.float32),
+        }
+
+    def _sample_uniform_batch_inds(self, batch_size: int) -> np.ndarray:
+        if self.arc_config.compact and self.full:
+            # Slot `pos` already holds the newest next_obs, not its own transition's obs
+            return (np.random.randint(1, self.buffer_size, size=batch_size) + self.pos) % self.buffer_size
+        return np.random.randint(0, self.size(), size=batch_size)
+
     def _sample_recent_batch_inds(self, batch_size: int, recent_window: int) -> np.ndarray:
         if batch_size <= 0:
             return np.array([], dtype=np.int64)
@@ -79,6 +157,8 @@ class ARCGatedReplayBuffer(ReplayBuffer):
         if size <= 0:
             return np.array([], dtype=np.int64)
 
+        if self.arc_config.compact and self.full:
+            size -= 1  # Skip slot `pos`, see _sample_uniform_batch_inds
         window = int(min(max(1, recent_window), size))
 
         if self.full:
@@ -100,27 +180,99 @@ class ARCGatedReplayBuffer(ReplayBuffer):
         infos: list[dict[str, Any]],
     ) -> None:
         cfg = self.arc_config
-        info0 = infos[0] if infos else {}
-        self.last_u_mem = float(info0.get("arc_u_mem", self.last_u_mem))
-        self.last_shift_active = bool(info0.get("arc_shift_active", self.last_shift_active))
+        infos = infos or [{}] * self.n_envs
+        u_mem = np.array([info.get("arc_u_mem", 1.0) for info in infos], dtype=np.float64)
+        risk = np.array([info.get("arc_risk", 0.0) for info in infos], dtype=np.float64)
+        shift_active = np.array([bool(info.get("arc_shift_active", False)) for info in infos])
+        self.last_u_mem = float(u_mem.mean())
+        self.last_shift_active = bool(shift_active.any())
 
         if (
             cfg.enable
             and cfg.skip_add_when_u_mem_low
-            and infos
             and self.size() >= cfg.min_transitions_to_gate
         ):
-            info0 = infos[0] if infos else {}
-            u_mem = float(info0.get("arc_u_mem", 1.0))
-            shift_active = bool(info0.get("arc_shift_active", False))
-
-            if u_mem < cfg.u_mem_threshold and not (cfg.bypass_when_shift_active and shift_active):
+            gated = u_mem < cfg.u_mem_threshold
+            if cfg.bypass_when_shift_active:
+                gated &= ~shift_active
+            if gated.all():
+                if cfg.compact:
+                    # The previous row's next_obs sits in slot `pos`, which the next add overwrites
+                    self._detach_next_obs(np.arange(self.n_envs), (self.pos - 1) % self.buffer_size)
                 self.n_skipped += 1
                 return
 
-        super().add(obs=obs, next_obs=next_obs, action=action, reward=reward, done=done, infos=infos)
+        self.u_mem[self.pos] = self._encode_column(u_mem)
+        self.risk[self.pos] = self._encode_column(risk)
+        self.shift_active[self.pos] = shift_active
+        if cfg.compact:
+            self._add_compact(obs, next_obs, action, reward, done, infos)
+        else:
+            super().add(obs=obs, next_obs=next_obs, action=action, reward=reward, done=done, infos=infos)
         self.n_added += 1
 
+    def _detach_next_obs(self, envs: np.ndarray, row: int) -> None:
+        """Copy the next_obs of (row, envs) out of slot row + 1 into the side table."""
+        for env_idx in envs:
+            if not self.next_obs_detached[row, env_idx]:
+                key = row * self.n_envs + int(env_idx)
+                self._detached_next_obs[key] = self.observations[(row + 1) % self.buffer_size, env_idx].copy()
+                self.next_obs_detached[row, env_idx] = True
+
+    def _add_compact(
+        self,
+        obs: np.ndarray,
+        next_obs: np.ndarray,
+        action: np.ndarray,
+        reward: np.ndarray,
+        done: np.ndarray,
+        infos: list[dict[str, Any]],
+    ) -> None:
+        # ReplayBuffer.add with optimize_memory_usage, plus the side table for detached next_obs
+        if isinstance(self.observation_space, spaces.Discrete):
+            obs = obs.reshape((self.n_envs, *self.obs_shape))
+            next_obs = next_obs.reshape((self.n_envs, *self.obs_shape))
+        action = action.reshape((self.n_envs, self.action_dim))
+
+        pos = self.pos
+        for env_idx in np.flatnonzero(self.next_obs_detached[pos]):
+            del self._detached_next_obs[pos * self.n_envs + int(env_idx)]
+        self.next_obs_detached[pos] = False
+
+        self.observations[pos] = np.array(obs)
+        self.observations[(pos + 1) % self.buffer_size] = np.array(next_obs)
+        self.actions[pos] = np.array(action)
+        self.rewards[pos] = np.array(reward)
+        self.dones[pos] = np.array(done)
+        if self.handle_timeout_termination:
+            self.timeouts[pos] = np.array([info.get("TimeLimit.truncated", False) for info in infos])
+        # The next add puts the reset observation in slot pos + 1
+        self._detach_next_obs(np.flatnonzero(self.dones[pos]), pos)
+
+        self.pos += 1
+        if self.pos == self.buffer_size:
+            self.full = True
+            self.pos = 0
+
+    def _get_samples(self, batch_inds: np.ndarray, env: Optional[VecNormalize] = None) -> ReplayBufferSamples:
+        if not self.arc_config.compact:
+            return super()._get_samples(batch_inds, env=env)
+
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        next_obs = self.observations[(batch_inds + 1) % self.buffer_size, env_indices, :].astype(self._obs_dtype)
+        for k in np.flatnonzero(self.next_obs_detached[batch_inds, env_indices]):
+            next_obs[k] = self._detached_next_obs[int(batch_inds[k]) * self.n_envs + int(env_indices[k])]
+
+        data = (
+            self._normalize_obs(self.observations[batch_inds, env_indices, :].astype(self._obs_dtype), env),
+            self.actions[batch_inds, env_indices, :].astype(self._action_dtype),
+            self._normalize_obs(next_obs, env),
+            # Only use dones that are not due to timeouts
+            (self.dones[batch_inds, env_indices] & ~self.timeouts[batch_inds, env_indices]).astype(np.float32).reshape(-1, 1),
+            self._normalize_reward(self.rewards[batch_inds, env_indices].reshape(-1, 1), env),
+        )
+        return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
+
     def sample(self, batch_size: int, env=None):
         self.n_sample_calls += 1
         cfg = self.arc_config
@@ -140,13 +292,29 @@ class ARCGatedReplayBuffer(ReplayBuffer):
                 return self._get_samples(recent_inds, env=env)
 
             other_batch = batch_size - recent_batch
-            other_inds = np.random.randint(0, self.size(), size=other_batch).astype(np.int64)
+            other_inds = self._sample_uniform_batch_inds(other_batch).astype(np.int64)
             batch_inds = np.concatenate([recent_inds, other_inds], axis=0)
             self.n_recent_sample_calls += 1
             return self._get_samples(batch_inds, env=env)
 
+        if cfg.compact:
+            return self._get_samples(self._sample_uniform_batch_inds(batch_size), env=env)
         return super().sample(batch_size=batch_size, env=env)
 
+    def bytes_per_transition(self) -> float:
+        """Storage per transition slot: the preallocated arrays, plus the side table averaged over stored transitions."""
+        arrays = [self.observations, self.actions, self.rewards, self.dones, self.timeouts,
+                  self.u_mem, self.risk, self.shift_active]
+        if getattr(self, "next_observations", None) is not None:
+            arrays.append(self.next_observations)
+        total = sum(a.nbytes for a in arrays) / (self.buffer_size * self.n_envs)
+        if self.arc_config.compact:
+            total += self.next_obs_detached.nbytes / (self.buffer_size * self.n_envs)
+            if self._detached_next_obs:
+                side = sum(sys.getsizeof(v) for v in self._detached_next_obs.values())
+                total += side / max(1, self.size() * self.n_envs)
+        return float(total)
+
     def get_gate_stats(self) -> dict[str, float]:
         total = self.n_added + self.n_skipped
         skipped_ratio = (self.n_skipped / total) if total > 0 else 0.0
@@ -159,4 +327,5 @@ class ARCGatedReplayBuffer(ReplayBuffer):
             "sample_calls": float(self.n_sample_calls),
             "recent_sample_calls": float(self.n_recent_sample_calls),
             "recent_sample_ratio": float(self.n_recent_sample_calls / self.n_sample_calls) if self.n_sample_calls > 0 else 0.0,
+            "bytes_per_transition": self.bytes_per_transition(),
         }
@@ -0,0 +1,290 @@
+"""
+VecEnv-native ARC wrapper for Stable-Baselines3.
+
+`ARCGymWrapper` wraps one gym env and keeps one scalar `State`. Under a
+`DummyVecEnv`/`SubprocVecEnv`, every sub-env therefore runs its own Python-level
+`step_dynamics` and ARC signal computation. `ARCVecEnvWrapper` instead sits on
+top of the VecEnv:
+- It holds the ASSB state of all `n_envs` as one `(n_envs, 10)` array
+  (`sim.batch`).
+- It computes ARC signals, the ASSB step, reward shaping and observation
+  augmentation in one vectorized pass per `step_wait`.
+- Episode aggregates are one `agents.stats.BatchRunningStat` over all envs
+  (per-step histories, `keep_history`, are only kept by `ARCGymWrapper`).
+
+It follows `ARCGymWrapper` rule for rule: shift mode, the partial ASSB reset at
+episode start and the same `arc_*` info fields (`arc_ep_*` on the last step of
+an episode). Those fields are what `ARCGatedReplayBuffer` reads. Two details
+are specific to auto-resetting VecEnvs:
+- `terminal_observation` is augmented with the ARC state the episode ended in.
+- The partial reset reads the reset info from `venv.reset_infos`.
+
+Usage:
+    venv = DummyVecEnv([lambda: NonStationaryCartPole() for _ in range(32)])
+    venv = ARCVecEnvWrapper(venv, ARCWrapperConfig(use_observation_augmentation=True))
+    model = DQN("MlpPolicy", venv)
+"""
+
+import numpy as np
+from gymnasium import spaces
+from typing import Dict, Any, Callable, List, Optional, Sequence, Union
+import os
+import sys
+
+from stable_baselines3.common.vec_env import DummyVecEnv, VecEnv, VecEnvWrapper
+
+# Add parent directory for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim.batch import STATE_FIELDS, CONTROL_FIELDS, U_DMG, U_ATT, U_MEM, U_CALM, S, V, A, MF, MS, U, step_dynamics_batch
+from sim.params import DynamicsParams
+from agents.arc_dqn_wrapper import ARC_EPISODE_CHANNELS, ARCWrapperConfig, default_arc_config
+from agents.stats import BatchRunningStat
+
+# `ARCGymWrapper._init_assb_state` defaults, in STATE_FIELDS order
+_STATE_DEFAULTS = (0.5, 0.5, 0.6, 0.5, 0.4, 0.6, 0.3, 0.5, 0.5, 0.2)
+
+
+class ARCVecEnvWrapper(VecEnvWrapper):
+    """ARCGymWrapper for a whole VecEnv, with the ASSB state of every sub-env in one array."""
+
+    def __init__(
+        self,
+        venv: VecEnv,
+        config: Optional[ARCWrapperConfig] = None,
+        arc_yaml_path: Optional[str] = None,
+    ):
+        self.config = config or ARCWrapperConfig()
+
+        # Load ARC configuration from YAML if provided
+        if arc_yaml_path:
+            import yaml
+            with open(arc_yaml_path, "r", encoding="utf-8") as f:
+                self.arc_cfg = yaml.safe_load(f)
+        else:
+            self.arc_cfg = default_arc_config(self.config)
+        self.arc_params = DynamicsParams.from_config(self.arc_cfg)
+
+        observation_space = venv.observation_space
+        if self.config.use_observation_augmentation:
+            # Add 4 ARC states: arousal, valence, risk, memory_gating_signal
+            extra_low = np.zeros(4, dtype=np.float32)
+            extra_high = np.ones(4, dtype=np.float32)
+            observation_space = spaces.Box(
+                low=np.concatenate([observation_space.low.astype(np.float32), extra_low]),
+                high=np.concatenate([observation_space.high.astype(np.float32), extra_high]),
+                dtype=np.float32
+            )
+        super().__init__(venv, observation_space=observation_space)
+
+        n = self.num_envs
+        self._init_row = np.array([self.arc_cfg.get(f + "0", d) for f, d in zip(STATE_FIELDS, _STATE_DEFAULTS)])
+        self.assb_state = np.tile(self._init_row, (n, 1))
+        self.episode_steps = np.zeros(n, dtype=np.int64)
+        self.phase_changed = np.zeros(n, dtype=bool)
+        self.current_phase = np.zeros(n, dtype=np.int64)
+        self.shift_steps_remaining = np.zeros(n, dtype=np.int64)
+
+        # Episode aggregates: one row per env, one column per ARC_EPISODE_CHANNELS entry
+        self._ep_stats = BatchRunningStat(n, len(ARC_EPISODE_CHANNELS))
+
+        # Optional external signals from the RL algorithm (NaN = not set)
+        self._external_pe = np.full(n, np.nan)
+        self._external_u_exog = np.full(n, np.nan)
+
+    def set_external_signals(self, pe: Union[None, float, np.ndarray] = None,
+                             u_exog: Union[None, float, np.ndarray] = None) -> None:
+        """
+        Inject RL-derived signals for every env (scalars or `(n_envs,)` arrays; None clears).
+
+        As in `ARCGymWrapper`, they are read on the next step and clipped to [0, 1].
+        """
+        self._external_pe[:] = np.nan if pe is None else np.clip(pe, 0.0, 1.0)
+        self._external_u_exog[:] = np.nan if u_exog is None else np.clip(u_exog, 0.0, 1.0)
+
+    # --- ARC computations (vectorized `ARCGymWrapper` methods) ---
+
+    def _compute_arc_signals(self, x: np.ndarray, u_exog: np.ndarray, shift_active: np.ndarray):
+        """Risk, memory risk, uncertainty and the `(n, 5)` control array for the rows of `x`."""
+        cfg = self.arc_cfg
+
+        uncertainty = np.maximum(x[:, U], u_exog)
+        a_excess = np.maximum(0.0, x[:, A] - cfg["a_safe"])
+        s_excess = np.maximum(0.0, x[:, S] - cfg["s_safe"])
+
+        risk = (cfg["arc_w_u"] * uncertainty +
+                cfg["arc_w_a"] * a_excess +
+                cfg["arc_w_s"] * s_excess)
+        risk = np.maximum(0.0, np.minimum(1.0, risk))
+
+        if self.config.mem_gate_include_uncertainty:
+            risk_memory = (cfg["arc_w_u"] * uncertainty + cfg["arc_w_a"] * a_excess + cfg["arc_w_s"] * s_excess)
+        else:
+            risk_memory = (cfg["arc_w_a"] * a_excess + cfg["arc_w_s"] * s_excess)
+        risk_memory = np.maximum(0.0, np.minimum(1.0, risk_memory))
+
+        control = np.zeros((x.shape[0], len(CONTROL_FIELDS)))
+        control[:, U_DMG] = np.minimum(1.0, cfg["arc_k_dmg"] * risk)
+        control[:, U_CALM] = np.minimum(1.0, cfg["arc_k_calm"] * a_excess)
+        control[:, U_ATT] = np.minimum(1.0, cfg["arc_k_att"] * x[:, U] * (1.0 - a_excess))
+        u_mem = 1.0 - np.minimum(1.0, cfg["arc_k_mem_block"] * risk_memory)
+        control[:, U_MEM] = np.where(shift_active, np.maximum(self.config.shift_mem_gate_floor, u_mem), u_mem)
+        return risk, risk_memory, uncertainty, control
+
+    def _shape_reward(self, reward: np.ndarray) -> np.ndarray:
+        """Apply ARC-based reward shaping (on the post-step arousal)."""
+        if not self.config.use_reward_shaping:
+            return reward
+        a = self.assb_state[:, A]
+        stability_bonus = np.where(a < self.config.a_safe, self.config.stability_bonus, 0.0)
+        instability_penalty = np.where(a > self.config.a_safe,
+                                       self.config.instability_penalty * (a - self.config.a_safe), 0.0)
+        return reward + stability_bonus - instability_penalty
+
+    def _arc_obs(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """`(len(rows), 4)` arousal, valence, risk, u_mem (the augmentation of `ARCGymWrapper`)."""
+        x = self.assb_state if rows is None else self.assb_state[rows]
+        shift_active = self.shift_steps_remaining > 0 if rows is None else self.shift_steps_remaining[rows] > 0
+        risk, _, _, control = self._compute_arc_signals(x, np.full(x.shape[0], 0.1), shift_active)
+        return np.column_stack([x[:, A], x[:, V], risk, control[:, U_MEM]]).astype(np.float32)
+
+    def _augment_observation(self, obs: np.ndarray) -> np.ndarray:
+        if not self.config.use_observation_augmentation:
+            return obs
+        return np.concatenate([obs, self._arc_obs()], axis=1)
+
+    def _reset_rows(self, rows: np.ndarray, reset_infos: Sequence[Dict[str, Any]]) -> None:
+        """Partial ASSB reset of `rows` at episode start (see `ARCGymWrapper.reset`)."""
+        x = self.assb_state
+        keep_a = np.minimum(x[rows, A], 0.4)  # Maintain some arousal
+        keep_mf, keep_ms = x[rows, MF], x[rows, MS]  # Keep memory
+        x[rows] = self._init_row
+        x[rows, A] = keep_a
+        x[rows, MF] = keep_mf
+        x[rows, MS] = keep_ms
+        x[rows, U] = [info.get("u_exog", 0.2) for info in reset_infos]
+
+        phase_changed = np.array([bool(info.get("phase_changed", False)) for info in reset_infos], dtype=bool)
+        self.phase_changed[rows] = phase_changed
+        self.current_phase[rows] = [info.get("phase", 0) for info in reset_infos]
+        boost = self.config.shift_boost_steps if self.config.use_shift_detection else 0
+        self.shift_steps_remaining[rows] = np.where(phase_changed, max(0, int(boost)), 0)
+        self.episode_steps[rows] = 0
+
+        self._ep_stats.reset(rows)
+
+        for k, info in zip(rows.tolist(), reset_infos):
+            info["arc_arousal"] = float(x[k, A])
+            info["arc_phase_changed"] = bool(self.phase_changed[k])
+            info["arc_shift_active"] = bool(self.shift_steps_remaining[k] > 0)
+
+    def _reset_infos(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        reset_infos = getattr(self.venv, "reset_infos", None)
+        if reset_infos is None:
+            return [{} for _ in rows]
+        return [reset_infos[k] for k in rows.tolist()]
+
+    # --- VecEnv API ---
+
+    def reset(self):
+        obs = self.venv.reset()
+        rows = np.arange(self.num_envs)
+        self._reset_rows(rows, self._reset_infos(rows))
+        return self._augment_observation(obs)
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self.venv.step_async(actions)
+
+    def step_wait(self):
+        obs, rewards, dones, infos = self.venv.step_wait()
+        self.episode_steps += 1
+
+        # Extract environmental signals
+        pe = np.array([info.get("pe", 0.1) for info in infos], dtype=np.float64)
+        u_exog = np.array([info.get("u_exog", 0.1) for info in infos], dtype=np.float64)
+        phase_changed = np.array([bool(info.get("phase_changed", False)) for info in infos], dtype=bool)
+
+        # Allow RL-side injection (e.g., TD error) to drive internal dynamics
+        pe = np.where(np.isnan(self._external_pe), pe, self._external_pe)
+        u_exog = np.where(np.isnan(self._external_u_exog), u_exog, np.maximum(u_exog, self._external_u_exog))
+        if self.config.use_shift_detection and self.config.shift_boost_steps > 0:
+            self.shift_steps_remaining[phase_changed] = int(self.config.shift_boost_steps)
+
+        shift_active = self.shift_steps_remaining > 0
+        self.shift_steps_remaining[shift_active] -= 1
+
+        # Increase uncertainty during shift mode
+        u_exog = np.where(shift_active, np.maximum(u_exog, self.config.shift_u_exog), u_exog)
+        self.phase_changed |= shift_active
+
+        # ARC signals and ASSB step for every env
+        risk, risk_memory, uncertainty, control = self._compute_arc_signals(self.assb_state, u_exog, shift_active)
+        reward = np.asarray(rewards, dtype=np.float64)
+        self.assb_state = step_dynamics_batch(self.assb_state, pe, reward, u_exog, control, self.arc_params)
+        a, v, u_mem = self.assb_state[:, A], self.assb_state[:, V], control[:, U_MEM]
+
+        # Track metrics
+        self._ep_stats.add(np.column_stack([a, v, risk, risk_memory, u_mem, uncertainty,
+                                            shift_active, a > self.config.a_safe]))
+
+        shaped_rewards = self._shape_reward(reward).astype(rewards.dtype)
+
+        # Add ARC info
+        cols = zip(a.tolist(), v.tolist(), risk.tolist(), uncertainty.tolist(),
+                   risk_memory.tolist(), u_mem.tolist(), shift_active.tolist())
+        for info, (a_k, v_k, risk_k, unc_k, rm_k, um_k, sa_k) in zip(infos, cols):
+            info["arc_arousal"] = a_k
+            info["arc_valence"] = v_k
+            info["arc_risk"] = risk_k
+            info["arc_uncertainty"] = unc_k
+            info["arc_risk_memory"] = rm_k
+            info["arc_u_mem"] = um_k
+            info["arc_shift_active"] = sa_k
+
+        # Augmentation from the post-step state; envs that reset get theirs after the partial reset
+        augment = self.config.use_observation_augmentation
+        arc_obs = self._arc_obs() if augment else None
+        done_rows = np.flatnonzero(dones)
+        if done_rows.size:
+            # Episode summary metrics (must be stored in `info` because VecEnv auto-resets)
+            for k in done_rows.tolist():
+                for name, value in self.get_arc_metrics(k).items():
+                    infos[k][f"arc_ep_{name}"] = float(value)
+                if augment and "terminal_observation" in infos[k]:
+                    infos[k]["terminal_observation"] = np.concatenate([infos[k]["terminal_observation"], arc_obs[k]])
+            self._reset_rows(done_rows, self._reset_infos(done_rows))
+            if augment:
+                arc_obs[done_rows] = self._arc_obs(done_rows)
+
+        if augment:
+            obs = np.concatenate([obs, arc_obs], axis=1)
+        return obs, shaped_rewards, dones, infos
+
+    def get_arc_metrics(self, index: int = 0) -> Dict[str, float]:
+        """Summary ARC metrics of the current episode of env `index` (as `ARCGymWrapper.get_arc_metrics`)."""
+        st = self._ep_stats
+        if not st.count[index]:
+            return {"mean_arousal": 0.0, "max_arousal": 0.0, "mean_risk": 0.0}
+        means = dict(zip(ARC_EPISODE_CHANNELS, st.mean(index).tolist()))
+        return {
+            "mean_arousal": means["arousal"],
+            "max_arousal": float(st.max[index, ARC_EPISODE_CHANNELS.index("arousal")]),
+            "mean_valence": means["valence"],
+            "mean_risk": means["risk"],
+            "high_arousal_ratio": means["high_arousal"],
+            "mean_risk_memory": means["risk_memory"],
+            "mean_u_mem": means["u_mem"],
+            "min_u_mem": float(st.min[index, ARC_EPISODE_CHANNELS.index("u_mem")]),
+            "mean_uncertainty": means["uncertainty"],
+            "shift_active_ratio": means["shift_active"],
+        }
+
+
+def make_arc_vec_env(
+    env_fn: Callable,
+    n_envs: int,
+    arc_config: Optional[ARCWrapperConfig] = None,
+    vec_env_cls=DummyVecEnv,
+) -> ARCVecEnvWrapper:
+    """`n_envs` copies of `env_fn()` in `vec_env_cls`, under one ARCVecEnvWrapper."""
+    return ARCVecEnvWrapper(vec_env_cls([env_fn for _ in range(n_envs)]), config=arc_config)
@@ -0,0 +1,222 @@
+"""
+Per-sample ARC loss weighting for Stable-Baselines3 DQN.
+
+The earlier loss-weighting DQNs (`WeightedLossDQN`, `ARCvNextDQN`) approximated
+u_mem gating by scaling the optimizer learning rate with the u_mem of the most
+recent env step. That scalar applied to the whole batch, even though the
+sampled transitions may have been collected thousands of steps earlier.
+
+Here the gate is stored with the data instead:
+- `ARCWeightReplayBuffer` records `arc_u_mem` for every transition, from the
+  info dict of each sub-env (1.0 when the env is not ARC-wrapped).
+- `ARCWeightedDQN.train()` clips the stored values to `[w_min, 1]` and
+  multiplies each sample's Huber loss by its own weight:
+  `loss = mean(w_i * huber(q_i - target_i))`.
+
+The weights come out of the same `sample()` call as the transitions, so no
+extra forward passes are needed and the optimizer state is left alone.
+Subclasses can scale the loss by further factors (`_loss_weight_terms`, e.g.
+importance-sampling weights). Each factor is logged and summarized under its
+own name by `get_weight_stats()`, which only covers factors that actually
+scaled the loss.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+import numpy as np
+import torch as th
+from gymnasium import spaces
+from stable_baselines3 import DQN
+from stable_baselines3.common.buffers import ReplayBuffer
+from stable_baselines3.common.vec_env import VecNormalize
+from torch.nn import functional as F
+
+from agents.stats import RunningStat
+
+
+class ARCReplayBufferSamples(NamedTuple):
+    """`ReplayBufferSamples` plus the stored ARC loss weight of each sample."""
+    observations: th.Tensor
+    actions: th.Tensor
+    next_observations: th.Tensor
+    dones: th.Tensor
+    rewards: th.Tensor
+    weights: th.Tensor
+
+
+class ARCWeightReplayBuffer(ReplayBuffer):
+    """ReplayBuffer that stores `arc_u_mem` next to every transition."""
+
+    def __init__(
+        self,
+        buffer_size: int,
+        observation_space: spaces.Space,
+        action_space: spaces.Space,
+        device: Union[th.device, str] = "auto",
+        n_envs: int = 1,
+        optimize_memory_usage: bool = False,
+        handle_timeout_termination: bool = True,
+    ):
+        super().__init__(
+            buffer_size=buffer_size,
+            observation_space=observation_space,
+            action_space=action_space,
+            device=device,
+            n_envs=n_envs,
+            optimize_memory_usage=optimize_memory_usage,
+            handle_timeout_termination=handle_timeout_termination,
+        )
+        self.u_mem = np.ones((self.buffer_size, self.n_envs), dtype=np.float32)
+
+    def add(
+        self,
+        obs: np.ndarray,
+        next_obs: np.ndarray,
+        action: np.ndarray,
+        reward: np.ndarray,
+        done: np.ndarray,
+        infos: list[dict[str, Any]],
+    ) -> None:
+        # Written before super().add, which advances self.pos
+        self.u_mem[self.pos] = [info.get("arc_u_mem", 1.0) for info in infos]
+        super().add(obs=obs, next_obs=next_obs, action=action, reward=reward, done=done, infos=infos)
+
+    def _get_samples(self, batch_inds: np.ndarray, env: Optional[VecNormalize] = None) -> ARCReplayBufferSamples:
+        # Sample randomly the env idx, as ReplayBuffer._get_samples does
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        return ARCReplayBufferSamples(*tuple(map(self.to_torch, self._sample_arrays(batch_inds, env_indices, env))))
+
+    def _sample_arrays(self, batch_inds: np.ndarray, env_indices: np.ndarray,
+                       env: Optional[VecNormalize] = None) -> tuple[np.ndarray, ...]:
+        """The `ARCReplayBufferSamples` fields at (batch_inds, env_indices), as arrays."""
+        if self.optimize_memory_usage:
+            next_obs = self._normalize_obs(self.observations[(batch_inds + 1) % self.buffer_size, env_indices, :], env)
+        else:
+            next_obs = self._normalize_obs(self.next_observations[batch_inds, env_indices, :], env)
+
+        data = (
+            self._normalize_obs(self.observations[batch_inds, env_indices, :], env),
+            self.actions[batch_inds, env_indices, :],
+            next_obs,
+            # Only use dones that are not due to timeouts
+            (self.dones[batch_inds, env_indices] * (1 - self.timeouts[batch_inds, env_indices])).reshape(-1, 1),
+            self._normalize_reward(self.rewards[batch_inds, env_indices].reshape(-1, 1), env),
+            self.u_mem[batch_inds, env_indices].reshape(-1, 1),
+        )
+        return data
+
+
+class _WeightStat:
+    """Running mean/min/max of one loss-weight factor, plus its shares below 0.9 and 0.5."""
+    __slots__ = ("value", "below_09", "below_05")
+
+    def __init__(self):
+        self.value = RunningStat()
+        self.below_09 = RunningStat()
+        self.below_05 = RunningStat()
+
+    def add_many(self, w: np.ndarray) -> None:
+        self.value.add_many(w)
+        self.below_09.add_many((w < 0.9).astype(np.float64))
+        self.below_05.add_many((w < 0.5).astype(np.float64))
+
+
+class ARCWeightedDQN(DQN):
+    """
+    DQN whose Huber loss is weighted per sample by the stored ARC memory gate.
+
+    Uses `ARCWeightReplayBuffer` unless another `replay_buffer_class` is given.
+    Custom buffers must return samples with a `weights` field, for example by
+    subclassing `ARCWeightReplayBuffer`.
+    """
+
+    def __init__(self, *args, w_min: float = 0.3, **kwargs):
+        if kwargs.get("replay_buffer_class") is None:
+            kwargs["replay_buffer_class"] = ARCWeightReplayBuffer
+        self.w_min = w_min
+        # Distribution of each loss-weight factor applied in train(), by name
+        self.weight_stats: Dict[str, _WeightStat] = {}
+        super().__init__(*args, **kwargs)
+
+    def _loss_weight_terms(self, replay_data: ARCReplayBufferSamples) -> Dict[str, th.Tensor]:
+        """
+        Factors of the per-sample loss weight, by name (the weight is their product).
+
+        Each factor is logged as `train/<name>_*`. `arc_weight` is the clipped stored u_mem.
+        """
+        return {"arc_weight": replay_data.weights.clamp(min=self.w_min, max=1.0)}
+
+    def _on_td_errors(self, replay_data: ARCReplayBufferSamples, td_errors: th.Tensor) -> None:
+        """Called with the detached TD errors of every batch (used by prioritized replay)."""
+
+    def train(self, gradient_steps: int, batch_size: int = 100) -> None:
+        # Switch to train mode (this affects batch norm / dropout)
+        self.policy.set_training_mode(True)
+        # Update learning rate according to schedule
+        self._update_learning_rate(self.policy.optimizer)
+
+        losses = []
+        applied: Dict[str, list] = {}
+        for _ in range(gradient_steps):
+            replay_data = self.replay_buffer.sample(batch_size, env=self._vec_normalize_env)  # type: ignore[union-attr]
+
+            with th.no_grad():
+                # Compute the next Q-values using the target network
+                next_q_values = self.q_net_target(replay_data.next_observations)
+                # Follow greedy policy: use the one with the highest value
+                next_q_values, _ = next_q_values.max(dim=1)
+                next_q_values = next_q_values.reshape(-1, 1)
+                # 1-step TD target
+                target_q_values = replay_data.rewards + (1 - replay_data.dones) * self.gamma * next_q_values
+
+            current_q_values = self.q_net(replay_data.observations)
+            current_q_values = th.gather(current_q_values, dim=1, index=replay_data.actions.long())
+
+            # Per-sample Huber loss, scaled by each transition's own weight
+            terms = self._loss_weight_terms(replay_data)
+            weights = None
+            for name, term in terms.items():
+                weights = term if weights is None else weights * term
+                applied.setdefault(name, []).append(term.detach())
+            loss = (weights * F.smooth_l1_loss(current_q_values, target_q_values, reduction="none")).mean()
+            losses.append(loss.item())
+            self._on_td_errors(replay_data, (target_q_values - current_q_values).detach())
+
+            self.policy.optimizer.zero_grad()
+            loss.backward()
+            th.nn.utils.clip_grad_norm_(self.policy.parameters(), self.max_grad_norm)
+            self.policy.optimizer.step()
+
+        self._n_updates += gradient_steps
+
+        self.logger.record("train/n_updates", self._n_updates, exclude="tensorboard")
+        self.logger.record("train/loss", np.mean(losses))
+        for name, chunks in applied.items():
+            w = th.cat(chunks).cpu().numpy().ravel()
+            self.weight_stats.setdefault(name, _WeightStat()).add_many(w)
+            self.logger.record(f"train/{name}_mean", float(w.mean()))
+            self.logger.record(f"train/{name}_min", float(w.min()))
+            self.logger.record(f"train/{name}_below_05", float(np.mean(w < 0.5)))
+
+    def get_weight_stats(self) -> dict[str, float]:
+        """
+        Mean/min/max of each applied loss-weight factor and its shares below 0.9 and 0.5.
+
+        Keys are `mean_<key>`, `min_<key>`, `max_<key>`, `<key>_below_09`, `<key>_below_05`
+        and `n_<key>_samples`, with `<key>` = `weight` for the u_mem factor and the
+        factor's name otherwise (e.g. `is_weight`).
+        """
+        out = {}
+        for name, stat in self.weight_stats.items():
+            key = "weight" if name == "arc_weight" else name
+            out.update({
+                f"mean_{key}": stat.value.mean,
+                f"min_{key}": stat.value.min,
+                f"max_{key}": stat.value.max,
+                f"{key}_below_09": stat.below_09.mean,
+                f"{key}_below_05": stat.below_05.mean,
+                f"n_{key}_samples": float(stat.value.count),
+            })
+        return out
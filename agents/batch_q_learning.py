@@ -0,0 +1,316 @@
+"""
+Vectorized multi-seed tabular Q-Learning for L6.
+
+One agent object trains `n_seeds` independent learners at once:
+- Q is a `(n_seeds, n_states, n_actions)` tensor; epsilon-greedy selection
+  and TD updates use fancy indexing over the seed axis.
+- Each seed draws from its own `np.random.Generator` (`SeedStreams`), and a
+  seed consumes numbers only on the steps where it is active, so its results
+  do not depend on which other seeds share the batch.
+- BatchARCQLearningAgent keeps the ASSB state of every seed as an `(n_seeds, 10)`
+  array (`sim.batch`) and applies the ARC alpha/epsilon modulation, shift
+  detection and memory-gate blocking of `ARCQLearningAgent` row-wise.
+
+The agents follow `agents.q_learning` rule for rule. The random streams
+differ from the scalar agents (global `np.random`), so the two match in
+distribution, not number for number.
+
+Every method takes `rows`, an int index array of the seeds that act on this
+step (seeds that are evaluating or already finished are left out). Epsilon
+decay and the episode stats are per seed too, so each seed can run its own
+sequence of episodes.
+
+Agent options listed in `row_kwargs` may also be given per seed, so the cells
+of an ablation share one agent (and one ASSB step). `BatchAgentStack` puts
+agents of different classes side by side behind the same interface.
+"""
+
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence, Union
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim.batch import STATE_FIELDS, CONTROL_FIELDS, U_DMG, U_ATT, U_MEM, U_CALM, A, S, U, step_dynamics_batch
+from sim.params import DynamicsParams
+from agents.q_learning import QLearningConfig
+
+
+def _all_rows(rows: Optional[np.ndarray], n: int) -> np.ndarray:
+    return np.arange(n) if rows is None else rows
+
+
+class SeedStreams:
+    """Per-seed uniform streams, drawn from each seed's Generator in blocks of `block`."""
+
+    def __init__(self, seeds: Sequence[int], block: int = 4096):
+        self.rngs = [np.random.default_rng(s) for s in seeds]
+        self.block = block
+        self.buf = np.stack([rng.random(block) for rng in self.rngs])
+        self.pos = np.zeros(len(self.rngs), dtype=np.int64)
+
+    def uniform(self, rows: np.ndarray) -> np.ndarray:
+        """One U[0, 1) draw for each seed in `rows`."""
+        pos = self.pos[rows]
+        for r in rows[pos >= self.block].tolist():
+            self.buf[r] = self.rngs[r].random(self.block)
+            self.pos[r] = 0
+        pos = self.pos[rows]
+        self.pos[rows] = pos + 1
+        return self.buf[rows, pos]
+
+
+class BatchQLearningAgent:
+    """Vanilla Q-Learning (baseline) for `len(seeds)` seeds at once."""
+
+    name = "ql_baseline"
+    # Constructor options that may be given per seed, with their defaults
+    row_kwargs: Dict[str, Any] = {}
+
+    def __init__(self, seeds: Sequence[int], config: Optional[QLearningConfig] = None):
+        self.config = config or QLearningConfig()
+        self.seeds = list(seeds)
+        self.n_seeds = len(self.seeds)
+        self.Q = np.zeros((self.n_seeds, self.config.n_states, self.config.n_actions))
+        self.epsilon = np.full(self.n_seeds, self.config.epsilon)
+        self.streams = SeedStreams(self.seeds)
+
+    def _epsilon(self, rows: np.ndarray) -> np.ndarray:
+        return self.epsilon[rows]
+
+    def select_actions(self, states: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Epsilon-greedy actions for the seeds in `rows` (`states` is aligned with `rows`)."""
+        explore = self.streams.uniform(rows) < self._epsilon(rows)
+        random_a = (self.streams.uniform(rows) * self.config.n_actions).astype(np.int64)
+        greedy = np.argmax(self.Q[rows, states], axis=1)
+        return np.where(explore, random_a, greedy)
+
+    def _td_update(self, rows, states, actions, rewards, next_states, dones, alpha) -> np.ndarray:
+        target = rewards + np.where(dones, 0.0, self.config.gamma * self.Q[rows, next_states].max(axis=1))
+        td_error = target - self.Q[rows, states, actions]
+        self.Q[rows, states, actions] += alpha * td_error
+        return td_error
+
+    def update(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+               next_states: np.ndarray, dones: np.ndarray, rows: np.ndarray, **signals) -> np.ndarray:
+        """Q-Learning update for the seeds in `rows`. Returns their TD errors."""
+        return self._td_update(rows, states, actions, rewards, next_states, dones, self.config.alpha)
+
+    def decay_epsilon(self, rows: Optional[np.ndarray] = None):
+        """Decay epsilon of the seeds in `rows` (all by default) after a training episode."""
+        rows = _all_rows(rows, self.n_seeds)
+        self.epsilon[rows] = np.maximum(self.config.epsilon_min, self.epsilon[rows] * self.config.epsilon_decay)
+
+    def reset_episode_stats(self, rows: Optional[np.ndarray] = None):
+        pass
+
+    def on_reset(self, rows: np.ndarray, u_exog: np.ndarray, goal_changed: np.ndarray):
+        pass
+
+    def episode_info(self, r: int) -> Dict[str, Any]:
+        """Extra result fields of seed `r` for the training episode that just ended."""
+        return {}
+
+
+class BatchARCQLearningAgent(BatchQLearningAgent):
+    """ARCQLearningAgent for `len(seeds)` seeds at once (ASSB state per seed)."""
+
+    name = "ql_arc"
+    row_kwargs = {"use_shift_detection": True, "use_mem_gating": True}
+
+    def __init__(self, seeds: Sequence[int], config: Optional[QLearningConfig] = None,
+                 arc_config: Optional[Dict[str, Any]] = None,
+                 use_shift_detection: Union[bool, Sequence[bool]] = True,
+                 use_mem_gating: Union[bool, Sequence[bool]] = True):
+        super().__init__(seeds, config)
+        # A bool for every seed, or one bool per seed
+        self.use_shift_detection = np.broadcast_to(np.asarray(use_shift_detection, dtype=bool), (self.n_seeds,)).copy()
+        self.use_mem_gating = np.broadcast_to(np.asarray(use_mem_gating, dtype=bool), (self.n_seeds,)).copy()
+
+        # Load ARC configuration from v2.yaml if not provided
+        if arc_config is None:
+            import yaml
+            config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       "configs", "v2.yaml")
+            with open(config_path, "r", encoding="utf-8") as f:
+                self.arc_cfg = yaml.safe_load(f)
+        else:
+            self.arc_cfg = arc_config
+        self.arc_cfg.setdefault("u0", 0.2)
+        self.arc_params = DynamicsParams.from_config(self.arc_cfg)
+
+        # Same hyper-parameters as ARCQLearningAgent
+        self.shift_boost_steps = 30
+        self.shift_eps_boost = 0.30
+        self.shift_alpha_boost = 0.50
+        self.uncertainty_eps_gain = 0.50
+        self.uncertainty_alpha_gain = 0.30
+
+        self.reset_assb_state()
+        self.shift_steps_remaining = np.zeros(self.n_seeds, dtype=np.int64)
+        self.reset_episode_stats()
+
+    def reset_assb_state(self):
+        """Reset ASSB state to initial values (between experiments)."""
+        row = [self.arc_cfg[f + "0"] for f in STATE_FIELDS]
+        self.assb_state = np.tile(np.asarray(row, dtype=np.float64), (self.n_seeds, 1))
+        self.blocked_updates = np.zeros(self.n_seeds, dtype=np.int64)
+
+    def reset_episode_stats(self, rows: Optional[np.ndarray] = None):
+        if rows is None:
+            self.arousal_sum = np.zeros(self.n_seeds)
+            self.arousal_count = np.zeros(self.n_seeds, dtype=np.int64)
+        else:
+            self.arousal_sum[rows] = 0.0
+            self.arousal_count[rows] = 0
+
+    def mean_arousal(self) -> np.ndarray:
+        """Per-seed mean arousal over the training steps of the current episode (NaN if none)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.arousal_sum / self.arousal_count
+
+    def on_reset(self, rows: np.ndarray, u_exog: np.ndarray, goal_changed: np.ndarray):
+        """Episode-start hook (see `ARCQLearningAgent.on_reset`)."""
+        self.shift_steps_remaining[rows[goal_changed & self.use_shift_detection[rows]]] = self.shift_boost_steps
+        self.assb_state[rows, U] = np.maximum(self.assb_state[rows, U], u_exog)
+
+    def episode_info(self, r: int) -> Dict[str, Any]:
+        # ARC-specific metrics
+        if self.arousal_count[r] == 0:
+            return {}
+        return {"mean_arousal": float(self.arousal_sum[r] / self.arousal_count[r]),
+                "blocked_updates": int(self.blocked_updates[r])}
+
+    def _arc_control(self, x: np.ndarray, u_exog: Optional[np.ndarray] = None):
+        """Vectorized `_compute_arc_control`: `(control (n, 5), uncertainty (n,))`."""
+        c = self.arc_params
+        u = x[:, U]
+        uncertainty = u if u_exog is None else np.maximum(u, u_exog)
+        a_excess = np.maximum(0.0, x[:, A] - c.a_safe)
+        s_excess = np.maximum(0.0, x[:, S] - c.s_safe)
+        risk = np.minimum(1.0, np.maximum(0.0, c.arc_w_u * uncertainty + c.arc_w_a * a_excess + c.arc_w_s * s_excess))
+        risk_memory = np.minimum(1.0, np.maximum(0.0, c.arc_w_a * a_excess + c.arc_w_s * s_excess))
+
+        control = np.zeros((x.shape[0], len(CONTROL_FIELDS)))
+        control[:, U_DMG] = np.minimum(1.0, c.arc_k_dmg * risk)
+        control[:, U_ATT] = np.minimum(1.0, c.arc_k_att * u * (1.0 - a_excess))
+        control[:, U_MEM] = 1.0 - np.minimum(1.0, c.arc_k_mem_block * risk_memory)
+        control[:, U_CALM] = np.minimum(1.0, c.arc_k_calm * a_excess)
+        return control, uncertainty
+
+    def _shift(self, rows: np.ndarray) -> np.ndarray:
+        return (self.shift_steps_remaining[rows] > 0) & self.use_shift_detection[rows]
+
+    def _epsilon(self, rows: np.ndarray) -> np.ndarray:
+        # Without exogenous input the ARC uncertainty is the ASSB u
+        uncertainty = self.assb_state[rows, U]
+        eps = self.epsilon[rows] * (1.0 + self.uncertainty_eps_gain * uncertainty
+                                    + self.shift_eps_boost * self._shift(rows))
+        return np.minimum(0.6, np.maximum(self.config.epsilon_min, eps))
+
+    def update(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+               next_states: np.ndarray, dones: np.ndarray, rows: np.ndarray,
+               pe: Optional[np.ndarray] = None, u_exog: Optional[np.ndarray] = None,
+               goal_changed: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        ARC-modulated update for the seeds in `rows` (see `ARCQLearningAgent.update`).
+
+        `pe`, `u_exog` and `goal_changed` are the per-seed environment signals
+        (defaults 0.1, 0.2 and False, as in the scalar agent without `env_info`).
+        """
+        n = len(rows)
+        pe = np.full(n, 0.1) if pe is None else pe
+        u_exog = np.full(n, 0.2) if u_exog is None else u_exog
+
+        # Context shifts (goal changes)
+        if goal_changed is not None:
+            self.shift_steps_remaining[rows[goal_changed]] = self.shift_boost_steps
+        self.shift_steps_remaining[rows] = np.maximum(0, self.shift_steps_remaining[rows] - 1)
+
+        # ARC signals and ASSB step
+        x = self.assb_state[rows]
+        control, uncertainty = self._arc_control(x, u_exog)
+        x = step_dynamics_batch(x, pe, rewards, u_exog, control, self.arc_params)
+        self.assb_state[rows] = x
+        self.arousal_sum[rows] += x[:, A]
+        self.arousal_count[rows] += 1
+
+        # Modulated learning rate; uncertainty/shift raise it, the memory gate scales it down
+        shift = self._shift(rows)
+        u_mem = control[:, U_MEM]
+        gating = self.use_mem_gating[rows]
+        mem_gate = np.where(gating, u_mem, 1.0)
+        alpha = self.config.alpha * (1.0 + self.uncertainty_alpha_gain * uncertainty
+                                     + self.shift_alpha_boost * shift) * mem_gate
+
+        # Block updates when the memory gate is closed, unless a shift is active
+        blocked = (u_mem < 0.2) & ~shift & gating
+        self.blocked_updates[rows[blocked]] += 1
+        td_error = np.zeros(n)
+        keep = ~blocked
+        if keep.any():
+            td_error[keep] = self._td_update(rows[keep], states[keep], actions[keep], rewards[keep],
+                                             next_states[keep], dones[keep], alpha[keep])
+        return td_error
+
+    def decay_epsilon(self, rows: Optional[np.ndarray] = None):
+        # ARC agent has slower epsilon decay (ARC handles exploration modulation)
+        rows = _all_rows(rows, self.n_seeds)
+        self.epsilon[rows] = np.maximum(self.config.epsilon_min,
+                                        self.epsilon[rows] * (self.config.epsilon_decay ** 0.5))
+
+
+class BatchAgentStack:
+    """
+    Several batched agents seen as one, over the concatenation of their seeds.
+
+    Rows `offsets[j]:offsets[j + 1]` belong to `agents[j]`. The `rows` given to
+    the methods must be in increasing order (the L6 runner keeps them so), and
+    `epsilon` is one array of which every agent holds a view of its block.
+    """
+
+    def __init__(self, agents: Sequence[BatchQLearningAgent]):
+        self.agents = list(agents)
+        self.offsets = np.concatenate([[0], np.cumsum([a.n_seeds for a in self.agents])])
+        self.n_seeds = int(self.offsets[-1])
+        self.epsilon = np.concatenate([a.epsilon for a in self.agents])
+        for j, agent in enumerate(self.agents):
+            agent.epsilon = self.epsilon[self.offsets[j]:self.offsets[j + 1]]
+
+    def _split(self, rows: np.ndarray) -> List[tuple]:
+        """`(agent, its local rows, slice of rows)` for every agent with rows in `rows`."""
+        cuts = np.searchsorted(rows, self.offsets).tolist()
+        return [(agent, rows[cuts[j]:cuts[j + 1]] - self.offsets[j], slice(cuts[j], cuts[j + 1]))
+                for j, agent in enumerate(self.agents) if cuts[j] < cuts[j + 1]]
+
+    def select_actions(self, states: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        actions = np.empty(len(rows), dtype=np.int64)
+        for agent, local, k in self._split(rows):
+            actions[k] = agent.select_actions(states[k], local)
+        return actions
+
+    def update(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+               next_states: np.ndarray, dones: np.ndarray, rows: np.ndarray, **signals) -> np.ndarray:
+        td_error = np.empty(len(rows))
+        for agent, local, k in self._split(rows):
+            td_error[k] = agent.update(states[k], actions[k], rewards[k], next_states[k], dones[k], local,
+                                       **{name: v[k] for name, v in signals.items()})
+        return td_error
+
+    def decay_epsilon(self, rows: Optional[np.ndarray] = None):
+        for agent, local, _ in self._split(_all_rows(rows, self.n_seeds)):
+            agent.decay_epsilon(local)
+
+    def reset_episode_stats(self, rows: Optional[np.ndarray] = None):
+        for agent, local, _ in self._split(_all_rows(rows, self.n_seeds)):
+            agent.reset_episode_stats(local)
+
+    def on_reset(self, rows: np.ndarray, u_exog: np.ndarray, goal_changed: np.ndarray):
+        for agent, local, k in self._split(rows):
+            agent.on_reset(local, u_exog[k], goal_changed[k])
+
+    def episode_info(self, r: int) -> Dict[str, Any]:
+        j = int(np.searchsorted(self.offsets, r, side="right")) - 1
+        return self.agents[j].episode_info(r - int(self.offsets[j]))
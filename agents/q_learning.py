@@ -17,6 +17,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sim.state import State
 from sim.dynamics import step_dynamics
+from sim.params import DynamicsParams
+from agents.stats import StatsTracker
 
 @dataclass
 class QLearningConfig:
@@ -27,6 +29,8 @@ class QLearningConfig:
     epsilon_min: float = 0.01
     n_states: int = 25
     n_actions: int = 4
+    stats_window: int = 1000    # Recent values kept per statistic (see agents.stats)
+    keep_history: bool = False  # Also keep every per-step value (debugging; unbounded)
 
 class QLearningAgent:
     """Vanilla Q-Learning agent (baseline)."""
@@ -38,9 +42,16 @@ class QLearningAgent:
         self.Q = np.zeros((self.config.n_states, self.config.n_actions))
         self.epsilon = self.config.epsilon
         
-        # Stats for analysis
-        self.td_errors: List[float] = []
-        self.rewards: List[float] = []
+        # Stats for analysis: running aggregates + last `stats_window` values
+        self.stats = StatsTracker(self.config.stats_window, self.config.keep_history)
+    
+    @property
+    def td_errors(self) -> List[float]:
+        return self.stats.values("td_error")
+    
+    @property
+    def rewards(self) -> List[float]:
+        return self.stats.values("reward")
         
     def select_action(self, state: int) -> int:
         """Epsilon-greedy action selection."""
@@ -56,8 +67,8 @@ class QLearningAgent:
         
         self.Q[state, action] += self.config.alpha * td_error
         
-        self.td_errors.append(abs(td_error))
-        self.rewards.append(reward)
+        self.stats.add("td_error", abs(td_error))
+        self.stats.add("reward", reward)
         
         return td_error
     
@@ -68,8 +79,7 @@ class QLearningAgent:
     
     def reset_episode_stats(self):
         """Reset per-episode statistics."""
-        self.td_errors = []
-        self.rewards = []
+        self.stats.reset()
 
 
 class ARCQLearningAgent(QLearningAgent):
@@ -104,6 +114,7 @@ class ARCQLearningAgent(QLearningAgent):
         
         # Ensure initial state values exist
         self.arc_cfg.setdefault("u0", 0.2)
+        self.arc_params = DynamicsParams.from_config(self.arc_cfg)
         
         # Initialize ASSB state
         self.assb_state = State(
@@ -114,9 +125,7 @@ class ARCQLearningAgent(QLearningAgent):
             ms=self.arc_cfg["ms0"], u=self.arc_cfg["u0"]
         )
         
-        # Track ARC metrics
-        self.arousal_history: List[float] = []
-        self.learning_rate_history: List[float] = []
+        # Track ARC metrics (per-episode ones in self.stats)
         self.blocked_updates: int = 0
 
         # For non-stationary environments (e.g., changing goals)
@@ -128,6 +137,26 @@ class ARCQLearningAgent(QLearningAgent):
         self.shift_alpha_boost: float = 0.50
         self.uncertainty_eps_gain: float = 0.50
         self.uncertainty_alpha_gain: float = 0.30
+    
+    @property
+    def arousal_history(self) -> List[float]:
+        return self.stats.values("arousal")
+    
+    @property
+    def learning_rate_history(self) -> List[float]:
+        return self.stats.values("learning_rate")
+    
+    def episode_metrics(self) -> Dict[str, float]:
+        """ARC aggregates of the current episode (empty before the first update)."""
+        if not self.stats.count("arousal"):
+            return {}
+        return {
+            "mean_arousal": self.stats.mean("arousal"),
+            "max_arousal": self.stats.max("arousal"),
+            "mean_learning_rate": self.stats.mean("learning_rate"),
+            "n_updates": self.stats.count("blocked"),
+            "blocked_ratio": self.stats.mean("blocked"),
+        }
         
     def on_reset(self, env_info: Optional[Dict[str, Any]] = None):
         """Hook for environments that provide episode-level context."""
@@ -251,15 +280,15 @@ class ARCQLearningAgent(QLearningAgent):
         # Update ASSB state
         self.assb_state = step_dynamics(
             self.assb_state, pe=pe, reward=reward, u_exog=u_exog,
-            control=arc_control, cfg=self.arc_cfg
+            control=arc_control, cfg=self.arc_params
         )
         
         # Track metrics
-        self.arousal_history.append(self.assb_state.a)
+        self.stats.add("arousal", self.assb_state.a)
         
         # Modulate learning rate
         modulated_alpha = self._modulate_learning_rate(self.config.alpha, arc_signals)
-        self.learning_rate_history.append(modulated_alpha)
+        self.stats.add("learning_rate", modulated_alpha)
         
         # Shift-aware memory gating: bypass protection during active shift detection
         # Rationale: When a goal change is detected, the agent NEEDS to update Q-values
@@ -269,7 +298,9 @@ class ARCQLearningAgent(QLearningAgent):
         # Block update only if memory gate is low AND we're NOT in shift mode
         if self.use_mem_gating and arc_signals["u_mem"] < 0.2 and not shift_active:
             self.blocked_updates += 1
+            self.stats.add("blocked", 1.0)
             return 0.0  # No update
+        self.stats.add("blocked", 0.0)
         
         # Standard Q-Learning update with modulated alpha
         target = reward + (0 if done else self.config.gamma * np.max(self.Q[next_state]))
@@ -277,8 +308,8 @@ class ARCQLearningAgent(QLearningAgent):
         
         self.Q[state, action] += modulated_alpha * td_error
         
-        self.td_errors.append(abs(td_error))
-        self.rewards.append(reward)
+        self.stats.add("td_error", abs(td_error))
+        self.stats.add("reward", reward)
         
         return td_error
     
@@ -291,8 +322,6 @@ class ARCQLearningAgent(QLearningAgent):
     def reset_episode_stats(self):
         """Reset per-episode statistics."""
         super().reset_episode_stats()
-        self.arousal_history = []
-        self.learning_rate_history = []
     
     def reset_assb_state(self):
         """Reset ASSB state to initial values (between experiments)."""
@@ -0,0 +1,185 @@
+"""
+Bounded-memory statistics for agents and wrappers.
+
+Agents used to append every per-step value (TD errors, rewards, arousal, ...)
+to Python lists that only `reset_episode_stats` cleared, so an agent driven
+continuously grew without bound. `StatsTracker` keeps, per named channel:
+- a `RunningStat` (count, sum, mean, max, min), updated in O(1),
+- a `RingBuffer` with the last `window` values (none with `window=0`),
+- the full history, only with `keep_history=True` (for debugging).
+
+`BatchRunningStat` is the `RunningStat` of many independent streams at once
+(for example one per env of a VecEnv), kept as arrays.
+
+Ratios are the means of 0/1 channels: for example `blocked` for the share of
+blocked updates, or a channel that records `a > a_safe` for the high-arousal
+share.
+"""
+
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class RunningStat:
+    """Count, sum, max and min of a stream of floats."""
+    __slots__ = ("count", "total", "max", "min")
+
+    def __init__(self):
+        self.reset()
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        self.total += x
+        if x > self.max:
+            self.max = x
+        if x < self.min:
+            self.min = x
+
+    def add_many(self, xs: np.ndarray) -> None:
+        """Add every value of a non-empty array at once."""
+        self.count += xs.size
+        self.total += float(xs.sum())
+        self.max = max(self.max, float(xs.max()))
+        self.min = min(self.min, float(xs.min()))
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = float("-inf")
+        self.min = float("inf")
+
+
+class RingBuffer:
+    """The last `capacity` floats of a stream, in a preallocated array."""
+    __slots__ = ("capacity", "_buf", "_n")
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"RingBuffer capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self._buf = np.empty(capacity)
+        self._n = 0
+
+    def append(self, x: float) -> None:
+        self._buf[self._n % self.capacity] = x
+        self._n += 1
+
+    def values(self) -> np.ndarray:
+        """Stored values, oldest first (a copy)."""
+        if self._n <= self.capacity:
+            return self._buf[:self._n].copy()
+        i = self._n % self.capacity
+        return np.concatenate([self._buf[i:], self._buf[:i]])
+
+    def __len__(self) -> int:
+        return min(self._n, self.capacity)
+
+    def clear(self) -> None:
+        self._n = 0
+
+
+class BatchRunningStat:
+    """`RunningStat` of `n` rows x `width` channels, updated one `(n, width)` block at a time."""
+    __slots__ = ("count", "total", "max", "min")
+
+    def __init__(self, n: int, width: int):
+        self.count = np.zeros(n, dtype=np.int64)
+        self.total = np.zeros((n, width))
+        self.max = np.full((n, width), float("-inf"))
+        self.min = np.full((n, width), float("inf"))
+
+    def add(self, x: np.ndarray) -> None:
+        """Add one value per row and channel."""
+        self.count += 1
+        self.total += x
+        np.maximum(self.max, x, out=self.max)
+        np.minimum(self.min, x, out=self.min)
+
+    def mean(self, row: int) -> np.ndarray:
+        """Per-channel means of `row` (NaN if it has no values)."""
+        count = self.count[row]
+        return self.total[row] / count if count else np.full(self.total.shape[1], float("nan"))
+
+    def reset(self, rows: np.ndarray) -> None:
+        self.count[rows] = 0
+        self.total[rows] = 0.0
+        self.max[rows] = float("-inf")
+        self.min[rows] = float("inf")
+
+
+class StatsTracker:
+    """Named running aggregates with a recent-value window and optional full histories."""
+
+    def __init__(self, window: int = 1000, keep_history: bool = False):
+        if window < 0:
+            raise ValueError(f"StatsTracker window must be >= 0, got {window}")
+        self.window = window
+        self.keep_history = keep_history
+        self._stats: Dict[str, RunningStat] = {}
+        self._recent: Dict[str, Optional[RingBuffer]] = {}
+        self._history: Dict[str, List[float]] = {}
+
+    def add(self, name: str, value: float) -> None:
+        stat = self._stats.get(name)
+        if stat is None:
+            stat = self._stats[name] = RunningStat()
+            self._recent[name] = RingBuffer(self.window) if self.window else None
+            self._history[name] = []
+        value = float(value)
+        stat.add(value)
+        recent = self._recent[name]
+        if recent is not None:
+            recent.append(value)
+        if self.keep_history:
+            self._history[name].append(value)
+
+    def stat(self, name: str) -> RunningStat:
+        """Aggregates of `name` (empty if nothing was recorded)."""
+        return self._stats.get(name) or RunningStat()
+
+    def count(self, name: str) -> int:
+        return self.stat(name).count
+
+    def mean(self, name: str, default: float = 0.0) -> float:
+        stat = self.stat(name)
+        return stat.mean if stat.count else default
+
+    def max(self, name: str, default: float = 0.0) -> float:
+        stat = self.stat(name)
+        return stat.max if stat.count else default
+
+    def min(self, name: str, default: float = 0.0) -> float:
+        stat = self.stat(name)
+        return stat.min if stat.count else default
+
+    def values(self, name: str) -> List[float]:
+        """Recorded values of `name`: the full history with `keep_history`, else the last `window`."""
+        if name not in self._stats:
+            return []
+        if self.keep_history:
+            return list(self._history[name])
+        recent = self._recent[name]
+        return recent.values().tolist() if recent is not None else []
+
+    def summary(self) -> Dict[str, float]:
+        """`<name>_mean`, `<name>_max`, `<name>_min` and `<name>_count` for every channel."""
+        out = {}
+        for name, stat in self._stats.items():
+            if not stat.count:
+                continue
+            out[f"{name}_mean"] = stat.mean
+            out[f"{name}_max"] = stat.max
+            out[f"{name}_min"] = stat.min
+            out[f"{name}_count"] = stat.count
+        return out
+
+    def reset(self) -> None:
+        for name in self._stats:
+            self._stats[name].reset()
+            if self._recent[name] is not None:
+                self._recent[name].clear()
+            self._history[name] = []
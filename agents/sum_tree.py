@@ -0,0 +1,69 @@
+"""
+Array-backed sum tree for prioritized replay.
+
+Leaf `i` holds the priority of slot `i`; every internal node holds the sum of
+its two children, so the root is the total priority. The tree is one flat
+float64 array (root at index 1, children of `k` at `2k` and `2k + 1`) padded
+to a power-of-two number of leaves, which keeps every leaf at the same depth
+and lets whole batches walk the tree level by level:
+- `update(idx, priorities)` writes a batch of leaves and recomputes only their
+  ancestors, O(batch * log n).
+- `find(values)` maps a batch of prefix sums in `[0, total)` to leaves,
+  O(batch * log n). Sampling `values` uniformly draws leaves in proportion to
+  their priority; zero-priority leaves (empty slots, padding) are never returned
+  while the total is positive.
+"""
+
+import numpy as np
+
+
+class SumTree:
+    """Sum tree over `capacity` non-negative priorities."""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"SumTree capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self._first_leaf = 1 << (capacity - 1).bit_length()
+        self._tree = np.zeros(2 * self._first_leaf)
+
+    @property
+    def total(self) -> float:
+        return float(self._tree[1])
+
+    def get(self, idx: np.ndarray) -> np.ndarray:
+        """Priorities of the leaves `idx`."""
+        return self._tree[np.asarray(idx) + self._first_leaf]
+
+    def update(self, idx: np.ndarray, priorities: np.ndarray) -> None:
+        """Set the priorities of the leaves `idx` (for repeated indices the last value wins)."""
+        idx = np.asarray(idx, dtype=np.int64).ravel()
+        if idx.size == 0:
+            return
+        priorities = np.asarray(priorities, dtype=np.float64).ravel()
+        if not np.all(np.isfinite(priorities)) or np.any(priorities < 0):
+            raise ValueError("SumTree priorities must be finite and non-negative")
+        if idx.min() < 0 or idx.max() >= self.capacity:
+            raise IndexError(f"SumTree leaf index out of range [0, {self.capacity})")
+
+        tree = self._tree
+        nodes = idx + self._first_leaf
+        tree[nodes] = priorities
+        # Repeated parents just get the same sum written twice
+        for _ in range(self._first_leaf.bit_length() - 1):
+            nodes >>= 1
+            tree[nodes] = tree[2 * nodes] + tree[2 * nodes + 1]
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Leaf index for each prefix sum in `values`."""
+        tree = self._tree
+        v = np.array(values, dtype=np.float64).ravel()
+        nodes = np.ones(v.shape[0], dtype=np.int64)
+        for _ in range(self._first_leaf.bit_length() - 1):
+            nodes <<= 1
+            left_sum = tree[nodes]
+            # Going right needs mass on the right; this guards against rounding at the edges
+            right = (v >= left_sum) & (tree[nodes + 1] > 0)
+            v -= left_sum * right
+            nodes += right
+        return nodes - self._first_leaf
@@ -0,0 +1,56 @@
+"""
+Plot trace channels from a sweep's traces.npz (mean +/- std across seeds).
+
+Usage:
+  python analysis/plot_traces.py --traces outputs_final/traces.npz --scenario reward_flip \
+      --controllers no_control arc_v1 arc_ultimate --channels perf a u_calm --out figures/traces_reward_flip.png
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from experiments.trace_store import TraceStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--traces", type=Path, default=Path("outputs_final/traces.npz"))
+    parser.add_argument("--scenario", required=True)
+    parser.add_argument("--controllers", nargs="+", required=True)
+    parser.add_argument("--channels", nargs="+", default=["perf", "a", "s"])
+    parser.add_argument("--seeds", nargs="*", type=int, default=None, help="Default: all stored seeds")
+    parser.add_argument("--out", type=Path, default=None, help="Output image (default: show)")
+    args = parser.parse_args()
+
+    store = TraceStore(str(args.traces))
+    fig, axes = plt.subplots(len(args.channels), 1, figsize=(8, 2.4 * len(args.channels)), sharex=True, squeeze=False)
+    t = range(store.horizon)
+    for ctrl in args.controllers:
+        sl = store.select(args.scenario, ctrl, args.seeds)
+        for ax, ch in zip(axes[:, 0], args.channels):
+            mean, std = sl[ch].mean(axis=0), sl[ch].std(axis=0)
+            ax.plot(t, mean, label=ctrl, linewidth=1.5)
+            ax.fill_between(t, mean - std, mean + std, alpha=0.2)
+            ax.set_ylabel(ch)
+    axes[0, 0].set_title(args.scenario)
+    axes[0, 0].legend(fontsize=8)
+    axes[-1, 0].set_xlabel("t")
+    fig.tight_layout()
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        fig.savefig(args.out, dpi=200)
+        print(f"Saved: {args.out}")
+    else:
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
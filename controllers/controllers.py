@@ -1,31 +1,141 @@
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+import numpy as np
 from sim.state import State
+from sim.params import coefficients
+from sim import batch as sb
+from controllers.mpc import mpc_gain
+from controllers.lqr_gains import configured_gain
+from controllers.scheduling import MultiRateScheduler, GainSchedule, BatchGainSchedule
+
+# Batched protocol: `act_batch(states, obs, params) -> (N, 5)` where `states` is an
+# (N, 10) array in `sim.batch.STATE_FIELDS` order, `obs` maps the same keys as the
+# scalar `obs` to (N,) arrays (or scalars), and columns follow `sim.batch.CONTROL_FIELDS`.
+# Row k equals `act(State(*states[k]), ...)` for the same inputs.
+
+def _neutral_controls(n: int) -> np.ndarray:
+    return np.tile(np.asarray(sb.CONTROL_DEFAULTS, dtype=np.float64), (n, 1))
+
+def _stack_controls(u_dmg, u_att, u_mem, u_calm, u_reapp) -> np.ndarray:
+    out = np.empty((len(u_dmg), len(sb.CONTROL_FIELDS)))
+    out[:, sb.U_DMG] = u_dmg
+    out[:, sb.U_ATT] = u_att
+    out[:, sb.U_MEM] = u_mem
+    out[:, sb.U_CALM] = u_calm
+    out[:, sb.U_REAPP] = u_reapp
+    return out
+
+def _obs_column(obs: Dict[str, Any], key: str, default: float, n: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(obs.get(key, default), dtype=np.float64), (n,))
+
+# Stateful controllers keep their per-trajectory state for `act_batch` as (N, k)
+# arrays in `self._batch`, allocated by `_init_batch(n)` on first use (or when N
+# changes) and dropped by `reset()`. One instance then drives N seeds in lockstep;
+# loop counters that are advanced every step are shared by all rows.
+
+def _batch_state(ctrl, n: int) -> Dict[str, Any]:
+    b = getattr(ctrl, "_batch", None)
+    if b is None or b["n"] != n:
+        b = ctrl._init_batch(n)
+        b["n"] = n
+        ctrl._batch = b
+    return b
+
+def _matvec(K: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Row-wise `K @ x[k]` for `x` of shape (N, m) and `K` of shape (r, m) or per-row (N, r, m).
+
+    Uses a stacked matmul rather than `x @ K.T`: each row then goes through the
+    same BLAS kernel (and rounding) as the scalar `K @ x`.
+    """
+    return np.matmul(K, x[:, :, None])[:, :, 0]
+
+class _PerfWindow:
+    """
+    Last `size` samples per row in an (N, size) ring buffer (replaces `list.append` + `pop(0)`).
+
+    `mean()` sums the window oldest-first, like `sum(history) / len(history)`, so
+    the batched controllers take the same slow-loop decisions as the scalar ones.
+    """
+
+    def __init__(self, n: int, size: int):
+        self.buf = np.zeros((n, size))
+        self.size = size
+        self.head = 0
+        self.count = 0
+
+    def push(self, x: np.ndarray) -> None:
+        self.buf[:, self.head] = x
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def mean(self) -> np.ndarray:
+        if self.count < self.size:
+            window = self.buf[:, :self.count]
+        else:
+            window = np.concatenate([self.buf[:, self.head:], self.buf[:, :self.head]], axis=1)
+        return np.cumsum(window, axis=1)[:, -1] / self.count
 
 class NoControl:
     name = "no_control"
     def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
         return {"u_dmg":0.0,"u_att":0.0,"u_mem":1.0,"u_calm":0.0,"u_reapp":0.0}
 
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        return _neutral_controls(states.shape[0])
+
 class NaiveCalm:
     name = "naive_calm"
     def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
-        a_safe = cfg["a_safe"]
+        a_safe = coefficients(cfg).a_safe
         u_calm = min(1.0, max(0.0, (st.a - a_safe) / max(1e-6, (1.0 - a_safe))))
         return {"u_dmg":0.0,"u_att":0.0,"u_mem":1.0,"u_calm":u_calm,"u_reapp":0.0}
 
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        a_safe = coefficients(params).a_safe
+        out = _neutral_controls(states.shape[0])
+        out[:, sb.U_CALM] = np.minimum(1.0, np.maximum(0.0, (states[:, sb.A] - a_safe) / max(1e-6, (1.0 - a_safe))))
+        return out
+
 class ARCv1:
     name = "arc_v1"
+    # Channels forced to their neutral value (u_mem -> 1, others -> 0); used by the ablations below.
+    ablate: Tuple[str, ...] = ()
+
     def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
-        risk = (cfg["arc_w_u"] * st.u +
-                cfg["arc_w_a"] * max(0.0, st.a - cfg["a_safe"]) +
-                cfg["arc_w_s"] * max(0.0, st.s - cfg["s_safe"]))
+        c = coefficients(cfg)
+        a_exc = max(0.0, st.a - c.a_safe)
+        risk = (c.arc_w_u * st.u +
+                c.arc_w_a * a_exc +
+                c.arc_w_s * max(0.0, st.s - c.s_safe))
         risk = max(0.0, min(1.0, risk))
-        u_dmg = min(1.0, cfg["arc_k_dmg"] * risk)
-        u_att = min(1.0, cfg["arc_k_att"] * st.u * (1.0 - max(0.0, st.a - cfg["a_safe"])))
-        u_mem = 1.0 - min(1.0, cfg["arc_k_mem_block"] * risk)
-        u_calm = min(1.0, cfg["arc_k_calm"] * max(0.0, st.a - cfg["a_safe"]))
-        u_reapp = min(1.0, cfg["arc_k_reapp"] * st.u * (1.0 - risk))
-        return {"u_dmg":u_dmg,"u_att":u_att,"u_mem":u_mem,"u_calm":u_calm,"u_reapp":u_reapp}
+        u_dmg = min(1.0, c.arc_k_dmg * risk)
+        u_att = min(1.0, c.arc_k_att * st.u * (1.0 - a_exc))
+        u_mem = 1.0 - min(1.0, c.arc_k_mem_block * risk)
+        u_calm = min(1.0, c.arc_k_calm * a_exc)
+        u_reapp = min(1.0, c.arc_k_reapp * st.u * (1.0 - risk))
+        out = {"u_dmg":u_dmg,"u_att":u_att,"u_mem":u_mem,"u_calm":u_calm,"u_reapp":u_reapp}
+        for ch in self.ablate:
+            out[ch] = sb.CONTROL_DEFAULTS[sb.CONTROL_FIELDS.index(ch)]
+        return out
+
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        c = coefficients(params)
+        u = states[:, sb.U]
+        a_exc = np.maximum(0.0, states[:, sb.A] - c.a_safe)
+        risk = (c.arc_w_u * u +
+                c.arc_w_a * a_exc +
+                c.arc_w_s * np.maximum(0.0, states[:, sb.S] - c.s_safe))
+        risk = np.maximum(0.0, np.minimum(1.0, risk))
+        out = np.empty((states.shape[0], len(sb.CONTROL_FIELDS)))
+        out[:, sb.U_DMG] = np.minimum(1.0, c.arc_k_dmg * risk)
+        out[:, sb.U_ATT] = np.minimum(1.0, c.arc_k_att * u * (1.0 - a_exc))
+        out[:, sb.U_MEM] = 1.0 - np.minimum(1.0, c.arc_k_mem_block * risk)
+        out[:, sb.U_CALM] = np.minimum(1.0, c.arc_k_calm * a_exc)
+        out[:, sb.U_REAPP] = np.minimum(1.0, c.arc_k_reapp * u * (1.0 - risk))
+        for ch in self.ablate:
+            j = sb.CONTROL_FIELDS.index(ch)
+            out[:, j] = sb.CONTROL_DEFAULTS[j]
+        return out
 
 class PerfOptimized:
     """Baseline competitivo: maximiza performance sin regular afecto."""
@@ -35,69 +145,34 @@ class PerfOptimized:
         u_att = cfg.get("perf_opt_att", 0.70)
         return {"u_dmg":0.0,"u_att":u_att,"u_mem":1.0,"u_calm":0.0,"u_reapp":0.0}
 
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        out = _neutral_controls(states.shape[0])
+        out[:, sb.U_ATT] = params.get("perf_opt_att", 0.70)
+        return out
+
 # ============================================================================
 # ABLATION CONTROLLERS - Para estudiar contribución de cada componente de ARC
 # ============================================================================
 
-class ARC_NoDMG:
+class ARC_NoDMG(ARCv1):
     """Ablation: ARC sin control de DMN (g_dmg = 0)."""
     name = "arc_no_dmg"
-    def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
-        risk = (cfg["arc_w_u"] * st.u +
-                cfg["arc_w_a"] * max(0.0, st.a - cfg["a_safe"]) +
-                cfg["arc_w_s"] * max(0.0, st.s - cfg["s_safe"]))
-        risk = max(0.0, min(1.0, risk))
-        u_dmg = 0.0  # ABLATED
-        u_att = min(1.0, cfg["arc_k_att"] * st.u * (1.0 - max(0.0, st.a - cfg["a_safe"])))
-        u_mem = 1.0 - min(1.0, cfg["arc_k_mem_block"] * risk)
-        u_calm = min(1.0, cfg["arc_k_calm"] * max(0.0, st.a - cfg["a_safe"]))
-        u_reapp = min(1.0, cfg["arc_k_reapp"] * st.u * (1.0 - risk))
-        return {"u_dmg":u_dmg,"u_att":u_att,"u_mem":u_mem,"u_calm":u_calm,"u_reapp":u_reapp}
-
-class ARC_NoCalm:
+    ablate = ("u_dmg",)
+
+class ARC_NoCalm(ARCv1):
     """Ablation: ARC sin control de arousal (g_calm = 0)."""
     name = "arc_no_calm"
-    def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
-        risk = (cfg["arc_w_u"] * st.u +
-                cfg["arc_w_a"] * max(0.0, st.a - cfg["a_safe"]) +
-                cfg["arc_w_s"] * max(0.0, st.s - cfg["s_safe"]))
-        risk = max(0.0, min(1.0, risk))
-        u_dmg = min(1.0, cfg["arc_k_dmg"] * risk)
-        u_att = min(1.0, cfg["arc_k_att"] * st.u * (1.0 - max(0.0, st.a - cfg["a_safe"])))
-        u_mem = 1.0 - min(1.0, cfg["arc_k_mem_block"] * risk)
-        u_calm = 0.0  # ABLATED
-        u_reapp = min(1.0, cfg["arc_k_reapp"] * st.u * (1.0 - risk))
-        return {"u_dmg":u_dmg,"u_att":u_att,"u_mem":u_mem,"u_calm":u_calm,"u_reapp":u_reapp}
-
-class ARC_NoMem:
+    ablate = ("u_calm",)
+
+class ARC_NoMem(ARCv1):
     """Ablation: ARC sin gating de memoria (g_mem = 1 siempre)."""
     name = "arc_no_mem"
-    def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
-        risk = (cfg["arc_w_u"] * st.u +
-                cfg["arc_w_a"] * max(0.0, st.a - cfg["a_safe"]) +
-                cfg["arc_w_s"] * max(0.0, st.s - cfg["s_safe"]))
-        risk = max(0.0, min(1.0, risk))
-        u_dmg = min(1.0, cfg["arc_k_dmg"] * risk)
-        u_att = min(1.0, cfg["arc_k_att"] * st.u * (1.0 - max(0.0, st.a - cfg["a_safe"])))
-        u_mem = 1.0  # ABLATED - no memory gating
-        u_calm = min(1.0, cfg["arc_k_calm"] * max(0.0, st.a - cfg["a_safe"]))
-        u_reapp = min(1.0, cfg["arc_k_reapp"] * st.u * (1.0 - risk))
-        return {"u_dmg":u_dmg,"u_att":u_att,"u_mem":u_mem,"u_calm":u_calm,"u_reapp":u_reapp}
-
-class ARC_NoReapp:
+    ablate = ("u_mem",)
+
+class ARC_NoReapp(ARCv1):
     """Ablation: ARC sin reappraisal (g_reapp = 0)."""
     name = "arc_no_reapp"
-    def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
-        risk = (cfg["arc_w_u"] * st.u +
-                cfg["arc_w_a"] * max(0.0, st.a - cfg["a_safe"]) +
-                cfg["arc_w_s"] * max(0.0, st.s - cfg["s_safe"]))
-        risk = max(0.0, min(1.0, risk))
-        u_dmg = min(1.0, cfg["arc_k_dmg"] * risk)
-        u_att = min(1.0, cfg["arc_k_att"] * st.u * (1.0 - max(0.0, st.a - cfg["a_safe"])))
-        u_mem = 1.0 - min(1.0, cfg["arc_k_mem_block"] * risk)
-        u_calm = min(1.0, cfg["arc_k_calm"] * max(0.0, st.a - cfg["a_safe"]))
-        u_reapp = 0.0  # ABLATED
-        return {"u_dmg":u_dmg,"u_att":u_att,"u_mem":u_mem,"u_calm":u_calm,"u_reapp":u_reapp}
+    ablate = ("u_reapp",)
 
 # =============================================================================
 # L4 - HIERARCHICAL MULTI-SCALE CONTROL
@@ -121,9 +196,10 @@ class ARCv2_Hierarchical:
         self.slow_a_setpoint = 0.4      # Setpoint adaptativo de arousal
         self.slow_s_setpoint = 0.3      # Setpoint adaptativo de DMN
         self.slow_perf_baseline = 0.9   # Performance baseline esperado
-        self.slow_counter = 0           # Contador para updates lentos
-        self.medium_counter = 0         # Contador para updates medios
-        self.last_medium_output = {"u_dmg": 0.0, "u_reapp": 0.0} # Zero-order hold state
+        # Lazos MEDIUM (cada 5 pasos, zero-order hold entre updates) y SLOW (cada 20); FAST corre siempre
+        self.loops = (MultiRateScheduler()
+                      .add("medium", 5, hold={"u_dmg": 0.0, "u_reapp": 0.0})
+                      .add("slow", 20))
         
         # Historial para el nivel lento
         self.perf_history = []
@@ -215,27 +291,23 @@ class ARCv2_Hierarchical:
         fast = self._fast_control(st, cfg)
         
         # Nivel MEDIUM: cada 5 pasos (o siempre si presión narrativa alta)
-        self.medium_counter += 1
         narrative_pressure = max(0.0, st.s - max(cfg.get("s_safe", 0.55), self.slow_s_setpoint))
-        if self.medium_counter >= 5 or risk > 0.5 or narrative_pressure > 0.02:
-            self.last_medium_output = self._medium_control(st, cfg)
-            self.medium_counter = 0
+        medium = self.loops.run("medium", self._medium_control, st, cfg,
+                                force=risk > 0.5 or narrative_pressure > 0.02)
         
         # Nivel SLOW: cada 20 pasos
-        self.slow_counter += 1
-        if self.slow_counter >= 20:
+        if self.loops.due("slow"):
             self._slow_control(st, obs, cfg)
-            self.slow_counter = 0
         
         # Combinar outputs de todos los niveles
         u_mem = self._compute_memory_gate(st, risk, cfg)
         
         return {
-            "u_dmg": self.last_medium_output["u_dmg"],
+            "u_dmg": medium["u_dmg"],
             "u_att": fast["u_att"],
             "u_mem": u_mem,
             "u_calm": fast["u_calm"],
-            "u_reapp": self.last_medium_output["u_reapp"]
+            "u_reapp": medium["u_reapp"]
         }
 # =============================================================================
 # L4-REV2 - META-CONTROL (NEUROMODULATION)
@@ -258,7 +330,7 @@ class ARCv3_MetaControl:
     def __init__(self):
         self.current_gain = 1.0
         self.perf_history = []
-        self.slow_counter = 0
+        self.loops = MultiRateScheduler().add("slow", 20)
 
         # Meta-parámetros (gain scheduling)
         self.target_perf = 0.90
@@ -266,7 +338,27 @@ class ARCv3_MetaControl:
         self.gain_boost = 0.05
         self.gain_min = 0.80
         self.gain_max = 1.40
-    
+        self._gains = GainSchedule(self._scheduled_gains)
+
+    @staticmethod
+    def _scheduled_gains(cfg: Dict[str, Any], gain: float) -> Tuple[float, ...]:
+        """(k_dmg, k_calm, k_att, k_reapp, k_mem) for a meta gain; recomputed only when it changes."""
+        # Do not relax DMN suppression below baseline: it is safety-critical for anti-rumination.
+        return (cfg.get("arc_k_dmg", 0.95) * max(1.0, gain),
+                cfg.get("arc_k_calm", 0.85) * gain,
+                # Atención suele subir con arousal, aquí la modulamos también
+                cfg.get("arc_k_att", 0.75) * gain,
+                cfg.get("arc_k_reapp", 0.55) * gain,
+                cfg.get("arc_k_mem_block", 0.90) * gain)
+
+    @staticmethod
+    def _scheduled_gains_batch(params: Dict[str, Any], gain: np.ndarray) -> Tuple[np.ndarray, ...]:
+        return (params.get("arc_k_dmg", 0.95) * np.maximum(1.0, gain),
+                params.get("arc_k_calm", 0.85) * gain,
+                params.get("arc_k_att", 0.75) * gain,
+                params.get("arc_k_reapp", 0.55) * gain,
+                params.get("arc_k_mem_block", 0.90) * gain)
+
     def _update_meta_state(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]):
         """Actualiza el nivel de 'alertness' (ganancia global) cada ~20 pasos."""
         current_perf = float(obs.get("perf", 0.5))
@@ -301,20 +393,12 @@ class ARCv3_MetaControl:
             
     def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
         # 1. Meta-Control Update (Slow Loop)
-        self.slow_counter += 1
-        if self.slow_counter >= 20:
+        if self.loops.due("slow"):
             self._update_meta_state(st, obs, cfg)
-            self.slow_counter = 0
             
         # 2. Modulación de Parámetros (Gain Scheduling)
-        # Aplicamos la ganancia actual a las constantes base del config
-        # Do not relax DMN suppression below baseline: it is safety-critical for anti-rumination.
-        k_dmg = cfg.get("arc_k_dmg", 0.95) * max(1.0, self.current_gain)
-        k_calm = cfg.get("arc_k_calm", 0.85) * self.current_gain
-        # Atención suele subir con arousal, aquí la modulamos también
-        k_att = cfg.get("arc_k_att", 0.75) * self.current_gain
-        k_reapp = cfg.get("arc_k_reapp", 0.55) * self.current_gain
-        k_mem = cfg.get("arc_k_mem_block", 0.90) * self.current_gain
+        # Aplicamos la ganancia actual a las constantes base del config (cacheadas entre updates)
+        k_dmg, k_calm, k_att, k_reapp, k_mem = self._gains.get(cfg, self.current_gain)
         
         # 3. Fast Loop (Reactive Control - Zero Latency)
         # Misma lógica que ARCv1 pero con K dinámicas
@@ -344,6 +428,63 @@ class ARCv3_MetaControl:
         # Por ahora standard output
         return {"u_dmg":u_dmg, "u_att":u_att, "u_mem":u_mem, "u_calm":u_calm, "u_reapp":u_reapp}
 
+    def reset(self):
+        self.current_gain = 1.0
+        self.perf_history = []
+        self.loops.reset()
+        self._batch = None
+
+    def _init_batch(self, n: int) -> Dict[str, Any]:
+        return {"gain": np.full(n, self.current_gain), "perf": _PerfWindow(n, 20),
+                "loops": MultiRateScheduler().add("slow", 20), "gains": BatchGainSchedule(self._scheduled_gains_batch)}
+
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        n = states.shape[0]
+        b = _batch_state(self, n)
+        u = states[:, sb.U]
+        a_safe = params.get("a_safe", 0.60)
+        s_safe = params.get("s_safe", 0.55)
+        s_tau = params.get("s_rum_tau", s_safe)
+        a_excess = np.maximum(0.0, states[:, sb.A] - a_safe)
+        s_excess = np.maximum(0.0, states[:, sb.S] - s_safe)
+        s_error = s_excess / max(1e-6, (1.0 - s_safe))
+        s_rum_error = np.maximum(0.0, states[:, sb.S] - s_tau) / max(1e-6, (1.0 - s_tau))
+        a_error = a_excess / max(1e-6, (1.0 - a_safe))
+        s_worst = np.maximum(s_error, s_rum_error)
+
+        # 1. Meta-Control Update (Slow Loop), same rules as `_update_meta_state` row by row
+        if b["loops"].due("slow"):
+            b["perf"].push(_obs_column(obs, "perf", 0.5, n))
+            mean_perf = b["perf"].mean()
+            meta_risk = (params.get("arc_w_u", 0.4) * u +
+                         params.get("arc_w_a", 0.4) * a_excess +
+                         params.get("arc_w_s", 0.35) * s_excess +
+                         0.40 * s_worst)
+            meta_risk = np.maximum(0.0, np.minimum(1.0, meta_risk))
+            gain = b["gain"]
+            relax = (mean_perf >= (self.target_perf - 0.02)) & (meta_risk < 0.15)
+            boost = ~relax & ((mean_perf < (self.target_perf - 0.10)) | (meta_risk > 0.45))
+            b["gain"] = np.where(relax, np.maximum(self.gain_min, gain - self.gain_decay),
+                                 np.where(boost, np.minimum(self.gain_max, gain + self.gain_boost),
+                                          np.maximum(self.gain_min, gain - self.gain_decay * 0.5)))
+            b["gains"].refresh(params, b["gain"], mask=b["gain"] != gain)
+
+        # 2-3. Gain scheduling (only rows whose gain moved are recomputed) + fast loop
+        k_dmg, k_calm, k_att, k_reapp, k_mem = b["gains"].get(params, b["gain"])
+
+        risk = (params.get("arc_w_u", 0.4) * u +
+                params.get("arc_w_a", 0.3) * a_excess +
+                params.get("arc_w_s", 0.3) * s_excess)
+        risk = np.maximum(0.0, np.minimum(1.0, risk))
+
+        return _stack_controls(
+            np.minimum(1.0, k_dmg * (risk + 1.2 * s_error + 10.0 * s_rum_error)),
+            np.minimum(1.0, k_att * u * np.maximum(0.0, 1.0 - a_excess)),
+            1.0 - np.minimum(1.0, k_mem * (risk + 0.5 * s_worst)),
+            np.minimum(1.0, k_calm * a_error),
+            np.minimum(1.0, k_reapp * u * np.minimum(1.0, s_worst)),
+        )
+
 
 # =============================================================================
 # ARC-PID: PROPORCIONAL-INTEGRAL-DERIVATIVO CONTROLLER
@@ -456,6 +597,46 @@ class ARCv1_PID:
         self.prev_risk = 0.0
         self.prev_arousal = 0.0
         self.prev_narrative = 0.0
+        self._batch = None
+
+    def _init_batch(self, n: int) -> Dict[str, Any]:
+        # Columns: (risk, arousal, narrative) channels
+        return {"integral": np.zeros((n, 3)), "prev": np.zeros((n, 3))}
+
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        b = _batch_state(self, states.shape[0])
+        a_safe = params.get("a_safe", 0.60)
+        s_safe = params.get("s_safe", 0.55)
+        u = states[:, sb.U]
+        a_error = np.maximum(0.0, states[:, sb.A] - a_safe)
+        s_error = np.maximum(0.0, states[:, sb.S] - s_safe)
+        risk = (params.get("arc_w_u", 0.4) * u +
+                params.get("arc_w_a", 0.3) * a_error +
+                params.get("arc_w_s", 0.35) * s_error)
+        risk = np.maximum(0.0, np.minimum(1.0, risk))
+
+        k_p = params.get("pid_k_p", 0.80)
+        k_i = params.get("pid_k_i", 0.15)
+        k_d = params.get("pid_k_d", 0.25)
+        kp = np.array([k_p, k_p * 1.2, k_p * 1.0])
+        ki = np.array([k_i, k_i * 0.8, k_i * 1.2])
+        kd = np.array([k_d, k_d * 1.5, k_d * 0.8])
+
+        # Same PID law as `_pid_control` (dt = 1), all three channels at once
+        error = np.column_stack([risk, a_error, s_error])
+        integral = np.maximum(-1.0, np.minimum(1.0, b["integral"] + ki * error))
+        out = np.maximum(0.0, np.minimum(1.0, kp * error + integral + kd * (error - b["prev"])))
+        b["integral"] = integral
+        b["prev"] = error
+        pid_output, pid_arousal, pid_narrative = out[:, 0], out[:, 1], out[:, 2]
+
+        return _stack_controls(
+            np.minimum(1.0, params.get("arc_k_dmg", 0.95) * (pid_output + 0.5 * pid_narrative)),
+            np.minimum(1.0, params.get("arc_k_att", 0.75) * u * (1.0 - a_error)),
+            1.0 - np.minimum(1.0, params.get("arc_k_mem_block", 0.8) * pid_output),
+            np.minimum(1.0, params.get("arc_k_calm", 0.85) * pid_arousal),
+            np.minimum(1.0, params.get("arc_k_reapp", 0.5) * u * (1.0 - pid_output)),
+        )
 
 
 # =============================================================================
@@ -485,7 +666,7 @@ class ARCv3_PID_Meta:
         # Meta-control state (from ARCv3_MetaControl)
         self.current_gain = 1.0
         self.perf_history = []
-        self.slow_counter = 0
+        self.loops = MultiRateScheduler().add("slow", 20)
         
         # Meta-parameters
         self.target_perf = 0.90
@@ -493,7 +674,18 @@ class ARCv3_PID_Meta:
         self.gain_boost = 0.06
         self.gain_min = 0.70  # Can relax more than pure meta
         self.gain_max = 1.30
-    
+        self._gains = GainSchedule(self._scheduled_gains)
+
+    @staticmethod
+    def _scheduled_gains(cfg: Dict[str, Any], gain: float) -> Tuple[float, ...]:
+        """PID gains (k_p, k_i, k_d) and action gains (k_dmg, k_calm, k_att) scaled by the meta gain."""
+        return (cfg.get("pid_k_p", 0.80) * gain,
+                cfg.get("pid_k_i", 0.15) * gain,
+                cfg.get("pid_k_d", 0.25) * gain,
+                cfg.get("arc_k_dmg", 0.95) * max(1.0, gain),  # Never relax DMN
+                cfg.get("arc_k_calm", 0.85) * gain,
+                cfg.get("arc_k_att", 0.75) * gain)
+
     def _update_meta_gain(self, perf: float, risk: float, cfg: dict):
         """Adaptive gain scheduling based on performance and risk."""
         self.perf_history.append(perf)
@@ -510,17 +702,16 @@ class ARCv3_PID_Meta:
             self.current_gain = min(self.gain_max, self.current_gain + self.gain_boost)
     
     def _pid_control(self, error: float, k_p: float, k_i: float, k_d: float) -> float:
-        """PID with anti-windup, modulated by current_gain."""
-        # Adaptive gains
-        P = k_p * self.current_gain * error
+        """PID with anti-windup; gains are already scaled by current_gain."""
+        P = k_p * error
         
         # Integral with anti-windup
-        self.integral_risk += k_i * self.current_gain * error
+        self.integral_risk += k_i * error
         self.integral_risk = max(-0.5, min(0.5, self.integral_risk))
         I = self.integral_risk
         
         # Derivative
-        D = k_d * self.current_gain * (error - self.prev_risk)
+        D = k_d * (error - self.prev_risk)
         self.prev_risk = error
         
         return max(0.0, min(1.0, P + I + D))
@@ -541,25 +732,16 @@ class ARCv3_PID_Meta:
         risk = max(0.0, min(1.0, risk))
         
         # Meta-control update (every 20 steps)
-        self.slow_counter += 1
-        if self.slow_counter >= 20:
+        if self.loops.due("slow"):
             perf = obs.get("perf", 0.5)
             self._update_meta_gain(perf, risk, cfg)
-            self.slow_counter = 0
         
-        # PID gains (from config)
-        k_p = cfg.get("pid_k_p", 0.80)
-        k_i = cfg.get("pid_k_i", 0.15)
-        k_d = cfg.get("pid_k_d", 0.25)
+        # PID and action gains (from config, scaled by the meta gain)
+        k_p, k_i, k_d, k_dmg, k_calm, k_att = self._gains.get(cfg, self.current_gain)
         
         # PID-controlled risk response
         pid_output = self._pid_control(risk, k_p, k_i, k_d)
         
-        # Control actions with adaptive gains
-        k_dmg = cfg.get("arc_k_dmg", 0.95) * max(1.0, self.current_gain)  # Never relax DMN
-        k_calm = cfg.get("arc_k_calm", 0.85) * self.current_gain
-        k_att = cfg.get("arc_k_att", 0.75) * self.current_gain
-        
         u_dmg = min(1.0, k_dmg * (pid_output + 0.3 * s_error))
         u_att = min(1.0, k_att * st.u * (1.0 - a_error))
         u_mem = 1.0 - min(1.0, cfg.get("arc_k_mem_block", 0.8) * pid_output)
@@ -574,7 +756,7 @@ class ARCv3_PID_Meta:
         self.prev_risk = 0.0
         self.current_gain = 1.0
         self.perf_history = []
-        self.slow_counter = 0
+        self.loops.reset()
 
 
 # =============================================================================
@@ -622,7 +804,7 @@ class ARCv1_LQR:
         ])
         
         # LQR control: u = K @ x (optimal state feedback)
-        u_ctrl = self.K @ x
+        u_ctrl = configured_gain(self, cfg, self.K) @ x
         
         # Scale and map to control actions
         u_calm = min(1.0, cfg.get("arc_k_calm", 0.85) * u_ctrl[0])
@@ -685,7 +867,7 @@ class ARCv1_LQI:
         x = np.array([a_error, s_error, st.u])
         
         # LQR control: u = K @ x (optimal state feedback)
-        u_lqr = self.K @ x
+        u_lqr = configured_gain(self, cfg, self.K) @ x
         
         # Integral terms for eliminating steady-state error
         # Narrative integral (critical for anti-rumination)
@@ -712,6 +894,35 @@ class ARCv1_LQI:
         """Reset integral states."""
         self.integral_s = 0.0
         self.integral_a = 0.0
+        self._batch = None
+
+    def _init_batch(self, n: int) -> Dict[str, Any]:
+        return {"integral_s": np.zeros(n), "integral_a": np.zeros(n)}
+
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        b = _batch_state(self, states.shape[0])
+        a_safe = params.get("a_safe", 0.60)
+        s_safe = params.get("s_safe", 0.55)
+        s_rum_tau = params.get("s_rum_tau", s_safe)
+        u = states[:, sb.U]
+        a_error = np.maximum(0.0, states[:, sb.A] - a_safe)
+        s_error = np.maximum(0.0, states[:, sb.S] - s_safe)
+        s_rum_error = np.maximum(0.0, states[:, sb.S] - s_rum_tau)
+
+        u_lqr = _matvec(configured_gain(self, params, self.K), np.column_stack([a_error, s_error, u]))
+
+        b["integral_s"] = np.maximum(0.0, np.minimum(1.0, b["integral_s"] + self.ki_s * s_rum_error))
+        b["integral_a"] = np.maximum(0.0, np.minimum(0.5, b["integral_a"] + self.ki_a * a_error))
+        integral_s, integral_a = b["integral_s"], b["integral_a"]
+
+        risk = np.maximum(np.maximum(u_lqr[:, 0], u_lqr[:, 1]), integral_s)
+        return _stack_controls(
+            np.minimum(1.0, params.get("arc_k_dmg", 0.95) * (u_lqr[:, 1] + 1.5 * integral_s)),
+            np.minimum(1.0, params.get("arc_k_att", 0.75) * u_lqr[:, 2]),
+            1.0 - np.minimum(1.0, params.get("arc_k_mem_block", 0.8) * risk),
+            np.minimum(1.0, params.get("arc_k_calm", 0.85) * (u_lqr[:, 0] + integral_a)),
+            np.minimum(1.0, params.get("arc_k_reapp", 0.5) * u * (1.0 - np.minimum(1.0, a_error + s_error))),
+        )
 
 
 class ARCv3_LQR_Meta:
@@ -740,9 +951,25 @@ class ARCv3_LQR_Meta:
         # Meta-control state
         self.current_gain = 1.0
         self.perf_history = []
-        self.slow_counter = 0
+        self.loops = MultiRateScheduler().add("slow", 20)
         self.target_perf = 0.90
-        
+        self._gains = GainSchedule(self._scheduled_gains)
+
+    def _scheduled_gains(self, cfg: Dict[str, Any], gain: float, R: float) -> Tuple:
+        """K_effective = K_base * gain / sqrt(R) and the per-channel action gains built on it."""
+        K_effective = self.K_base * gain / np.sqrt(R)
+        return (K_effective,
+                cfg.get("arc_k_dmg", 0.95) * K_effective[1],
+                cfg.get("arc_k_calm", 0.85) * K_effective[0],
+                cfg.get("arc_k_att", 0.75) * K_effective[2])
+
+    def _scheduled_gains_batch(self, params: Dict[str, Any], gain: np.ndarray, R: np.ndarray) -> Tuple:
+        K_effective = self.K_base * gain[:, None] / np.sqrt(R)[:, None]
+        return (K_effective,
+                params.get("arc_k_dmg", 0.95) * K_effective[:, 1],
+                params.get("arc_k_calm", 0.85) * K_effective[:, 0],
+                params.get("arc_k_att", 0.75) * K_effective[:, 2])
+
     def _update_meta_control(self, perf: float, risk: float):
         """Adapt R based on performance (meta-level control of LQR)."""
         self.perf_history.append(perf)
@@ -775,22 +1002,20 @@ class ARCv3_LQR_Meta:
         risk = cfg.get("arc_w_u", 0.4) * x[2] + cfg.get("arc_w_a", 0.3) * x[0] + cfg.get("arc_w_s", 0.35) * x[1]
         
         # Meta-control update (every 20 steps)
-        self.slow_counter += 1
-        if self.slow_counter >= 20:
+        if self.loops.due("slow"):
             perf = obs.get("perf", 0.5)
             self._update_meta_control(perf, risk)
-            self.slow_counter = 0
         
         # LQR with adaptive gains: K_effective = K_base * current_gain / sqrt(R)
-        K_effective = self.K_base * self.current_gain / np.sqrt(self.R_current)
+        K_effective, k_dmg, k_calm, k_att = self._gains.get(cfg, self.current_gain, self.R_current)
         
         # Control: u = K @ x
         u_lqr = K_effective @ x
         
         # Map to individual control actions
-        u_dmg = min(1.0, cfg.get("arc_k_dmg", 0.95) * K_effective[1] * x[1])
-        u_calm = min(1.0, cfg.get("arc_k_calm", 0.85) * K_effective[0] * x[0])
-        u_att = min(1.0, cfg.get("arc_k_att", 0.75) * K_effective[2] * x[2])
+        u_dmg = min(1.0, k_dmg * x[1])
+        u_calm = min(1.0, k_calm * x[0])
+        u_att = min(1.0, k_att * x[2])
         u_mem = 1.0 - min(1.0, cfg.get("arc_k_mem_block", 0.8) * min(1.0, u_lqr))
         u_reapp = min(1.0, cfg.get("arc_k_reapp", 0.5) * st.u * (1.0 - risk))
         
@@ -801,7 +1026,42 @@ class ARCv3_LQR_Meta:
         self.R_current = 1.0
         self.current_gain = 1.0
         self.perf_history = []
-        self.slow_counter = 0
+        self.loops.reset()
+        self._batch = None
+
+    def _init_batch(self, n: int) -> Dict[str, Any]:
+        return {"R": np.full(n, 1.0), "gain": np.full(n, 1.0), "perf": _PerfWindow(n, 20),
+                "loops": MultiRateScheduler().add("slow", 20), "gains": BatchGainSchedule(self._scheduled_gains_batch)}
+
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        n = states.shape[0]
+        b = _batch_state(self, n)
+        a_safe = params.get("a_safe", 0.60)
+        s_safe = params.get("s_safe", 0.55)
+        u = states[:, sb.U]
+        x = np.column_stack([np.maximum(0.0, states[:, sb.A] - a_safe), np.maximum(0.0, states[:, sb.S] - s_safe), u])
+        risk = params.get("arc_w_u", 0.4) * x[:, 2] + params.get("arc_w_a", 0.3) * x[:, 0] + params.get("arc_w_s", 0.35) * x[:, 1]
+
+        if b["loops"].due("slow"):
+            b["perf"].push(_obs_column(obs, "perf", 0.5, n))
+            mean_perf = b["perf"].mean()
+            relax = mean_perf > self.target_perf
+            boost = ~relax & ((mean_perf < self.target_perf - 0.10) | (risk > 0.4))
+            R, gain = b["R"], b["gain"]
+            b["R"] = np.where(relax, np.minimum(self.R_max, R * 1.05), np.where(boost, np.maximum(self.R_min, R * 0.92), R))
+            b["gain"] = np.where(relax, np.maximum(0.7, gain - 0.02), np.where(boost, np.minimum(1.3, gain + 0.04), gain))
+            b["gains"].refresh(params, b["gain"], b["R"], mask=(b["gain"] != gain) | (b["R"] != R))
+
+        K_effective, k_dmg, k_calm, k_att = b["gains"].get(params, b["gain"], b["R"])
+        u_lqr = _matvec(K_effective[:, None, :], x)[:, 0]
+
+        return _stack_controls(
+            np.minimum(1.0, k_dmg * x[:, 1]),
+            np.minimum(1.0, k_att * x[:, 2]),
+            1.0 - np.minimum(1.0, params.get("arc_k_mem_block", 0.8) * np.minimum(1.0, u_lqr)),
+            np.minimum(1.0, k_calm * x[:, 0]),
+            np.minimum(1.0, params.get("arc_k_reapp", 0.5) * u * (1.0 - risk)),
+        )
 
 
 # =============================================================================
@@ -870,7 +1130,7 @@ class ARC_Ultimate:
         self.meta_gain_max = 1.4
         self.target_perf = 0.90
         self.perf_history = []
-        self.slow_counter = 0
+        self.loops = MultiRateScheduler().add("slow", 15)
         
     def _mpc_optimize(self, x0: np.ndarray, cfg: dict) -> np.ndarray:
         """
@@ -879,38 +1139,11 @@ class ARC_Ultimate:
         Uses iterative prediction: x_{k+1} = A @ x_k + B @ u_k
         Minimizes: J = Σ(x'Qx + u'Ru) over horizon
         
-        For efficiency, uses greedy single-step optimization repeated.
+        For efficiency, uses greedy single-step optimization repeated:
+        u_k = inv(R + B'QB) @ B'Q @ A @ x_k. The gain and the stacked N-step
+        predictors are built once per (A, B, Q, R, horizon); see controllers/mpc.py.
         """
-        x = x0.copy()
-        total_cost = 0.0
-        u_mpc = np.zeros(3)
-        
-        for k in range(self.horizon):
-            # Predict next state with current optimal control
-            # Greedy: u_k = argmin (x'Qx + u'Ru) for linearized system
-            # Solution: u = -inv(R + B'QB) @ B'Q @ A @ x
-            
-            try:
-                BTQ = self.B.T @ self.Q_mpc
-                inv_term = np.linalg.inv(self.R_mpc + BTQ @ self.B)
-                u_opt = inv_term @ BTQ @ self.A @ x
-            except np.linalg.LinAlgError:
-                u_opt = np.zeros(3)
-            
-            # Accumulate first-step control (weighted by decay)
-            decay = 0.8 ** k  # Discount future corrections
-            u_mpc += decay * u_opt
-            
-            # Predict next state
-            x = self.A @ x + self.B @ np.clip(u_opt, 0, 1)
-            
-            # Accumulate cost for monitoring
-            total_cost += float(x.T @ self.Q_mpc @ x)
-        
-        # Normalize
-        u_mpc /= sum([0.8**k for k in range(self.horizon)])
-        
-        return np.clip(u_mpc, 0, 1)
+        return mpc_gain(self.A, self.B, self.Q_mpc, self.R_mpc, self.horizon).control(x0)
     
     def _update_meta_gain(self, perf: float, risk: float, s_error: float):
         """
@@ -956,7 +1189,7 @@ class ARC_Ultimate:
         integral_vec = np.array([self.integral_a, self.integral_s, self.integral_u])
         
         # LQR feedback
-        u_lqr = self.K_lqr @ x
+        u_lqr = configured_gain(self, cfg, self.K_lqr) @ x
         
         # LQI = LQR + Integral
         u_lqi = u_lqr + np.array([
@@ -969,11 +1202,9 @@ class ARC_Ultimate:
         u_mpc = self._mpc_optimize(x, cfg)
         
         # ===== Meta-Control Update =====
-        self.slow_counter += 1
-        if self.slow_counter >= 15:
+        if self.loops.due("slow"):
             perf = obs.get("perf", 0.5)
             self._update_meta_gain(perf, risk, s_error)
-            self.slow_counter = 0
         
         # ===== Combine All Components =====
         # Final control: weighted combination of LQI and MPC, scaled by meta_gain
@@ -1001,7 +1232,7 @@ class ARC_Ultimate:
         self.integral_u = 0.0
         self.meta_gain = 1.0
         self.perf_history = []
-        self.slow_counter = 0
+        self.loops.reset()
 
 
 # =============================================================================
@@ -1026,11 +1257,13 @@ class ARCv2_LQI:
         self.ki_s = 0.28
         self.ki_a = 0.10
         
-        # Hierarchical state
-        self.medium_counter = 0
-        self.slow_counter = 0
-        self.last_medium = {"u_dmg": 0.0, "u_reapp": 0.0}
+        # Hierarchical state: medium loop every 5 steps, held in between
+        self.loops = MultiRateScheduler().add("medium", 5, hold={"u_dmg": 0.0, "u_reapp": 0.0})
         self.perf_history = []
+
+    def _medium_control(self, st: State, u_lqr: np.ndarray, cfg: Dict[str, Any]) -> Dict[str, float]:
+        return {"u_dmg": min(1.0, cfg.get("arc_k_dmg", 0.95) * (u_lqr[1] + 1.5 * self.integral_s)),
+                "u_reapp": min(1.0, cfg.get("arc_k_reapp", 0.5) * st.u * (1.0 - u_lqr[1]))}
         
     def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
         a_safe, s_safe = cfg.get("a_safe", 0.60), cfg.get("s_safe", 0.55)
@@ -1044,29 +1277,61 @@ class ARCv2_LQI:
         self.integral_s = np.clip(self.integral_s + self.ki_s * s_rum_error, 0, 1.0)
         self.integral_a = np.clip(self.integral_a + self.ki_a * a_error, 0, 0.5)
         
-        u_lqr = self.K @ x
+        u_lqr = configured_gain(self, cfg, self.K) @ x
         
         # Fast loop (every step): arousal + attention
         u_calm = min(1.0, cfg.get("arc_k_calm", 0.85) * (u_lqr[0] + self.integral_a))
         u_att = min(1.0, cfg.get("arc_k_att", 0.75) * u_lqr[2])
         
-        # Medium loop (every 5 steps): narrative
-        self.medium_counter += 1
-        if self.medium_counter >= 5 or s_rum_error > 0.1:
-            self.last_medium["u_dmg"] = min(1.0, cfg.get("arc_k_dmg", 0.95) * (u_lqr[1] + 1.5 * self.integral_s))
-            self.last_medium["u_reapp"] = min(1.0, cfg.get("arc_k_reapp", 0.5) * st.u * (1.0 - u_lqr[1]))
-            self.medium_counter = 0
+        # Medium loop (every 5 steps, or on high rumination): narrative
+        medium = self.loops.run("medium", self._medium_control, st, u_lqr, cfg, force=s_rum_error > 0.1)
         
         risk = max(a_error, s_error, self.integral_s)
         u_mem = 1.0 - min(1.0, cfg.get("arc_k_mem_block", 0.8) * risk)
         
-        return {"u_dmg": self.last_medium["u_dmg"], "u_att": u_att, "u_mem": u_mem, "u_calm": u_calm, "u_reapp": self.last_medium["u_reapp"]}
+        return {"u_dmg": medium["u_dmg"], "u_att": u_att, "u_mem": u_mem, "u_calm": u_calm, "u_reapp": medium["u_reapp"]}
     
     def reset(self):
         self.integral_s = 0.0
         self.integral_a = 0.0
-        self.medium_counter = 0
-        self.last_medium = {"u_dmg": 0.0, "u_reapp": 0.0}
+        self.loops.reset()
+        self._batch = None
+
+    def _init_batch(self, n: int) -> Dict[str, Any]:
+        # The medium loop also fires on a per-row condition, so its counter is per row.
+        return {"integral_s": np.zeros(n), "integral_a": np.zeros(n),
+                "loops": MultiRateScheduler().add("medium", 5, rows=n), "last_dmg": np.zeros(n), "last_reapp": np.zeros(n)}
+
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        b = _batch_state(self, states.shape[0])
+        a_safe, s_safe = params.get("a_safe", 0.60), params.get("s_safe", 0.55)
+        s_rum_tau = params.get("s_rum_tau", s_safe)
+        u = states[:, sb.U]
+        a_error = np.maximum(0.0, states[:, sb.A] - a_safe)
+        s_error = np.maximum(0.0, states[:, sb.S] - s_safe)
+        s_rum_error = np.maximum(0.0, states[:, sb.S] - s_rum_tau)
+
+        b["integral_s"] = np.clip(b["integral_s"] + self.ki_s * s_rum_error, 0, 1.0)
+        b["integral_a"] = np.clip(b["integral_a"] + self.ki_a * a_error, 0, 0.5)
+        integral_s = b["integral_s"]
+
+        u_lqr = _matvec(configured_gain(self, params, self.K), np.column_stack([a_error, s_error, u]))
+
+        fire = b["loops"].due("medium", force=s_rum_error > 0.1)
+        if fire.any():
+            b["last_dmg"] = np.where(fire, np.minimum(1.0, params.get("arc_k_dmg", 0.95) * (u_lqr[:, 1] + 1.5 * integral_s)),
+                                     b["last_dmg"])
+            b["last_reapp"] = np.where(fire, np.minimum(1.0, params.get("arc_k_reapp", 0.5) * u * (1.0 - u_lqr[:, 1])),
+                                       b["last_reapp"])
+
+        risk = np.maximum(np.maximum(a_error, s_error), integral_s)
+        return _stack_controls(
+            b["last_dmg"],
+            np.minimum(1.0, params.get("arc_k_att", 0.75) * u_lqr[:, 2]),
+            1.0 - np.minimum(1.0, params.get("arc_k_mem_block", 0.8) * risk),
+            np.minimum(1.0, params.get("arc_k_calm", 0.85) * (u_lqr[:, 0] + b["integral_a"])),
+            b["last_reapp"],
+        )
 
 
 # =============================================================================
@@ -1119,6 +1384,39 @@ class ARC_Robust:
     def reset(self):
         self.integral_s = 0.0
         self.disturbance_est = 0.1
+        self._batch = None
+
+    def _init_batch(self, n: int) -> Dict[str, Any]:
+        return {"integral_s": np.zeros(n), "disturbance_est": np.full(n, 0.1)}
+
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        b = _batch_state(self, states.shape[0])
+        a_safe, s_safe = params.get("a_safe", 0.60), params.get("s_safe", 0.55)
+        s_rum_tau = params.get("s_rum_tau", s_safe)
+        u = states[:, sb.U]
+        a_error = np.maximum(0.0, states[:, sb.A] - a_safe)
+        s_error = np.maximum(0.0, states[:, sb.S] - s_safe)
+        s_rum_error = np.maximum(0.0, states[:, sb.S] - s_rum_tau)
+        x = np.column_stack([a_error, s_error, u])
+
+        b["integral_s"] = np.clip(b["integral_s"] + self.ki_s * s_rum_error, 0, 0.8)
+
+        u_robust = self.K_base * x + (self.gamma * b["disturbance_est"] * 0.3)[:, None]
+        u_robust[:, 1] += b["integral_s"]
+
+        risk = np.maximum(u_robust[:, 0], u_robust[:, 1])
+        out = _stack_controls(
+            np.minimum(1.0, params.get("arc_k_dmg", 0.95) * u_robust[:, 1]),
+            np.minimum(1.0, params.get("arc_k_att", 0.75) * u_robust[:, 2]),
+            1.0 - np.minimum(1.0, params.get("arc_k_mem_block", 0.8) * risk),
+            np.minimum(1.0, params.get("arc_k_calm", 0.85) * u_robust[:, 0]),
+            np.minimum(1.0, params.get("arc_k_reapp", 0.5) * u * (1.0 - np.minimum(1.0, a_error + s_error + u))),
+        )
+
+        # ||x|| as sqrt(x . x), matching np.linalg.norm on the 3-vector
+        norm_x = np.sqrt(_matvec(x[:, None, :], x)[:, 0])
+        b["disturbance_est"] = 0.9 * b["disturbance_est"] + 0.1 * norm_x
+        return out
 
 
 # =============================================================================
@@ -1138,7 +1436,7 @@ class ARC_Adaptive:
         self.integral = np.zeros(3)
         self.lr = 0.005
         self.perf_history = []
-        self.adapt_counter = 0
+        self.loops = MultiRateScheduler().add("adapt", 20)
         self.best_K = self.K.copy()
         
     def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
@@ -1165,22 +1463,58 @@ class ARC_Adaptive:
         if len(self.perf_history) > 30:
             self.perf_history.pop(0)
         
-        self.adapt_counter += 1
-        if self.adapt_counter >= 20:
+        if self.loops.due("adapt"):
             mean_perf = sum(self.perf_history) / len(self.perf_history)
             if mean_perf < 0.90:
                 self.K = np.clip(self.K + self.lr * np.abs(x), 0.5, 2.5)
                 self.Ki = np.clip(self.Ki + self.lr * 0.5, 0.05, 0.5)
             if s_error > 0.05:
                 self.Ki[1] = min(0.5, self.Ki[1] + 0.02)
-            self.adapt_counter = 0
         
         return {"u_dmg": u_dmg, "u_att": u_att, "u_mem": u_mem, "u_calm": u_calm, "u_reapp": u_reapp}
     
     def reset(self):
         self.integral = np.zeros(3)
         self.perf_history = []
-        self.adapt_counter = 0
+        self.loops.reset()
+        self._batch = None
+
+    def _init_batch(self, n: int) -> Dict[str, Any]:
+        return {"K": np.tile(self.K, (n, 1)), "Ki": np.tile(self.Ki, (n, 1)), "integral": np.tile(self.integral, (n, 1)),
+                "perf": _PerfWindow(n, 30), "loops": MultiRateScheduler().add("adapt", 20)}
+
+    def act_batch(self, states: np.ndarray, obs: Dict[str, Any], params: Dict[str, Any]) -> np.ndarray:
+        n = states.shape[0]
+        b = _batch_state(self, n)
+        a_safe, s_safe = params.get("a_safe", 0.60), params.get("s_safe", 0.55)
+        s_rum_tau = params.get("s_rum_tau", s_safe)
+        u_st = states[:, sb.U]
+        a_error = np.maximum(0.0, states[:, sb.A] - a_safe)
+        s_error = np.maximum(0.0, states[:, sb.S] - s_rum_tau)
+        x = np.column_stack([a_error, s_error, u_st])
+
+        b["integral"] = np.clip(b["integral"] + b["Ki"] * x, 0, 1.0)
+        u = b["K"] * x + b["integral"]
+
+        risk = np.maximum(u[:, 0], u[:, 1])
+        out = _stack_controls(
+            np.minimum(1.0, params.get("arc_k_dmg", 0.95) * u[:, 1]),
+            np.minimum(1.0, params.get("arc_k_att", 0.75) * u[:, 2]),
+            1.0 - np.minimum(1.0, params.get("arc_k_mem_block", 0.8) * risk),
+            np.minimum(1.0, params.get("arc_k_calm", 0.85) * u[:, 0]),
+            np.minimum(1.0, params.get("arc_k_reapp", 0.5) * u_st * (1.0 - np.minimum(1.0, a_error + s_error + u_st))),
+        )
+
+        # Online adaptation (rows whose window mean is low adapt; all rows share the counter)
+        b["perf"].push(_obs_column(obs, "perf", 0.5, n))
+        if b["loops"].due("adapt"):
+            low = b["perf"].mean() < 0.90
+            b["K"][low] = np.clip(b["K"][low] + self.lr * np.abs(x[low]), 0.5, 2.5)
+            b["Ki"][low] = np.clip(b["Ki"][low] + self.lr * 0.5, 0.05, 0.5)
+            hi_s = s_error > 0.05
+            b["Ki"][hi_s, 1] = np.minimum(0.5, b["Ki"][hi_s, 1] + 0.02)
+
+        return out
 
 
 
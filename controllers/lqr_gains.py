@@ -0,0 +1,179 @@
+"""
+LQR gains for the ARC LQR family, derived from the configured ASSB dynamics.
+
+ARCv1_LQR, ARCv1_LQI, ARCv2_LQI and ARC_Ultimate share one hard-coded 3x3
+gain matrix. It was computed offline by a script that is not in the repo and
+does not follow config changes. This module recomputes that matrix from the
+config:
+
+1. Linearize `step_dynamics` around the configured operating point, using the
+   analytic Jacobians from `sim.linearize`. The reduced state is x = [a_error, s_error, u] and the controls are
+   [u_calm, u_dmg, u_att]. The point is a = a_safe, s = s_safe, the setpoints
+   for the other fields, pe = pe_base and u_exog = u_base. The exogenous load
+   is treated as persistent (u_exog(t+1) = u_exog(t)), which gives attention
+   leverage over the `u` row.
+2. Solve the discrete algebraic Riccati equation (scipy) for the weights
+   `lqr_q` / `lqr_r` (diagonals; defaults are ARC_Ultimate's MPC weights).
+3. Return K with the controllers' sign convention, u = K @ x, so K = -K_dare.
+
+Results are cached in memory and on disk, under `.cache/lqr_gains/<hash>.npz`
+at the repo root. The hash covers every dynamics coefficient, the operating
+point and the weights, so any config change invalidates it.
+
+Controllers use these gains only when the config sets `lqr_gains: true`.
+Otherwise they keep the hard-coded matrix, and existing results are unchanged.
+
+Usage:
+  python -m controllers.lqr_gains --config configs/v2.yaml
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from scipy.linalg import solve_discrete_are
+
+from sim.state import State
+from sim import batch as sb
+from sim.linearize import linearize
+from sim.params import DynamicsParams, PARAM_NAMES, as_params
+
+# Bump when the linearization or the solver setup changes, to orphan old cache entries.
+GAINS_VERSION = 2
+
+DEFAULT_Q = (3.0, 6.0, 1.5)
+DEFAULT_R = (0.5, 0.3, 0.8)
+CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "lqr_gains"
+
+# Reduced model: state rows/cols and control columns
+REDUCED_STATE = ("a_error", "s_error", "u")
+REDUCED_CONTROLS = ("u_calm", "u_dmg", "u_att")
+
+
+@dataclass(frozen=True)
+class LQRGains:
+    K: np.ndarray   # (3, 3) u = K @ x; rows u_calm, u_dmg, u_att
+    A: np.ndarray   # (3, 3) reduced linearization
+    B: np.ndarray   # (3, 3)
+    P: np.ndarray   # (3, 3) DARE solution
+    key: str
+
+
+def _settings(params: DynamicsParams) -> Dict[str, Any]:
+    return {
+        "version": GAINS_VERSION,
+        "coefficients": {k: getattr(params, k) for k in PARAM_NAMES},
+        "pe": float(params.get("pe_base", 0.15)),
+        "u_exog": float(params.get("u_base", 0.20)),
+        "q": [float(q) for q in params.get("lqr_q", DEFAULT_Q)],
+        "r": [float(r) for r in params.get("lqr_r", DEFAULT_R)],
+    }
+
+
+def config_hash(cfg: Dict[str, Any]) -> str:
+    """Hash of everything the gains depend on."""
+    blob = json.dumps(_settings(as_params(cfg)), sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def linearize_reduced(params: DynamicsParams, pe: float, u_exog: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (A, B) of the reduced model around zero errors, from the analytic ASSB Jacobians.
+
+    The reduced `u` is the exogenous load, held constant between steps, so its
+    column collects d(.)/d u_exog. The `max(0, . - safe)` kinks are taken on
+    their above-threshold side, which is where the controllers act.
+    """
+    st = State(phi=params.phi0, g=params.g0, p=params.p0, i=params.i0, s=params.s_safe,
+               v=params.v0, a=params.a_safe, mf=params.mf0, ms=params.ms0, u=u_exog)
+    control = {"u_calm": 0.0, "u_dmg": 0.0, "u_att": 0.0, "u_mem": 1.0, "u_reapp": 0.0}
+    A_full, B_full, E_full = linearize(st, pe, 0.0, u_exog, control, params)
+    rows = [sb.A, sb.S, sb.U]
+    A = A_full[np.ix_(rows, rows)]
+    A[:, 2] += E_full[rows, 2]
+    B = B_full[np.ix_(rows, [sb.U_CALM, sb.U_DMG, sb.U_ATT])]
+    return A, B
+
+
+def solve_lqr(A: np.ndarray, B: np.ndarray, Q: np.ndarray, R: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(K, P) with u = K @ x (controllers' sign convention, K = -K_dare)."""
+    P = solve_discrete_are(A, B, Q, R)
+    K_dare = np.linalg.solve(R + B.T @ P @ B, B.T @ P @ A)
+    return -K_dare, P
+
+
+def compute_gains(cfg: Dict[str, Any]) -> LQRGains:
+    params = as_params(cfg)
+    s = _settings(params)
+    A, B = linearize_reduced(params, s["pe"], s["u_exog"])
+    K, P = solve_lqr(A, B, np.diag(s["q"]), np.diag(s["r"]))
+    return LQRGains(K=K, A=A, B=B, P=P, key=config_hash(params))
+
+
+_MEMO: Dict[str, LQRGains] = {}
+
+
+def lqr_gains(cfg: Dict[str, Any], cache_dir: Optional[Path] = CACHE_DIR) -> LQRGains:
+    """Gains for `cfg`, from memory, then `cache_dir`, else solved and stored there."""
+    key = config_hash(cfg)
+    gains = _MEMO.get(key)
+    if gains is not None:
+        return gains
+
+    path = Path(cache_dir) / f"{key}.npz" if cache_dir is not None else None
+    if path is not None and path.exists():
+        with np.load(path) as z:
+            gains = LQRGains(K=z["K"], A=z["A"], B=z["B"], P=z["P"], key=key)
+    else:
+        gains = compute_gains(cfg)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename: sweep workers may race on the same key
+            tmp = path.with_name(f"{key}.{os.getpid()}.tmp.npz")
+            np.savez(tmp, K=gains.K, A=gains.A, B=gains.B, P=gains.P)
+            os.replace(tmp, path)
+    _MEMO[key] = gains
+    return gains
+
+
+def configured_gain(ctrl, cfg: Dict[str, Any], default: np.ndarray) -> np.ndarray:
+    """
+    The gain matrix an LQR-family controller should use under `cfg`.
+
+    `default` (the hard-coded matrix) unless the config sets `lqr_gains: true`.
+    The solved matrix is looked up once per controller and config object.
+    """
+    if not cfg.get("lqr_gains", False):
+        return default
+    if getattr(ctrl, "_gains_cfg", None) is not cfg:
+        ctrl._gains_cfg = cfg
+        ctrl._gains_K = lqr_gains(cfg).K
+    return ctrl._gains_K
+
+
+def main():
+    import yaml
+    ap = argparse.ArgumentParser(description="Solve (or load) the LQR gains for a config")
+    ap.add_argument("--config", default="configs/v2.yaml")
+    ap.add_argument("--no-cache", action="store_true", help="Solve without reading or writing .cache/")
+    args = ap.parse_args()
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+
+    t0 = time.perf_counter()
+    gains = lqr_gains(cfg, cache_dir=None if args.no_cache else CACHE_DIR)
+    dt = (time.perf_counter() - t0) * 1e3
+    np.set_printoptions(precision=4, suppress=True)
+    print(f"config hash {gains.key} ({dt:.1f} ms)")
+    print(f"A (rows/cols {', '.join(REDUCED_STATE)}):\n{gains.A}")
+    print(f"B (cols {', '.join(REDUCED_CONTROLS)}):\n{gains.B}")
+    print(f"K (rows {', '.join(REDUCED_CONTROLS)}):\n{gains.K}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Finite-horizon predictor for the MPC stage of `ARC_Ultimate`, built once per model.
+
+The MPC stage rolls the linearized model forward `horizon` steps. At each step
+it takes the greedy control u_k = G x_k, with G = inv(R + B'QB) B'Q A, applies
+clip(u_k, 0, 1) to predict x_{k+1}, and returns the clipped decay-weighted mean
+of the u_k. G, the decay weights and the stacked predictors depend only on
+(A, B, Q, R, horizon). `mpc_gain` computes them once per key and caches them.
+
+While every predicted u_k is <= 0, the applied control is 0 and the rollout is
+open-loop (x_k = A^k x_0). The whole stage is then one product with the
+stacked matrix [G; G A; ...; G A^(H-1)]. This is the usual case for the
+non-negative error vectors the controllers build. Otherwise the clipped
+rollout is replayed step by step with the cached G.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+
+@dataclass(frozen=True)
+class MPCGain:
+    A: np.ndarray
+    B: np.ndarray
+    G: Optional[np.ndarray]      # (m, n) greedy feedback; None if R + B'QB is singular
+    stacked: np.ndarray          # (horizon * m, n): rows of G A^k, k = 0..horizon-1
+    decays: Tuple[float, ...]    # decay**k
+    norm: float                  # sum of decays
+    weights: np.ndarray          # (horizon,) decays / norm
+
+    @property
+    def horizon(self) -> int:
+        return len(self.decays)
+
+    def control(self, x0: np.ndarray) -> np.ndarray:
+        """MPC correction for state `x0`, clipped to [0, 1]."""
+        m = self.B.shape[1]
+        if self.G is None:
+            return np.zeros(m)
+        U = (self.stacked @ x0).reshape(self.horizon, m)
+        if (U <= 0.0).all():
+            return np.clip(self.weights @ U, 0, 1)
+        return self._rollout(x0)
+
+    def _rollout(self, x0: np.ndarray) -> np.ndarray:
+        x = x0
+        u_mpc = np.zeros(self.B.shape[1])
+        for decay in self.decays:
+            u_opt = self.G @ x
+            u_mpc += decay * u_opt
+            x = self.A @ x + self.B @ np.clip(u_opt, 0, 1)
+        u_mpc /= self.norm
+        return np.clip(u_mpc, 0, 1)
+
+
+_CACHE: Dict[Tuple, MPCGain] = {}
+
+
+def mpc_gain(A: np.ndarray, B: np.ndarray, Q: np.ndarray, R: np.ndarray,
+             horizon: int, decay: float = 0.8) -> MPCGain:
+    """Cached `MPCGain` for (A, B, Q, R, horizon, decay)."""
+    mats = [np.asarray(M, dtype=np.float64) for M in (A, B, Q, R)]
+    key = (mats[0].shape, mats[1].shape) + tuple(M.tobytes() for M in mats) + (int(horizon), float(decay))
+    gain = _CACHE.get(key)
+    if gain is not None:
+        return gain
+    A, B, Q, R = (M.copy() for M in mats)
+
+    n, m = B.shape
+    try:
+        BTQ = B.T @ Q
+        G = np.linalg.inv(R + BTQ @ B) @ BTQ @ A
+    except np.linalg.LinAlgError:
+        G = None
+
+    stacked = np.zeros((horizon * m, n))
+    if G is not None:
+        Ak = np.eye(n)
+        for k in range(horizon):
+            stacked[k * m:(k + 1) * m] = G @ Ak
+            Ak = A @ Ak
+
+    decays = tuple(decay ** k for k in range(horizon))
+    norm = sum(decays)
+    for M in (A, B, G, stacked):
+        if M is not None:
+            M.flags.writeable = False
+    gain = MPCGain(A=A, B=B, G=G, stacked=stacked, decays=decays, norm=norm,
+                   weights=np.array(decays) / norm)
+    _CACHE[key] = gain
+    return gain
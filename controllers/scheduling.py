@@ -0,0 +1,141 @@
+"""
+Multi-rate loop scheduling and gain scheduling for the ARC controllers.
+
+`MultiRateScheduler` holds the loop counters of a multi-rate controller
+(ARCv2 FAST/MEDIUM/SLOW, the meta-controllers' slow loop, ARC_Adaptive's
+adaptation loop). Each loop is declared with a period in `act` calls and an
+optional held output. `due(name)` counts one call and reports whether the loop
+runs now. `run(name, fn, ...)` calls `fn` only on those steps and returns the
+output held since its last run otherwise (zero-order hold). `force` fires a
+loop early on an event. With `rows=n` the counter is kept per trajectory, and
+`due` returns an (n,) mask for `act_batch`. Decimating the whole controller
+(running it only every k steps) is done by the runner instead:
+`experiments/run.py --control-every k`.
+
+ARCv3_MetaControl, ARCv3_PID_Meta and ARCv3_LQR_Meta scale their config
+gains by slow-loop state (`current_gain`, `R_current`). That state changes
+at most once every 15-20 steps, but the scaled gains used to be rebuilt on
+every step. A schedule keeps the scaled gains and recomputes them only when
+the config object or the slow-loop state changes. The fast loop just reads
+the cached tuple.
+
+- `GainSchedule`: scalar controllers. `get(cfg, *state)` recomputes when
+  `cfg` is a different object or `state` differs from the last call.
+- `BatchGainSchedule`: `act_batch`. It holds one row per trajectory, and the
+  slow loop calls `refresh(cfg, *state, mask=changed)` so that only the rows
+  whose slow state moved are recomputed.
+
+`compute(cfg, *state)` returns a tuple of gains. For the batched schedule,
+each entry is an (N,) or (N, k) array and `state` holds (N,) arrays. The
+expressions are the ones the controllers used inline, so the cached values
+are bit-identical to the per-step ones.
+"""
+
+import copy
+from typing import Any, Callable, Dict, Optional, Tuple
+import numpy as np
+
+
+class _Loop:
+    __slots__ = ("period", "rows", "counter", "initial", "held")
+
+    def __init__(self, period: int, hold: Any, rows: Optional[int]):
+        self.period = period
+        self.rows = rows
+        self.initial = hold
+        self.reset()
+
+    def reset(self) -> None:
+        self.counter = 0 if self.rows is None else np.zeros(self.rows, dtype=np.int64)
+        self.held = copy.copy(self.initial)
+
+
+class MultiRateScheduler:
+    """Named loops with periods (in calls), event-forced firing and zero-order-hold outputs."""
+
+    def __init__(self):
+        self._loops: Dict[str, _Loop] = {}
+
+    def add(self, name: str, period: int, hold: Any = None, rows: Optional[int] = None) -> "MultiRateScheduler":
+        """Declare a loop that runs every `period` calls; `hold` is its output before the first run."""
+        if period < 1:
+            raise ValueError(f"Loop period must be >= 1, got {period} for {name!r}")
+        self._loops[name] = _Loop(period, hold, rows)
+        return self
+
+    def due(self, name: str, force=False):
+        """
+        Count one call of loop `name`; True if it runs now (its counter then restarts).
+
+        Per-row loops take an (n,) `force` mask and return the (n,) mask of rows that fire.
+        """
+        loop = self._loops[name]
+        loop.counter += 1
+        fire = (loop.counter >= loop.period) | force
+        if loop.rows is not None:
+            loop.counter[fire] = 0
+        elif fire:
+            loop.counter = 0
+        return fire
+
+    def run(self, name: str, fn: Callable, *args, force=False):
+        """Call `fn(*args)` if loop `name` is due and hold its result; return the held output."""
+        loop = self._loops[name]
+        if self.due(name, force):
+            loop.held = fn(*args)
+        return loop.held
+
+    def held(self, name: str) -> Any:
+        return self._loops[name].held
+
+    def reset(self) -> None:
+        for loop in self._loops.values():
+            loop.reset()
+
+
+class GainSchedule:
+    """Scalar schedule keyed on (config object, slow-loop state)."""
+    __slots__ = ("compute", "values", "_cfg", "_state")
+
+    def __init__(self, compute: Callable[..., Tuple]):
+        self.compute = compute
+        self.values: Optional[Tuple] = None
+        self._cfg = None
+        self._state: Optional[Tuple] = None
+
+    def get(self, cfg: Dict[str, Any], *state) -> Tuple:
+        if cfg is not self._cfg or state != self._state:
+            self.values = self.compute(cfg, *state)
+            self._cfg = cfg
+            self._state = state
+        return self.values
+
+    def invalidate(self) -> None:
+        self._cfg = None
+
+
+class BatchGainSchedule:
+    """Row-wise schedule for N trajectories; the slow loop refreshes the rows it changed."""
+    __slots__ = ("compute", "values", "_cfg")
+
+    def __init__(self, compute: Callable[..., Tuple]):
+        self.compute = compute
+        self.values: Optional[list] = None
+        self._cfg = None
+
+    def refresh(self, cfg: Dict[str, Any], *state: np.ndarray, mask: Optional[np.ndarray] = None) -> None:
+        """Recompute the rows in `mask` (all rows if None or on a new config)."""
+        if mask is None or cfg is not self._cfg or self.values is None:
+            self.values = [np.array(v, dtype=np.float64) for v in self.compute(cfg, *state)]
+            self._cfg = cfg
+            return
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        for v, new in zip(self.values, self.compute(cfg, *(s[rows] for s in state))):
+            v[rows] = new
+
+    def get(self, cfg: Dict[str, Any], *state: np.ndarray) -> list:
+        if cfg is not self._cfg or self.values is None:
+            self.refresh(cfg, *state)
+        return self.values
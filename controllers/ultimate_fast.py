@@ -0,0 +1,101 @@
+"""
+ARC_UltimateFast: ARC_Ultimate's control law in scalar arithmetic, with the MPC stage short-circuited.
+
+The MPC stage of ARC_Ultimate contributes nothing under its own model.
+`controllers.mpc` predicts the stage as U = [G; G A; ...; G A^(H-1)] x for
+x = [a_error, s_error, u] >= 0. When every entry of U is <= 0, it returns
+clip(weights @ U, 0, 1) = 0. Every entry of B is <= 0, so G is almost
+entirely non-positive. For ARC_Ultimate's (A, B, Q, R, horizon), 44 of the 45
+stacked entries are <= 0. The only positive entry is
+(G)[att, a_error] = 0.014, and it is outweighed by the -0.088 * s_error
+- 0.318 * u terms on that row except when s_error and u are both near 0.
+
+`ARC_UltimateFast` splits the stacked rows once per model:
+- rows with no positive entry are <= 0 on the whole non-negative box and are
+  never evaluated;
+- the remaining sign-indefinite rows are evaluated as scalar dot products
+  each step. If they are all <= 0, the MPC term is exactly 0 and is dropped.
+  Otherwise the step falls back to the online `MPCGain.control`.
+
+The result is the same control as ARC_Ultimate, not an approximation. The
+LQI integrals, meta-gain loop and output mapping are evaluated with Python
+floats, with no numpy in the common path. The speedup over ARC_Ultimate
+comes from that, not from a cheaper MPC, and is below an order of magnitude.
+
+Policy difference against ARC_Ultimate and latency:
+  python experiments/report_ultimate_fast.py --config configs/v2.yaml
+"""
+
+from typing import Dict, Any, Tuple
+import numpy as np
+
+from sim.state import State
+from controllers.controllers import ARC_Ultimate
+from controllers.mpc import MPCGain, mpc_gain
+from controllers.lqr_gains import configured_gain
+
+
+def indefinite_rows(gain: MPCGain) -> Tuple[Tuple[float, ...], ...]:
+    """Stacked MPC rows with a positive entry: the only ones that can be > 0 for x >= 0."""
+    return tuple(tuple(row) for row in gain.stacked.tolist() if max(row) > 0.0)
+
+
+class ARC_UltimateFast(ARC_Ultimate):
+    """ARC_Ultimate in scalar arithmetic; the MPC stage is evaluated only where it can be non-zero."""
+    name = "arc_ultimate_fast"
+
+    def _runtime(self, cfg: Dict[str, Any]) -> Tuple:
+        """Per-config constants as Python floats (gains, thresholds, weights) plus the MPC model."""
+        s_safe = cfg.get("s_safe", 0.55)
+        gain = mpc_gain(self.A, self.B, self.Q_mpc, self.R_mpc, self.horizon)
+        return (configured_gain(self, cfg, self.K_lqr).tolist(), self.Ki.tolist(),
+                cfg.get("a_safe", 0.60), s_safe, cfg.get("s_rum_tau", s_safe),
+                cfg.get("arc_w_u", 0.4), cfg.get("arc_w_a", 0.3), cfg.get("arc_w_s", 0.35),
+                cfg.get("arc_k_calm", 0.85), cfg.get("arc_k_dmg", 0.95), cfg.get("arc_k_att", 0.75),
+                cfg.get("arc_k_mem_block", 0.8), cfg.get("arc_k_reapp", 0.5),
+                gain, indefinite_rows(gain))
+
+    def act(self, st: State, obs: Dict[str, float], cfg: Dict[str, Any]) -> Dict[str, float]:
+        if getattr(self, "_rt_cfg", None) is not cfg:
+            self._rt_cfg = cfg
+            self._rt = self._runtime(cfg)
+        (K, Ki, a_safe, s_safe, s_rum_tau, w_u, w_a, w_s,
+         k_calm, k_dmg, k_att, k_mem, k_reapp, gain, rows) = self._rt
+
+        u = st.u
+        a_error = max(0.0, st.a - a_safe)
+        s_error = max(0.0, st.s - s_safe)
+        s_rum_error = max(0.0, st.s - s_rum_tau)
+        risk = w_u * u + w_a * a_error + w_s * s_error
+
+        # LQI
+        self.integral_a = min(0.6, max(0.0, self.integral_a + Ki[0] * a_error))
+        self.integral_s = min(1.0, max(0.0, self.integral_s + Ki[1] * s_rum_error))
+        self.integral_u = min(0.4, max(0.0, self.integral_u + Ki[2] * u))
+        K0, K1, K2 = K
+        u0 = 0.65 * (K0[0] * a_error + K0[1] * s_error + K0[2] * u + k_calm * self.integral_a)
+        u1 = 0.65 * (K1[0] * a_error + K1[1] * s_error + K1[2] * u + k_dmg * self.integral_s * 1.5)
+        u2 = 0.65 * (K2[0] * a_error + K2[1] * s_error + K2[2] * u + k_att * self.integral_u)
+
+        # Meta-control
+        if self.loops.due("slow"):
+            self._update_meta_gain(obs.get("perf", 0.5), risk, s_error)
+
+        # MPC: zero unless a sign-indefinite predicted control is positive
+        for r0, r1, r2 in rows:
+            if r0 * a_error + r1 * s_error + r2 * u > 0.0:
+                m0, m1, m2 = gain.control(np.array([a_error, s_error, u])).tolist()
+                g = self.meta_gain
+                u0 += 0.35 * m0 * g
+                u1 += 0.35 * m1 * g
+                u2 += 0.35 * m2 * g
+                break
+
+        max_risk = max(u0, u1, self.integral_s)
+        return {
+            "u_dmg": min(1.0, k_dmg * u1),
+            "u_att": min(1.0, k_att * u2),
+            "u_mem": 1.0 - min(1.0, k_mem * max_risk),
+            "u_calm": min(1.0, k_calm * u0),
+            "u_reapp": min(1.0, k_reapp * u * (1.0 - min(1.0, risk))),
+        }
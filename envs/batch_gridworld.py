@@ -0,0 +1,206 @@
+"""
+Batched GridWorld family for large L6 studies.
+
+Steps N independent grids at once with the same rules as `envs.gridworld`:
+- Movement is a precomputed `(n_states, n_actions) -> next_state` table.
+  Reward, terminal and trap flags are `(n_goals, n_states, n_actions)`
+  tables, one slice per goal position (a single slice except for
+  ChangingGoal).
+- Per-grid state (position, step count, trap hits, last reward, goal index)
+  is kept in (N,) arrays, and the ARC signals (`pe`, `u_exog`,
+  `goal_changed`, ...) come back as a dict of (N,) arrays instead of
+  per-step info dicts.
+- `step(actions, rows)` advances only the grids in `rows`. With
+  `auto_reset=True`, grids that finish are reset inside `step`, so every grid
+  runs its own sequence of episodes (this is how the batched L6 runner drives
+  its seeds). The returned next states are still the ones the transition
+  reached (what a TD update needs), `env.state` holds the observation to act
+  on next, and `final_trap_hits` the trap hits of the episode that just ended.
+
+Stochastic slips use one Generator per grid (`seeds`, anything
+`np.random.default_rng` accepts), so a grid's trajectory does not depend on
+the other grids in the batch.
+"""
+
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from envs.gridworld import GridWorldConfig
+from agents.batch_q_learning import SeedStreams
+
+
+def _all_rows(rows: Optional[np.ndarray], n: int) -> np.ndarray:
+    return np.arange(n) if rows is None else rows
+
+
+class BatchGridWorld:
+    """N independent GridWorlds (actions: 0=up, 1=down, 2=left, 3=right)."""
+
+    def __init__(self, n: int, config: Optional[GridWorldConfig] = None,
+                 seeds: Optional[Sequence[int]] = None, auto_reset: bool = False):
+        self.config = config or GridWorldConfig()
+        self.n = n
+        self.size = self.config.size
+        self.n_states = self.size * self.size
+        self.n_actions = 4
+        self.auto_reset = auto_reset
+        self.seeds = list(seeds) if seeds is not None else list(range(n))
+
+        self.next_state = self._movement_table()
+        self.reward_table, self.terminal_table, self.trap_table = self._goal_tables(self._goal_positions())
+
+        self.state = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.last_reward = np.zeros(n)
+        self.cumulative_reward = np.zeros(n)
+        self.trap_hits = np.zeros(n, dtype=np.int64)
+        self.final_trap_hits = np.zeros(n, dtype=np.int64)  # Set by auto_reset
+        self.goal_idx = np.zeros(n, dtype=np.int64)
+
+    # --- Tables ---
+
+    def _movement_table(self) -> np.ndarray:
+        size = self.size
+        row, col = np.divmod(np.arange(self.n_states), size)
+        moves = (
+            (np.maximum(0, row - 1), col),          # up
+            (np.minimum(size - 1, row + 1), col),   # down
+            (row, np.maximum(0, col - 1)),          # left
+            (row, np.minimum(size - 1, col + 1)),   # right
+        )
+        return np.stack([r * size + c for r, c in moves], axis=1)
+
+    def _goal_positions(self) -> Tuple[Tuple[int, int], ...]:
+        return (self.config.goal_pos,)
+
+    def _goal_tables(self, goals):
+        """Reward / terminal / trap-hit of every (goal, state, action), looked up on the landing cell."""
+        size = self.size
+        traps = np.zeros(self.n_states, dtype=bool)
+        for r, c in self.config.trap_positions:
+            traps[r * size + c] = True
+        reward = np.empty((len(goals), self.n_states))
+        terminal = np.zeros((len(goals), self.n_states), dtype=bool)
+        for g, (r, c) in enumerate(goals):
+            reward[g] = np.where(traps, self.config.trap_reward, self.config.step_penalty)
+            terminal[g, r * size + c] = True
+            reward[g, r * size + c] = self.config.goal_reward
+        trap = traps[None, :] & ~terminal
+        land = self.next_state
+        return reward[:, land], terminal[:, land], trap[:, land]
+
+    # --- Episode control ---
+
+    def _on_reset(self, rows: np.ndarray) -> None:
+        pass
+
+    def reset(self, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Reset the grids in `rows` (all by default); returns their states and signals."""
+        rows = _all_rows(rows, self.n)
+        self._on_reset(rows)
+        self.state[rows] = 0
+        self.steps[rows] = 0
+        self.last_reward[rows] = 0.0
+        self.cumulative_reward[rows] = 0.0
+        self.trap_hits[rows] = 0
+        return self.state[rows], self.signals(rows)
+
+    def _actions(self, actions: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        return actions
+
+    def step(self, actions: np.ndarray, rows: Optional[np.ndarray] = None):
+        """
+        Advance the grids in `rows` (all by default) by one action each.
+
+        Returns `(next_states, rewards, terminated, truncated, signals)`, all aligned with `rows`.
+        """
+        rows = _all_rows(rows, self.n)
+        actions = self._actions(actions, rows)
+        s = self.state[rows]
+        g = self.goal_idx[rows]
+        next_states = self.next_state[s, actions]
+        rewards = self.reward_table[g, s, actions]
+        terminated = self.terminal_table[g, s, actions]
+
+        steps = self.steps[rows] + 1
+        self.steps[rows] = steps
+        self.trap_hits[rows] += self.trap_table[g, s, actions]
+        self.last_reward[rows] = rewards
+        self.cumulative_reward[rows] += rewards
+        self.state[rows] = next_states
+        truncated = steps >= self.config.max_steps
+
+        signals = self.signals(rows)
+        if self.auto_reset:
+            done = terminated | truncated
+            if done.any():
+                finished = rows[done]
+                self.final_trap_hits[finished] = self.trap_hits[finished]
+                self.reset(finished)
+        return next_states, rewards, terminated, truncated, signals
+
+    # --- ARC signals ---
+
+    def signals(self, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """`_get_info` ASSB signals as arrays: pe, u_exog, goal_changed (always False here)."""
+        rows = _all_rows(rows, self.n)
+        last = self.last_reward[rows]
+        return {
+            "pe": np.where(last != 0, np.abs(last - 0.0), 0.1),  # Prediction error proxy
+            "u_exog": 0.2 + 0.3 * (self.trap_hits[rows] / np.maximum(1, self.steps[rows])),  # Uncertainty from traps
+            "goal_changed": np.zeros(len(rows), dtype=bool),
+        }
+
+
+class BatchStochasticGridWorld(BatchGridWorld):
+    """StochasticGridWorld: with `slip_prob` each grid takes a random action instead."""
+
+    def __init__(self, n: int, config: Optional[GridWorldConfig] = None,
+                 seeds: Optional[Sequence[int]] = None, auto_reset: bool = False, slip_prob: float = 0.1):
+        super().__init__(n, config, seeds, auto_reset)
+        self.slip_prob = slip_prob
+        self.streams = SeedStreams(self.seeds)
+
+    def _actions(self, actions: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        slip = self.streams.uniform(rows) < self.slip_prob
+        random_a = (self.streams.uniform(rows) * self.n_actions).astype(np.int64)
+        return np.where(slip, random_a, actions)
+
+
+class BatchChangingGoalGridWorld(BatchGridWorld):
+    """ChangingGoalGridWorld: each grid moves its goal every `change_every` of its own episodes."""
+
+    def __init__(self, n: int, config: Optional[GridWorldConfig] = None,
+                 seeds: Optional[Sequence[int]] = None, auto_reset: bool = False,
+                 goal_positions: Tuple[Tuple[int, int], ...] = ((4, 4), (0, 4), (4, 0)),
+                 change_every: int = 50):
+        self.goal_positions = goal_positions
+        self.change_every = change_every
+        super().__init__(n, config, seeds, auto_reset)
+        self.episode_count = np.zeros(n, dtype=np.int64)
+        self.goal_changed = np.zeros(n, dtype=bool)
+
+    def _goal_positions(self) -> Tuple[Tuple[int, int], ...]:
+        return self.goal_positions
+
+    def _on_reset(self, rows: np.ndarray) -> None:
+        episode = self.episode_count[rows] + 1
+        self.episode_count[rows] = episode
+        new_idx = (episode // self.change_every) % len(self.goal_positions)
+        self.goal_changed[rows] = new_idx != self.goal_idx[rows]
+        self.goal_idx[rows] = new_idx
+
+    def signals(self, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        rows = _all_rows(rows, self.n)
+        sig = super().signals(rows)
+        episode = self.episode_count[rows]
+        sig["goal_phase"] = self.goal_idx[rows]
+        sig["episode"] = episode
+        sig["goal_changed"] = self.goal_changed[rows]
+        # Higher uncertainty during goal transition periods
+        sig["u_exog"] = np.where(episode % self.change_every < 5, 0.7, sig["u_exog"])
+        return sig
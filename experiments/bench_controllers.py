@@ -0,0 +1,110 @@
+"""
+Per-step latency of the controllers.
+
+Reports microseconds per `act` call for every sweep controller (plus
+ARC_UltimateFast), then times the MPC stage of ARC_Ultimate at several
+horizons. It compares the cached predictor (`controllers.mpc`) with the
+previous implementation, which re-derived inv(R + B'QB) and B'Q on every
+horizon step. The largest
+difference between the two is printed next to the timings.
+
+Usage:
+  python experiments/bench_controllers.py --config configs/v2.yaml --steps 2000 --horizons 5 20 50
+"""
+
+import os
+import sys
+import time
+import argparse
+import yaml
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim.state import State
+from sim.params import DynamicsParams
+from controllers.controllers import ARC_Ultimate
+from controllers.mpc import mpc_gain
+from controllers.ultimate_fast import ARC_UltimateFast
+from experiments.run import SWEEP_CONTROLLERS
+
+
+def _states(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = rng.random((n, 10))
+    return [State(*row) for row in x.tolist()], rng.random(n).tolist()
+
+
+def _mpc_reference(ctrl: ARC_Ultimate, x0: np.ndarray, horizon: int) -> np.ndarray:
+    """The MPC stage as it was before the gain cache (minus the unused cost monitor)."""
+    x = x0.copy()
+    u_mpc = np.zeros(3)
+    for k in range(horizon):
+        try:
+            BTQ = ctrl.B.T @ ctrl.Q_mpc
+            inv_term = np.linalg.inv(ctrl.R_mpc + BTQ @ ctrl.B)
+            u_opt = inv_term @ BTQ @ ctrl.A @ x
+        except np.linalg.LinAlgError:
+            u_opt = np.zeros(3)
+        u_mpc += 0.8 ** k * u_opt
+        x = ctrl.A @ x + ctrl.B @ np.clip(u_opt, 0, 1)
+    u_mpc /= sum([0.8 ** k for k in range(horizon)])
+    return np.clip(u_mpc, 0, 1)
+
+
+def bench_act(params: DynamicsParams, steps: int):
+    states, perfs = _states(steps)
+    rows = []
+    for cls in SWEEP_CONTROLLERS + (ARC_UltimateFast,):
+        ctrl = cls()
+        ctrl.act(states[0], {"t": 0, "perf": perfs[0]}, params)  # first-use setup (gains)
+        t0 = time.perf_counter()
+        for t, (st, perf) in enumerate(zip(states, perfs)):
+            ctrl.act(st, {"t": t, "perf": perf}, params)
+        rows.append((cls.name, (time.perf_counter() - t0) / steps * 1e6))
+    return rows
+
+
+def bench_mpc(steps: int, horizons):
+    ctrl = ARC_Ultimate()
+    rng = np.random.default_rng(1)
+    # Same error vector as the controller: [a_error, s_error, u]
+    xs = np.column_stack([rng.random(steps) * 0.4, rng.random(steps) * 0.45, rng.random(steps)])
+    rows = []
+    for H in horizons:
+        gain = mpc_gain(ctrl.A, ctrl.B, ctrl.Q_mpc, ctrl.R_mpc, H)
+        t0 = time.perf_counter()
+        ref = [_mpc_reference(ctrl, x, H) for x in xs]
+        t_ref = (time.perf_counter() - t0) / steps * 1e6
+        t0 = time.perf_counter()
+        got = [gain.control(x) for x in xs]
+        t_new = (time.perf_counter() - t0) / steps * 1e6
+        err = max(float(np.max(np.abs(a - b))) for a, b in zip(ref, got))
+        rows.append((H, t_ref, t_new, err))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Controller per-step latency")
+    ap.add_argument("--config", default="configs/v2.yaml")
+    ap.add_argument("--steps", type=int, default=2000)
+    ap.add_argument("--horizons", nargs="+", type=int, default=[5, 20, 50])
+    args = ap.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        params = DynamicsParams.from_config(yaml.safe_load(f))
+
+    print(f"{'controller':<22} {'us/step':>9}")
+    print("-" * 32)
+    for name, us in bench_act(params, args.steps):
+        print(f"{name:<22} {us:>9.1f}")
+
+    print()
+    print(f"{'MPC horizon':<12} {'old us':>9} {'cached us':>10} {'speedup':>8} {'max |diff|':>11}")
+    print("-" * 54)
+    for H, t_ref, t_new, err in bench_mpc(args.steps, args.horizons):
+        print(f"{H:<12} {t_ref:>9.1f} {t_new:>10.1f} {t_ref / t_new:>7.1f}x {err:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
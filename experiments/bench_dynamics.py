@@ -0,0 +1,131 @@
+"""
+Micro-benchmark for the ASSB step.
+
+Reports steps per second for:
+- baseline:        the pre-DynamicsParams step_dynamics + performance (copied
+                   below, reading ``cfg["k_..."]`` per use); speedups are relative to it
+- dict cfg:        current step_dynamics + performance called with the raw YAML dict
+- DynamicsParams:  same calls with a config compiled once up front
+- batch (N):       sim.batch engine advancing N trajectories per call
+
+Usage:
+  python experiments/bench_dynamics.py --config configs/v2.yaml --steps 20000 --batch 300
+"""
+
+import os
+import sys
+import time
+import argparse
+import random
+from typing import Dict, Any
+import yaml
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim.state import State, performance, capacity, clip01
+from sim.dynamics import step_dynamics
+from sim.params import DynamicsParams
+from sim.batch import init_batch, step_dynamics_batch, performance_batch
+
+CONTROL = {"u_dmg": 0.2, "u_att": 0.3, "u_mem": 0.8, "u_calm": 0.1, "u_reapp": 0.1}
+
+
+# Pre-DynamicsParams implementation, kept verbatim as the reference row.
+def _baseline_step(st: State, pe: float, reward: float, u_exog: float, control: Dict[str, float], cfg: Dict[str, Any]) -> State:
+    u_dmg  = control.get("u_dmg", 0.0)
+    u_att  = control.get("u_att", 0.0)
+    u_mem  = control.get("u_mem", 1.0)
+    u_calm = control.get("u_calm", 0.0)
+    u_reapp= control.get("u_reapp", 0.0)
+
+    u_eff = clip01(u_exog * (1.0 - cfg["k_u_att"] * u_att))
+
+    i_next = clip01(st.i + cfg["k_i_att"] * u_att - cfg["mu_i"] * (st.i - cfg["i0"]) - cfg["k_i_u"] * u_eff)
+    p_next = clip01(st.p - cfg["k_p_pe"] * pe - cfg["k_p_u"] * u_eff + cfg["k_p_i"] * i_next + cfg["mu_p"] * (cfg["p0"] - st.p))
+    g_next = clip01(st.g + cfg["k_g_i"] * i_next + cfg["k_g_p"] * p_next - cfg["k_g_u"] * u_eff - cfg["k_g_a"] * max(0.0, st.a - cfg["a_safe"]) + cfg["mu_g"] * (cfg["g0"] - st.g))
+    phi_next = clip01(st.phi + cfg["k_phi_gp"] * (g_next * p_next) - cfg["mu_phi"] * (st.phi - cfg["phi0"]))
+
+    s_drive = cfg["k_s_u"] * u_eff + cfg["k_s_pe"] * pe
+    s_next = clip01(st.s + s_drive - cfg["mu_s"] * (st.s - cfg["s0"]) - cfg["k_s_dmg"] * u_dmg)
+
+    a_next = clip01(st.a + cfg["k_a_pe"] * pe + cfg["k_a_u"] * u_eff + cfg["k_a_s"] * max(0.0, s_next - cfg["s_safe"])
+                    - cfg["mu_a"] * (st.a - cfg["a0"]) - cfg["k_a_calm"] * u_calm)
+
+    v_next = clip01(st.v + cfg["k_v_r"] * (0.5 * (reward + 1.0)) - cfg["k_v_pe"] * pe - cfg["k_v_u"] * u_eff
+                    - cfg["mu_v"] * (st.v - cfg["v0"]) + cfg["k_v_reapp"] * u_reapp)
+
+    priority = clip01(cfg["w_mem_pe"] * pe + cfg["w_mem_a"] * abs(a_next - cfg["a0"]) + cfg["w_mem_v"] * abs(v_next - cfg["v0"]))
+    write = priority * u_mem
+
+    eta = cfg["eta0"] * clip01(1.0 + cfg["k_eta_a"] * max(0.0, a_next - cfg["a_safe"]))
+    mf_next = clip01(st.mf + eta * write - cfg["mu_mf"] * (st.mf - cfg["mf0"]))
+    ms_next = clip01(st.ms + cfg["k_ms"] * mf_next - cfg["mu_ms"] * (st.ms - cfg["ms0"]))
+
+    return State(phi=phi_next, g=g_next, p=p_next, i=i_next, s=s_next, v=v_next, a=a_next, mf=mf_next, ms=ms_next, u=u_eff)
+
+
+def _baseline_performance(st: State, cfg: Dict[str, Any]) -> float:
+    cap = capacity(st, cfg["omega_s"])
+    penalty = (cfg["w_u"] * st.u +
+               cfg["w_a"] * max(0.0, st.a - cfg["a_safe"]) +
+               cfg["w_s"] * max(0.0, st.s - cfg["s_safe"]))
+    return clip01(cfg["perf_bias"] + cfg["perf_gain"] * cap - penalty)
+
+
+def _inputs(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [(rng.random() * 0.5, rng.random() - 0.5, rng.random()) for _ in range(n)]
+
+
+def bench_scalar(cfg, steps: int, step=step_dynamics, perf=performance) -> float:
+    st0 = State(phi=0.75, g=0.75, p=0.75, i=0.7, s=0.3, v=0.55, a=0.3, mf=0.25, ms=0.2, u=0.2)
+    inputs = _inputs(steps)
+    st = st0
+    t0 = time.perf_counter()
+    for pe, r, u in inputs:
+        st = step(st, pe=pe, reward=r, u_exog=u, control=CONTROL, cfg=cfg)
+        perf(st, cfg)
+    return steps / (time.perf_counter() - t0)
+
+
+def bench_batch(params: DynamicsParams, steps: int, n: int) -> float:
+    x = init_batch(params, n)
+    rng = np.random.default_rng(0)
+    pe = rng.random((steps, n)) * 0.5
+    r = rng.random((steps, n)) - 0.5
+    u = rng.random((steps, n))
+    ctrl = np.tile(np.array([[0.2, 0.3, 0.8, 0.1, 0.1]]), (n, 1))
+    t0 = time.perf_counter()
+    for t in range(steps):
+        x = step_dynamics_batch(x, pe[t], r[t], u[t], ctrl, params)
+        performance_batch(x, params)
+    return steps * n / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ASSB step micro-benchmark")
+    ap.add_argument("--config", default="configs/v2.yaml")
+    ap.add_argument("--steps", type=int, default=20000)
+    ap.add_argument("--batch", type=int, default=300, help="Trajectories per batched step")
+    args = ap.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    params = DynamicsParams.from_config(cfg)
+
+    rows = [
+        ("baseline", bench_scalar(cfg, args.steps, _baseline_step, _baseline_performance)),
+        ("dict cfg", bench_scalar(cfg, args.steps)),
+        ("DynamicsParams", bench_scalar(params, args.steps)),
+        (f"batch (N={args.batch})", bench_batch(params, max(1, args.steps // args.batch), args.batch)),
+    ]
+    base = rows[0][1]
+    print(f"{'path':<20} {'steps/s':>14} {'speedup':>9}")
+    print("-" * 45)
+    for name, sps in rows:
+        print(f"{name:<20} {sps:>14,.0f} {sps / base:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
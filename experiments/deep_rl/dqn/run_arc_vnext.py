@@ -33,18 +33,18 @@ import torch
 from stable_baselines3 import DQN
 from stable_baselines3.common.evaluation import evaluate_policy
 from stable_baselines3.common.callbacks import BaseCallback
-from stable_baselines3.common.buffers import ReplayBuffer
 import gymnasium as gym
 
 from envs.adversarial_envs import CatastrophicForgettingEnv
 from envs.cartpole_nonstationary import NonStationaryCartPole
 from agents.arc_dqn_wrapper import ARCGymWrapper, ARCWrapperConfig
+from agents.arc_weighted_dqn import ARCWeightedDQN, ARCWeightReplayBuffer
 
 # ==============================================================================
 # FIXED MIXED REPLAY (actually 70/30)
 # ==============================================================================
 
-class FixedMixedReplayBuffer(ReplayBuffer):
+class FixedMixedReplayBuffer(ARCWeightReplayBuffer):
     """
     Mixed replay that ACTUALLY does 70% global + 30% recent.
     Verified by logging exact ratios.
@@ -102,58 +102,27 @@ class FixedMixedReplayBuffer(ReplayBuffer):
 # DQN WITH ALWAYS-ON GATING (not just during shift)
 # ==============================================================================
 
-class ARCvNextDQN(DQN):
+class ARCvNextDQN(ARCWeightedDQN):
     """
     DQN with ARC gating ALWAYS applied (not just during shift).
     
     Key difference: u_mem weights the loss at EVERY training step,
-    not just during detected shifts.
+    not just during detected shifts. Each sample is weighted by the u_mem
+    stored with it, floored at `w_floor`.
     """
     def __init__(self, *args, w_floor: float = 0.3, **kwargs):
-        super().__init__(*args, **kwargs)
+        super().__init__(*args, w_min=w_floor, **kwargs)
         self.w_floor = w_floor
-        self._current_u_mem = 1.0
-        
-        # Tracking for diagnosis
-        self.weight_history = deque(maxlen=10000)
-        self.weights_below_09 = 0
-        self.weights_below_05 = 0
-        self.total_weight_samples = 0
-        
-    def set_u_mem(self, u_mem: float):
-        """Set the current memory gating signal (called EVERY step)."""
-        self._current_u_mem = float(np.clip(u_mem, self.w_floor, 1.0))
-        
-        # Track
-        self.weight_history.append(self._current_u_mem)
-        self.total_weight_samples += 1
-        if self._current_u_mem < 0.9:
-            self.weights_below_09 += 1
-        if self._current_u_mem < 0.5:
-            self.weights_below_05 += 1
-        
-    def train(self, gradient_steps: int, batch_size: int = 100) -> None:
-        """Override train to apply ALWAYS-ON loss weighting."""
-        # Apply weight to learning rate (proxy for loss weighting)
-        weight = self._current_u_mem
-        
-        for param_group in self.policy.optimizer.param_groups:
-            param_group['lr'] = self.learning_rate * weight
-            
-        super().train(gradient_steps, batch_size)
-        
-        # Restore original learning rate
-        for param_group in self.policy.optimizer.param_groups:
-            param_group['lr'] = self.learning_rate
     
     def get_gating_stats(self) -> Dict[str, float]:
-        if self.total_weight_samples == 0:
+        stats = self.get_weight_stats()
+        if not stats:
             return {}
         return {
-            "mean_weight": np.mean(list(self.weight_history)) if self.weight_history else 1.0,
-            "min_weight": np.min(list(self.weight_history)) if self.weight_history else 1.0,
-            "pct_below_09": self.weights_below_09 / self.total_weight_samples * 100,
-            "pct_below_05": self.weights_below_05 / self.total_weight_samples * 100,
+            "mean_weight": stats["mean_weight"],
+            "min_weight": stats["min_weight"],
+            "pct_below_09": stats["weight_below_09"] * 100,
+            "pct_below_05": stats["weight_below_05"] * 100,
         }
 
 # ==============================================================================
@@ -244,7 +213,7 @@ class TDSpikeShiftDetector:
 class ARCvNextCallback(BaseCallback):
     """
     ARC vNext callback that:
-    1. Applies u_mem ALWAYS (not just during shift)
+    1. Leaves u_mem to the replay buffer (stored per transition)
     2. Uses TD-spike shift detection for exploration boost only
     3. Tracks all metrics for verification
     """
@@ -277,12 +246,8 @@ class ARCvNextCallback(BaseCallback):
         infos = self.locals.get("infos", [{}])
         info = infos[0] if infos else {}
         
-        # Get u_mem from ARC wrapper (ALWAYS, not just during shift)
-        u_mem = info.get("arc_u_mem", 1.0)
-        
-        # ALWAYS apply gating (key fix)
-        if hasattr(self.model, 'set_u_mem'):
-            self.model.set_u_mem(u_mem)
+        # u_mem gating needs nothing here: the replay buffer stores
+        # arc_u_mem per transition and ARCvNextDQN weights each sample
         
         # Shift detection for exploration boost ONLY
         # (We don't have direct TD-error access in SB3 callback,
@@ -37,6 +37,7 @@ from stable_baselines3.common.callbacks import BaseCallback
 from envs.cartpole_nonstationary import NonStationaryCartPole
 from agents.arc_dqn_wrapper import ARCGymWrapper, ARCWrapperConfig
 from agents.arc_replay_buffer import ARCGatedReplayBuffer, ARCGatedReplayConfig
+from agents.arc_prioritized_replay import ARCPrioritizedDQN
 
 
 def _make_arc_lr_schedule(
@@ -192,16 +193,18 @@ def run_dqn_experiment(
     seed: int,
     total_timesteps: int = 50000,
     eval_freq: int = 5000,
+    compact_replay: bool = False,
 ) -> Dict[str, Any]:
     """
     Run a single DQN experiment.
     
     Args:
-        condition: "baseline", "arc", or "arc_gating_only"
+        condition: "baseline", "arc_obs", "arc_plasticity" or "arc_prioritized"
         env_config: Configuration for NonStationaryCartPole
         seed: Random seed
         total_timesteps: Total training timesteps
         eval_freq: Evaluation frequency
+        compact_replay: Compact storage for the ARC-gated replay buffer (arc_plasticity)
         
     Returns:
         Dictionary with experiment results
@@ -240,6 +243,18 @@ def run_dqn_experiment(
         eval_env = ARCGymWrapper(eval_env, config=arc_config)
         arc_gate = {"u_mem": 1.0, "shift_active": False}
 
+    elif condition == "arc_prioritized":
+        # Same policy input as baseline; ARC signals set replay priorities (sum-tree PER)
+        arc_config = ARCWrapperConfig(
+            use_reward_shaping=False,
+            use_observation_augmentation=False,
+            use_shift_detection=True,
+            shift_boost_steps=200,
+            mem_gate_include_uncertainty=True,
+        )
+        train_env = ARCGymWrapper(train_env, config=arc_config)
+        eval_env = ARCGymWrapper(eval_env, config=arc_config)
+
     # Create callback
     callback = MetricsCallback(eval_env, eval_freq=eval_freq, verbose=1, arc_gate=arc_gate)
     
@@ -259,10 +274,12 @@ def run_dqn_experiment(
                 u_mem_threshold=0.2,
                 min_transitions_to_gate=1000,
                 bypass_when_shift_active=True,
+                compact=compact_replay,
             )
         }
 
-    model = DQN(
+    model_class = ARCPrioritizedDQN if condition == "arc_prioritized" else DQN
+    model = model_class(
         "MlpPolicy",
         train_env,
         learning_rate=learning_rate,
@@ -338,6 +355,10 @@ def run_dqn_experiment(
         stats = model.replay_buffer.get_gate_stats()
         for k, v in stats.items():
             results[f"replay_{k}"] = v
+    if hasattr(model, "replay_buffer") and hasattr(model.replay_buffer, "get_priority_stats"):
+        stats = model.replay_buffer.get_priority_stats()
+        for k, v in stats.items():
+            results[f"replay_{k}"] = v
     
     # Cleanup
     train_env.close()
@@ -352,6 +373,11 @@ def main():
     parser.add_argument("--seeds", type=int, default=10, help="Number of random seeds")
     parser.add_argument("--change-every", type=int, default=50, help="Episodes between pole length changes")
     parser.add_argument("--outdir", type=str, default="outputs_L6_dqn", help="Output directory")
+    parser.add_argument("--conditions", nargs="+", default=["baseline", "arc_obs", "arc_plasticity"],
+                        choices=["baseline", "arc_obs", "arc_plasticity", "arc_prioritized"],
+                        help="Conditions to run")
+    parser.add_argument("--compact-replay", action="store_true",
+                        help="Float16 obs / single-copy next_obs in the ARC-gated replay buffer")
     args = parser.parse_args()
     
     # Create output directory
@@ -363,7 +389,7 @@ def main():
         "pole_lengths": (0.5, 1.0, 1.5),  # Short, medium, long poles
     }
     
-    conditions = ["baseline", "arc_obs", "arc_plasticity"]
+    conditions = args.conditions
     all_results = []
     
     print("=" * 70)
@@ -382,6 +408,7 @@ def main():
                 env_config=env_config,
                 seed=seed,
                 total_timesteps=args.timesteps,
+                compact_replay=args.compact_replay,
             )
             all_results.append(results)
             
@@ -413,14 +440,13 @@ def main():
         print(f"  Success Rate: {np.mean(successes)*100:.1f}% +/- {np.std(successes)*100:.1f}%")
     
     # Compute improvement
-    baseline_success = np.mean([r["success_rate"] for r in all_results if r["condition"] == "baseline"])
-    arc_obs_success = np.mean([r["success_rate"] for r in all_results if r["condition"] == "arc_obs"])
-    arc_plasticity_success = np.mean([r["success_rate"] for r in all_results if r["condition"] == "arc_plasticity"])
+    success = {c: np.mean([r["success_rate"] for r in all_results if r["condition"] == c]) for c in conditions}
+    compared = [c for c in conditions if c != "baseline"] if "baseline" in success else []
     
     print("\n" + "-" * 70)
     print("IMPROVEMENT OVER BASELINE:")
-    print(f"  ARC_OBS:         {(arc_obs_success - baseline_success)*100:+.1f} pp")
-    print(f"  ARC_PLASTICITY:  {(arc_plasticity_success - baseline_success)*100:+.1f} pp")
+    for condition in compared:
+        print(f"  {condition.upper() + ':':<17}{(success[condition] - success['baseline'])*100:+.1f} pp")
     
     # Save summary
     summary_path = os.path.join(out_dir, "summary.txt")
@@ -435,8 +461,8 @@ def main():
             f.write(f"  Final Reward: {np.mean(rewards):.1f} +/- {np.std(rewards):.1f}\n")
             f.write(f"  Success Rate: {np.mean(successes)*100:.1f}%\n\n")
         f.write("\nImprovement over baseline:\n")
-        f.write(f"  ARC_OBS: {(arc_obs_success - baseline_success)*100:+.1f} pp\n")
-        f.write(f"  ARC_PLASTICITY: {(arc_plasticity_success - baseline_success)*100:+.1f} pp\n")
+        for condition in compared:
+            f.write(f"  {condition.upper()}: {(success[condition] - success['baseline'])*100:+.1f} pp\n")
     print(f"Saved: {summary_path}")
 
 
@@ -4,7 +4,7 @@ L6b DQN ABLATION SUITE: Finding What Works for Deep RL
 This implements a CLEAN 4-condition ablation to diagnose what's breaking DQN:
 
 1. BASELINE: Pure DQN (no ARC)
-2. LOSS-WEIGHT GATING: u_mem weights the loss instead of blocking updates
+2. LOSS-WEIGHT GATING: each sample's stored u_mem weights its loss instead of blocking updates
 3. SHIFT→EXPLORATION: Shift detection boosts epsilon, not LR
 4. MIXED REPLAY: 70% global + 30% recent, no gating
 
@@ -40,6 +40,7 @@ import gymnasium as gym
 
 from envs.adversarial_envs import AdversarialCartPole, CatastrophicForgettingEnv
 from agents.arc_dqn_wrapper import ARCGymWrapper, ARCWrapperConfig
+from agents.arc_weighted_dqn import ARCWeightedDQN
 
 # ==============================================================================
 # MIXED REPLAY BUFFER (70% global + 30% recent)
@@ -78,44 +79,6 @@ class MixedReplayBuffer(ReplayBuffer):
         
         return self._get_samples(all_indices, env=env)
 
-# ==============================================================================
-# DQN WITH LOSS WEIGHTING (instead of blocking)
-# ==============================================================================
-
-class WeightedLossDQN(DQN):
-    """
-    DQN that uses u_mem as a loss weight instead of blocking updates.
-    
-    loss = mean(weight * huber(td_error))
-    
-    This preserves gradient flow while still "protecting" during high risk.
-    """
-    def __init__(self, *args, w_min: float = 0.3, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.w_min = w_min
-        self._current_u_mem = 1.0
-        
-    def set_u_mem(self, u_mem: float):
-        """Set the current memory gating signal (called by callback)."""
-        self._current_u_mem = np.clip(u_mem, self.w_min, 1.0)
-        
-    def train(self, gradient_steps: int, batch_size: int = 100) -> None:
-        """Override train to apply loss weighting."""
-        # Get the weight (clamped to w_min)
-        weight = self._current_u_mem
-        
-        # Original train with modified loss scale
-        # We'll use the learning rate as a proxy for loss weighting
-        # (since SB3 doesn't expose the loss directly)
-        for param_group in self.policy.optimizer.param_groups:
-            param_group['lr'] = self.learning_rate * weight
-            
-        super().train(gradient_steps, batch_size)
-        
-        # Restore original learning rate
-        for param_group in self.policy.optimizer.param_groups:
-            param_group['lr'] = self.learning_rate
-
 # ==============================================================================
 # SHIFT→EXPLORATION CALLBACK
 # ==============================================================================
@@ -183,12 +146,12 @@ class ShiftExplorationCallback(BaseCallback):
         return True
 
 # ==============================================================================
-# LOSS WEIGHT CALLBACK (for WeightedLossDQN)
+# LOSS WEIGHT CALLBACK (for ARCWeightedDQN)
 # ==============================================================================
 
 class LossWeightCallback(BaseCallback):
     """
-    Updates the DQN's loss weight based on u_mem from ARC wrapper.
+    Evaluation callback for ARCWeightedDQN; reports the loss weights applied so far.
     """
     def __init__(self, eval_env, eval_freq: int = 5000, n_eval_episodes: int = 10, verbose: int = 0):
         super().__init__(verbose)
@@ -197,23 +160,14 @@ class LossWeightCallback(BaseCallback):
         self.n_eval_episodes = n_eval_episodes
         self.eval_rewards = []
         self.eval_steps = []
-        self.weight_history = []
         
     def _on_step(self) -> bool:
-        infos = self.locals.get("infos", [{}])
-        u_mem = infos[0].get("arc_u_mem", 1.0)
-        
-        # Update the model's loss weight
-        if hasattr(self.model, 'set_u_mem'):
-            self.model.set_u_mem(u_mem)
-            self.weight_history.append(u_mem)
-        
         # Evaluation
         if self.n_calls % self.eval_freq == 0:
             mean_r, std_r = evaluate_policy(self.model, self.eval_env, n_eval_episodes=self.n_eval_episodes)
             self.eval_rewards.append(mean_r)
             self.eval_steps.append(self.n_calls)
-            avg_w = np.mean(self.weight_history[-500:]) if self.weight_history else 1.0
+            avg_w = self.model.get_weight_stats().get("mean_weight", 1.0)
             if self.verbose:
                 print(f"  Step {self.n_calls}: reward={mean_r:.1f}±{std_r:.1f} | avg_weight={avg_w:.2f}")
                 
@@ -270,7 +224,7 @@ def run_condition(condition: str, env_class, seed: int, config: AblationConfig)
         callback = SimpleCallback(eval_env, config.eval_freq, config.n_eval_episodes, verbose=1)
         
     elif condition == "loss_weight_gating":
-        # ARC wrapper + WeightedLossDQN
+        # ARC wrapper + per-sample loss weighting from the stored u_mem
         arc_cfg = ARCWrapperConfig(
             use_observation_augmentation=False,
             use_reward_shaping=False,
@@ -280,7 +234,7 @@ def run_condition(condition: str, env_class, seed: int, config: AblationConfig)
         )
         train_env = ARCGymWrapper(base_train, config=arc_cfg)
         eval_env = ARCGymWrapper(base_eval, config=arc_cfg)
-        model = WeightedLossDQN("MlpPolicy", train_env, seed=seed, verbose=0,
+        model = ARCWeightedDQN("MlpPolicy", train_env, seed=seed, verbose=0,
                                learning_rate=1e-4, buffer_size=50000, w_min=0.3)
         callback = LossWeightCallback(eval_env, config.eval_freq, config.n_eval_episodes, verbose=1)
         
@@ -334,10 +288,11 @@ def run_condition(condition: str, env_class, seed: int, config: AblationConfig)
     }
     
     # Add condition-specific metrics
-    if hasattr(callback, 'weight_history') and callback.weight_history:
-        result["mean_weight"] = np.mean(callback.weight_history)
-        result["min_weight"] = np.min(callback.weight_history)
-        result["weight_below_05"] = np.mean([w < 0.5 for w in callback.weight_history])
+    if hasattr(model, 'get_weight_stats'):
+        weight_stats = model.get_weight_stats()
+        for key in ("mean_weight", "min_weight", "weight_below_05"):
+            if key in weight_stats:
+                result[key] = weight_stats[key]
         
     train_env.close()
     eval_env.close()
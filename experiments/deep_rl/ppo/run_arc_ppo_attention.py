@@ -32,6 +32,7 @@ if str(REPO_ROOT) not in sys.path:
 import gymnasium as gym
 from sim.state import State
 from sim.dynamics import step_dynamics
+from sim.params import DynamicsParams
 import yaml
 
 
@@ -156,6 +157,7 @@ class ARCPPO:
         
         # ARC state
         self.arc_cfg = load_arc_config()
+        self.arc_params = DynamicsParams.from_config(self.arc_cfg)
         self.assb_state = self._init_assb_state()
         self.current_arousal = 0.0
         
@@ -214,7 +216,7 @@ class ARCPPO:
         # Update ASSB state
         self.assb_state = step_dynamics(
             self.assb_state, pe=pe, reward=reward/100,
-            u_exog=u_exog, control=control, cfg=cfg
+            u_exog=u_exog, control=control, cfg=self.arc_params
         )
         
         return self.assb_state.a
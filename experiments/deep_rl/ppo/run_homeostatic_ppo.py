@@ -36,6 +36,7 @@ import gymnasium as gym
 from envs.cartpole_nonstationary import NonStationaryCartPole
 from sim.state import State
 from sim.dynamics import step_dynamics
+from sim.params import DynamicsParams
 import yaml
 
 
@@ -110,6 +111,7 @@ class HomeostaticPPO:
         
         # ARC state
         self.arc_cfg = load_arc_config()
+        self.arc_params = DynamicsParams.from_config(self.arc_cfg)
         self.assb_state = self._init_assb_state()
         
         # Buffers
@@ -164,7 +166,7 @@ class HomeostaticPPO:
         
         self.assb_state = step_dynamics(
             self.assb_state, pe=pe, reward=env_reward/100,
-            u_exog=u_exog, control=control, cfg=cfg
+            u_exog=u_exog, control=control, cfg=self.arc_params
         )
         
         arousal = self.assb_state.a
@@ -0,0 +1,117 @@
+"""
+Policy difference and latency of ARC_UltimateFast against ARC_Ultimate.
+
+Reports:
+- MPC model: how many stacked predictor rows can be positive on the
+  non-negative box, and the largest online MPC output at random points of
+  the reachable box (0 under ARC_Ultimate's model);
+- policy difference on the scenario suite. The fast controller shadows
+  ARC_Ultimate on ARC_Ultimate's own closed-loop trajectory (same states and
+  observations), and the largest control difference is reported per channel;
+- closed-loop metric differences (each controller running its own loop);
+- per-step latency of `act` for both controllers.
+
+Usage:
+  python experiments/report_ultimate_fast.py --config configs/v2.yaml --seeds 1 2 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import yaml
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim.state import State
+from sim.params import DynamicsParams
+from sim.batch import CONTROL_FIELDS
+from tasks.scenarios import build_scenarios
+from controllers.controllers import ARC_Ultimate
+from controllers.mpc import mpc_gain
+from controllers.ultimate_fast import ARC_UltimateFast, indefinite_rows
+from experiments.run import run_one
+
+
+class _Shadow:
+    """Runs ARC_Ultimate and records how far ARC_UltimateFast's output is on the same inputs."""
+    name = ARC_Ultimate.name
+
+    def __init__(self):
+        self.ref = ARC_Ultimate()
+        self.fast = ARC_UltimateFast()
+        self.max_err = dict.fromkeys(CONTROL_FIELDS, 0.0)
+
+    def act(self, st, obs, cfg):
+        u_ref = self.ref.act(st, obs, cfg)
+        u_fast = self.fast.act(st, obs, cfg)
+        for k in CONTROL_FIELDS:
+            self.max_err[k] = max(self.max_err[k], abs(float(u_ref[k]) - u_fast[k]))
+        return u_ref
+
+
+def _latency(cls, params, steps: int, repeats: int = 3) -> float:
+    """Best of `repeats` passes, in microseconds per `act` call."""
+    rng = np.random.default_rng(0)
+    states = [State(*row) for row in rng.random((steps, 10)).tolist()]
+    best = float("inf")
+    for _ in range(repeats):
+        ctrl = cls()
+        ctrl.act(states[0], {"perf": 0.5}, params)  # first-use setup
+        t0 = time.perf_counter()
+        for t, st in enumerate(states):
+            ctrl.act(st, {"t": t, "perf": 0.8}, params)
+        best = min(best, (time.perf_counter() - t0) / steps * 1e6)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="configs/v2.yaml")
+    ap.add_argument("--seeds", nargs="+", type=int, default=[1, 2, 3])
+    ap.add_argument("--points", type=int, default=5000, help="Random points for the MPC output check")
+    ap.add_argument("--steps", type=int, default=5000, help="Steps for the latency measurement")
+    args = ap.parse_args()
+    with open(args.config, "r", encoding="utf-8") as f:
+        params = DynamicsParams.from_config(yaml.safe_load(f))
+
+    ctrl = ARC_UltimateFast()
+    gain = mpc_gain(ctrl.A, ctrl.B, ctrl.Q_mpc, ctrl.R_mpc, ctrl.horizon)
+    rows = indefinite_rows(gain)
+    print(f"MPC model: {len(rows)} of {gain.stacked.shape[0]} stacked rows can be positive for x >= 0, "
+          f"largest entry {gain.stacked.max():.4f}")
+    rng = np.random.default_rng(1)
+    hi = np.array([1.0 - params.get("a_safe", 0.60), 1.0 - params.get("s_safe", 0.55), 1.0])
+    pts = rng.random((args.points, 3)) * hi
+    mpc_max = max(float(gain.control(x).max()) for x in pts)
+    n_fallback = sum(any(np.dot(r, x) > 0.0 for r in rows) for x in pts)
+    print(f"MPC stage: max online output {mpc_max:.2e} over {args.points} random points of the box, "
+          f"{n_fallback} needed the online fallback")
+
+    policy_err = dict.fromkeys(CONTROL_FIELDS, 0.0)
+    metric_err = {}
+    for sc in build_scenarios(params):
+        for seed in args.seeds:
+            shadow = _Shadow()
+            _, m_ref = run_one(shadow, sc, seed, params)
+            for k, v in shadow.max_err.items():
+                policy_err[k] = max(policy_err[k], v)
+            _, m_fast = run_one(ARC_UltimateFast(), sc, seed, params)
+            for k in m_ref:
+                metric_err[k] = max(metric_err.get(k, 0.0), abs(m_ref[k] - m_fast[k]))
+
+    print(f"policy: max |fast - ARC_Ultimate| on ARC_Ultimate trajectories ({len(args.seeds)} seeds per scenario)")
+    for k, v in policy_err.items():
+        print(f"  {k:<8} {v:.2e}")
+    print("closed loop: max |metric difference|")
+    for k, v in metric_err.items():
+        print(f"  {k:<14} {v:.2e}")
+
+    t_ref = _latency(ARC_Ultimate, params, args.steps)
+    t_fast = _latency(ARC_UltimateFast, params, args.steps)
+    print(f"latency: ARC_Ultimate {t_ref:.1f} us/step, fast {t_fast:.1f} us/step ({t_ref / t_fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
-import argparse, os, csv, random
+import argparse, os, csv, random, time, types
+import contextlib
+import multiprocessing as mp
 import yaml
+import numpy as np
 
 from sim.state import State, performance, ccog, capacity
 from sim.dynamics import step_dynamics
+from sim.params import DynamicsParams, as_params
+from sim.batch import (
+    STATE_FIELDS, CONTROL_FIELDS, A, S, MF, init_batch, row_to_state, controls_to_array, array_to_controls,
+    step_dynamics_batch, performance_batch, ccog_batch, capacity_batch,
+)
 from tasks.scenarios import build_scenarios
+from tasks.exog_cache import ExogCache
 from metrics.metrics import compute_metrics
+from metrics.batch import compute_metrics_batch, unstack_metrics
+from metrics.streaming import StreamingMetrics
+from experiments.trace_store import TraceStoreWriter, trace_to_array
 from controllers.controllers import (
     NoControl,
     NaiveCalm,
@@ -23,61 +35,371 @@ from controllers.controllers import (
     ARC_Adaptive,
 )
 
+# Controllers swept by main(), in output order. Every run gets a fresh instance.
+SWEEP_CONTROLLERS = (
+    NoControl,
+    NaiveCalm,
+    ARCv1,
+    ARCv1_PID,
+    ARCv1_LQR,
+    ARCv1_LQI,
+    ARC_Ultimate,
+    ARCv2_Hierarchical,
+    ARCv2_LQI,
+    ARCv3_MetaControl,
+    ARCv3_PID_Meta,
+    ARCv3_LQR_Meta,
+    ARC_Robust,
+    ARC_Adaptive,
+    PerfOptimized,
+)
+
 def init_state(cfg):
     return State(phi=cfg["phi0"], g=cfg["g0"], p=cfg["p0"], i=cfg["i0"],
                  s=cfg["s0"], v=cfg["v0"], a=cfg["a0"], mf=cfg["mf0"], ms=cfg["ms0"], u=cfg["u_base"])
 
-def run_one(controller, scenario, seed, cfg):
+def control_every(cfg):
+    """
+    Decimation factor `cfg["control_every"]` (default 1).
+
+    With k > 1 the controller is called only at t = 0, k, 2k, ... and its last
+    control is held in between (zero-order hold). Controller cost drops by
+    about k. Loop periods inside a controller count its own calls, so they
+    stretch to k times as many simulation steps.
+    """
+    k = int(cfg.get("control_every", 1))
+    if k < 1:
+        raise ValueError(f"control_every must be >= 1, got {k}")
+    return k
+
+def run_one(controller, scenario, seed, cfg, backend="scalar", record_trace=True):
+    """
+    Simulate one (controller, scenario, seed). Returns `(trace, metrics)`.
+
+    With `record_trace=False` metrics are accumulated online
+    (`metrics.streaming`) and `trace` is None: memory no longer grows with the horizon.
+    `cfg["control_every"]` decimates the controller (see `control_every`).
+    """
+    if backend == "batch":
+        return run_batch([controller], scenario, [seed], cfg, record_trace=record_trace)[0]
+    if backend != "scalar":
+        raise ValueError(f"Unknown backend: {backend}")
+    cfg = as_params(cfg)
+    every = control_every(cfg)
     rng = random.Random(seed)
     st = init_state(cfg)
+    if not record_trace:
+        return None, _run_streaming(controller, scenario, rng, st, cfg, every)
     trace = {k: [] for k in ["t","pe","reward","u_exog","phi","g","p","i","s","v","a","mf","ms","u","ccog","cap","perf"]}
     trace["control"] = [] # New: store control actions
+    if not scenario.interactive:
+        # Static scenarios: signals pre-generated once per seed (cached on the scenario)
+        exog = zip(*scenario.exog(seed).tolist())
     for t in range(scenario.horizon):
-        # Handle scenarios that require state (interactive) vs static ones
-        try:
+        # Interactive scenarios read the current state
+        if scenario.interactive:
             pe, reward, u_exog = scenario.generator(t, rng, st=st)
-        except TypeError:
-             # Fallback for old scenarios that don't accept st
-            pe, reward, u_exog = scenario.generator(t, rng)
-            
-        # Provide additional signals for controllers that need them (e.g., hierarchical/meta control).
-        obs = {
-            "t": t,
-            "pe": pe,
-            "reward": reward,
-            "u_exog": u_exog,
-            "perf": performance(st, cfg),
-            "ccog": ccog(st),
-            "cap": capacity(st, cfg["omega_s"]),
-        }
-        u_ctrl = controller.act(st, obs, cfg)
+        else:
+            pe, reward, u_exog = next(exog)
+
+        if t % every == 0:
+            # Provide additional signals for controllers that need them (e.g., hierarchical/meta control).
+            obs = {
+                "t": t,
+                "pe": pe,
+                "reward": reward,
+                "u_exog": u_exog,
+                "perf": performance(st, cfg),
+                "ccog": ccog(st),
+                "cap": capacity(st, cfg.omega_s),
+            }
+            u_ctrl = controller.act(st, obs, cfg)
         st = step_dynamics(st, pe=pe, reward=reward, u_exog=u_exog, control=u_ctrl, cfg=cfg)
         trace["t"].append(t); trace["pe"].append(pe); trace["reward"].append(reward); trace["u_exog"].append(u_exog)
         trace["phi"].append(st.phi); trace["g"].append(st.g); trace["p"].append(st.p); trace["i"].append(st.i)
         trace["s"].append(st.s); trace["v"].append(st.v); trace["a"].append(st.a)
         trace["mf"].append(st.mf); trace["ms"].append(st.ms); trace["u"].append(st.u)
-        trace["ccog"].append(ccog(st)); trace["cap"].append(capacity(st, cfg["omega_s"]))
+        trace["ccog"].append(ccog(st)); trace["cap"].append(capacity(st, cfg.omega_s))
         trace["perf"].append(performance(st, cfg))
         trace["control"].append(u_ctrl)
     met = compute_metrics(trace, scenario.shock_t, cfg)
     return trace, met
 
-def write_trace(path, trace):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    # Filter keys that are lists of floats/ints for CSV
-    keys = [k for k in trace.keys() if k != "control"]
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f); w.writerow(keys)
-        for i in range(len(trace[keys[0]])):
-            w.writerow([trace[k][i] for k in keys])
+def _run_streaming(controller, scenario, rng, st, cfg, every=1):
+    """`run_one` loop without a trace: each step feeds a StreamingMetrics."""
+    acc = StreamingMetrics(scenario.shock_t, cfg)
+    perf = performance(st, cfg)
+    for t in range(scenario.horizon):
+        if scenario.interactive:
+            pe, reward, u_exog = scenario.generator(t, rng, st=st)
+        else:
+            pe, reward, u_exog = scenario.generator(t, rng)
+        if t % every == 0:
+            obs = {
+                "t": t,
+                "pe": pe,
+                "reward": reward,
+                "u_exog": u_exog,
+                "perf": perf,
+                "ccog": ccog(st),
+                "cap": capacity(st, cfg.omega_s),
+            }
+            u_ctrl = controller.act(st, obs, cfg)
+        st = step_dynamics(st, pe=pe, reward=reward, u_exog=u_exog, control=u_ctrl, cfg=cfg)
+        perf = performance(st, cfg)
+        acc.update(perf, st.a, st.s, st.mf, u_ctrl)
+    return acc.result()
+
+def _instance_attrs(obj):
+    attrs = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name != "__dict__" and hasattr(obj, name):
+                attrs[name] = getattr(obj, name)
+    return attrs
+
+def _same_attr(a, b, depth=0):
+    """Structural equality of controller attributes (arrays, containers, plain helper objects)."""
+    if a is b:
+        return True
+    if type(a) is not type(b) or depth > 8:
+        return False
+    if isinstance(a, np.ndarray):
+        return a.shape == b.shape and a.dtype == b.dtype and np.array_equal(a, b)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(_same_attr(x, y, depth + 1) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same_attr(a[k], b[k], depth + 1) for k in a)
+    if isinstance(a, types.MethodType):
+        # Helpers bound to their own controller (e.g. a gain schedule's `compute`)
+        return a.__func__ is b.__func__
+    if type(a).__eq__ is object.__eq__ and (hasattr(a, "__dict__") or hasattr(a, "__slots__")):
+        return _same_attr(_instance_attrs(a), _instance_attrs(b), depth + 1)
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+def _shared_controller(controllers):
+    """
+    The instance that can drive every row through `act_batch`, or None.
+
+    Rows may share one instance only when it would not change what drives them:
+    every entry is that instance, or has its type and equal instance attributes
+    (e.g. fresh instances of one class). Anything else, such as an instance with
+    its own `ablate` mask or accumulated state, falls back to per-row `act`.
+    """
+    first = controllers[0]
+    if not hasattr(first, "act_batch"):
+        return None
+    attrs = _instance_attrs(first)
+    for c in controllers[1:]:
+        if c is first:
+            continue
+        if type(c) is not type(first) or not _same_attr(attrs, _instance_attrs(c)):
+            return None
+    return first
+
+def run_batch(controllers, scenario, seeds, cfg, record_trace=True):
+    """
+    Run one scenario for several seeds in lockstep on the batched engine.
+
+    `controllers[k]` drives `seeds[k]` (pass distinct instances for stateful
+    controllers). When `_shared_controller` finds that all entries are
+    interchangeable, the first one drives every row through `act_batch` (with
+    per-row batch state); otherwise each row calls its own controller's `act`.
+    Exogenous streams stay per-trajectory; the dynamics and the
+    performance/capacity readouts are vectorized. Returns a
+    list of `(trace, metrics)` identical to calling `run_one` per seed
+    (`trace` is None with `record_trace=False`, as in `run_one`).
+    """
+    cfg = as_params(cfg)
+    every = control_every(cfg)
+    n = len(seeds)
+    rngs = [random.Random(seed) for seed in seeds]
+    x = init_batch(cfg, n)
+    horizon = scenario.horizon
+    if record_trace:
+        exog = np.empty((horizon, 3, n))
+        states = np.empty((horizon, n, len(STATE_FIELDS)))
+        derived = np.empty((horizon, 3, n))
+        controls = [[None] * horizon for _ in range(n)]
+        u_arr = np.empty((horizon, n, len(CONTROL_FIELDS)))
+    else:
+        accs = [StreamingMetrics(scenario.shock_t, cfg) for _ in range(n)]
+    ex = np.empty((3, n))
+    pregen = record_trace and not scenario.interactive
+    if pregen:
+        pe_all, reward_all, u_exog_all = scenario.generate(seeds, horizon)
+
+    perf = performance_batch(x, cfg)
+    cog = ccog_batch(x)
+    cap = capacity_batch(x, cfg.omega_s)
+    vec_ctrl = _shared_controller(controllers)
+    for t in range(horizon):
+        if pregen:
+            ex[0] = pe_all[:, t]; ex[1] = reward_all[:, t]; ex[2] = u_exog_all[:, t]
+        else:
+            for k in range(n):
+                if scenario.interactive:
+                    ex[:, k] = scenario.generator(t, rngs[k], st=row_to_state(x[k]))
+                else:
+                    ex[:, k] = scenario.generator(t, rngs[k])
+        # Control steps only; in between u_t / u_rows are held (zero-order hold)
+        if t % every == 0:
+            if vec_ctrl is not None:
+                obs_b = {"t": t, "pe": ex[0], "reward": ex[1], "u_exog": ex[2], "perf": perf, "ccog": cog, "cap": cap}
+                u_t = vec_ctrl.act_batch(x, obs_b, cfg)
+                u_rows = array_to_controls(u_t)
+            else:
+                u_rows = []
+                for k, (pe, reward, u_exog) in enumerate(ex.T.tolist()):
+                    obs = {
+                        "t": t,
+                        "pe": pe,
+                        "reward": reward,
+                        "u_exog": u_exog,
+                        "perf": float(perf[k]),
+                        "ccog": float(cog[k]),
+                        "cap": float(cap[k]),
+                    }
+                    u_rows.append(controllers[k].act(row_to_state(x[k]), obs, cfg))
+                u_t = controls_to_array(u_rows)
+        x = step_dynamics_batch(x, ex[0], ex[1], ex[2], u_t, cfg)
+        perf = performance_batch(x, cfg)
+        cog = ccog_batch(x)
+        cap = capacity_batch(x, cfg.omega_s)
+        if record_trace:
+            exog[t] = ex
+            u_arr[t] = u_t
+            for k in range(n):
+                controls[k][t] = u_rows[k]
+            states[t] = x
+            derived[t, 0] = cog; derived[t, 1] = cap; derived[t, 2] = perf
+        else:
+            for k, (p_k, a_k, s_k, mf_k) in enumerate(zip(perf.tolist(), x[:, A].tolist(),
+                                                           x[:, S].tolist(), x[:, MF].tolist())):
+                accs[k].update(p_k, a_k, s_k, mf_k, u_rows[k])
+
+    if not record_trace:
+        return [(None, acc.result()) for acc in accs]
+
+    # (n, horizon) views for the vectorized metrics
+    perf_nh = np.ascontiguousarray(derived[:, 2, :].T)
+    state_nh = np.ascontiguousarray(states.transpose(1, 0, 2))
+    metrics = unstack_metrics(compute_metrics_batch(
+        perf_nh, state_nh[:, :, A], state_nh[:, :, S], scenario.shock_t, cfg, mf=state_nh[:, :, MF],
+        control=np.ascontiguousarray(u_arr.transpose(1, 0, 2))))
+
+    out = []
+    for k in range(n):
+        trace = {"t": list(range(horizon))}
+        for j, name in enumerate(("pe", "reward", "u_exog")):
+            trace[name] = exog[:, j, k].tolist()
+        for j, name in enumerate(STATE_FIELDS):
+            trace[name] = states[:, k, j].tolist()
+        for j, name in enumerate(("ccog", "cap", "perf")):
+            trace[name] = derived[:, j, k].tolist()
+        trace["control"] = controls[k]
+        out.append((trace, metrics[k]))
+    return out
+
+# --- Sweep executor ---
+# Work unit ("chunk") = one (scenario, controller) pair with all its seeds, so the
+# batch backend still steps the seeds in lockstep. Chunks are dispatched to a
+# process pool and consumed with an ordered imap: rows reach the writer as soon
+# as the next chunk in grid order is done, and the output is the same for any
+# number of workers.
+
+_WORKER = {}
+
+def _init_sweep_worker(cfg, backend, record_traces, exog=None):
+    # Scenario generators are closures (not picklable): rebuild them per process.
+    _WORKER["params"] = DynamicsParams.from_config(cfg)
+    _WORKER["scenarios"] = build_scenarios(cfg)
+    _WORKER["backend"] = backend
+    _WORKER["record_traces"] = record_traces
+    if exog is not None:
+        # Shared exogenous streams: an ExogCache in-process, or the handle of the parent's block in a worker.
+        cache = exog if isinstance(exog, ExogCache) else ExogCache.attach(exog)
+        cache.install(_WORKER["scenarios"], cfg["seeds"])
+        _WORKER["exog"] = cache
+
+def _run_chunk(chunk):
+    si, ci, seeds = chunk
+    params = _WORKER["params"]
+    sc = _WORKER["scenarios"][si]
+    ctrl_cls = SWEEP_CONTROLLERS[ci]
+    record = _WORKER["record_traces"]
+    if _WORKER["backend"] == "batch":
+        results = run_batch([ctrl_cls() for _ in seeds], sc, list(seeds), params, record_trace=record)
+    else:
+        results = [run_one(ctrl_cls(), sc, seed, params, record_trace=record) for seed in seeds]
+    rows = []
+    for seed, (trace, met) in zip(seeds, results):
+        row = {"scenario": sc.name, "controller": ctrl_cls.name, "seed": seed}; row.update(met)
+        rows.append(row)
+    block = np.stack([trace_to_array(trace) for trace, _ in results]) if record else None
+    return sc.name, ctrl_cls.name, seeds, rows, block
+
+def run_sweep(cfg, backend="scalar", workers=1, record_traces=True):
+    """
+    Run the scenarios x SWEEP_CONTROLLERS x cfg["seeds"] grid.
+
+    Yields one `(scenario, controller, seeds, rows, block)` tuple per chunk, in
+    grid order: `rows` are the metric rows and `block` the float32 traces
+    (see `experiments.trace_store`), or None if `record_traces` is False.
+    `workers > 1` spreads chunks over a process pool.
+
+    With traces on, each (scenario, seed) exogenous stream is generated once
+    into shared memory (`tasks.exog_cache`) and every controller, in every
+    worker, reads the same read-only copy (common random numbers).
+    """
+    scenarios = build_scenarios(cfg)
+    seeds = tuple(cfg["seeds"])
+    chunks = [(si, ci, seeds) for si in range(len(scenarios)) for ci in range(len(SWEEP_CONTROLLERS))]
+    # The streaming path (no traces) keeps per-step generation to stay O(1) in the horizon.
+    cache = ExogCache.build(scenarios, seeds) if record_traces else None
+    try:
+        if workers <= 1:
+            _init_sweep_worker(cfg, backend, record_traces, cache)
+            try:
+                for chunk in chunks:
+                    yield _run_chunk(chunk)
+            finally:
+                _WORKER.clear()
+            return
+        initargs = (cfg, backend, record_traces, cache.handle if cache is not None else None)
+        with mp.Pool(processes=workers, initializer=_init_sweep_worker, initargs=initargs) as pool:
+            for result in pool.imap(_run_chunk, chunks):
+                yield result
+    finally:
+        if cache is not None:
+            cache.close()
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--config", required=True)
     ap.add_argument("--outdir", default=None, help="Override output directory")
+    ap.add_argument("--backend", choices=["scalar", "batch"], default="scalar",
+                    help="scalar: one State per step (reference); batch: all seeds in lockstep on sim.batch")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Worker processes for the sweep (0 = all CPUs). Output does not depend on it.")
+    ap.add_argument("--compress-traces", action="store_true",
+                    help="Deflate traces.npz (smaller, but it can no longer be memory-mapped)")
+    ap.add_argument("--no-traces", action="store_true",
+                    help="Skip traces.npz; metrics are accumulated online (bounded memory for long horizons)")
+    ap.add_argument("--horizon", type=int, default=None, help="Override cfg['horizon']")
+    ap.add_argument("--control-every", type=int, default=None,
+                    help="Run the controller every k steps and hold its output in between (cfg['control_every'])")
     args = ap.parse_args()
     with open(args.config, "r", encoding="utf-8") as f:
         cfg = yaml.safe_load(f)
+    if args.horizon is not None:
+        cfg["horizon"] = args.horizon
+    if args.control_every is not None:
+        cfg["control_every"] = args.control_every
+    control_every(DynamicsParams.from_config(cfg))  # validate once, before any worker starts
 
     if args.outdir:
         out_dir = os.path.abspath(args.outdir)
@@ -85,40 +407,35 @@ def main():
         out_dir = os.path.join(os.path.dirname(args.config), "..", cfg.get("out_dir","outputs"))
         out_dir = os.path.abspath(out_dir)
     os.makedirs(out_dir, exist_ok=True)
-    os.makedirs(os.path.join(out_dir, "traces"), exist_ok=True)
-
-    controllers = [
-        NoControl(),
-        NaiveCalm(),
-        ARCv1(),
-        ARCv1_PID(),
-        ARCv1_LQR(),
-        ARCv1_LQI(),
-        ARC_Ultimate(),
-        ARCv2_Hierarchical(),
-        ARCv2_LQI(),
-        ARCv3_MetaControl(),
-        ARCv3_PID_Meta(),
-        ARCv3_LQR_Meta(),
-        ARC_Robust(),
-        ARC_Adaptive(),
-        PerfOptimized(),
-    ]
     scenarios = build_scenarios(cfg)
-    rows = []
-    for sc in scenarios:
-        for ctrl in controllers:
-            for seed in cfg["seeds"]:
-                trace, met = run_one(ctrl, sc, seed, cfg)
-                write_trace(os.path.join(out_dir, "traces", f"{sc.name}__{ctrl.name}__seed{seed}.csv"), trace)
-                row = {"scenario": sc.name, "controller": ctrl.name, "seed": seed}; row.update(met)
-                rows.append(row)
+    horizons = {sc.horizon for sc in scenarios}
+    if not args.no_traces and len(horizons) != 1:
+        raise ValueError(f"Trace store needs a single horizon across scenarios, got {sorted(horizons)}")
+    n_total = len(scenarios) * len(SWEEP_CONTROLLERS) * len(cfg["seeds"])
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
 
     metrics_path = os.path.join(out_dir, "metrics.csv")
-    with open(metrics_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys())); w.writeheader(); w.writerows(rows)
+    traces_path = None if args.no_traces else os.path.join(out_dir, "traces.npz")
+    n_runs = 0
+    t0 = time.perf_counter()
+    with open(metrics_path, "w", newline="", encoding="utf-8") as f, \
+         (TraceStoreWriter(traces_path, n_total, horizons.pop(), compress=args.compress_traces)
+          if traces_path else contextlib.nullcontext()) as store:
+        w = None
+        for sc_name, ctrl_name, seeds, rows, block in run_sweep(cfg, backend=args.backend, workers=workers,
+                                                                  record_traces=not args.no_traces):
+            if w is None:
+                w = csv.DictWriter(f, fieldnames=list(rows[0].keys())); w.writeheader()
+            w.writerows(rows)
+            if store is not None:
+                store.append(sc_name, ctrl_name, seeds, block)
+            n_runs += len(rows)
+    elapsed = time.perf_counter() - t0
 
     print("Wrote:", metrics_path)
+    if traces_path:
+        print("Wrote:", traces_path)
+    print(f"{n_runs} runs in {elapsed:.1f}s ({n_runs / max(elapsed, 1e-9):.1f} runs/s, workers={workers})")
 
 if __name__ == "__main__":
     main()
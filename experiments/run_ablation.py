@@ -7,6 +7,7 @@ import yaml
 
 from sim.state import State, performance, ccog, capacity
 from sim.dynamics import step_dynamics
+from sim.params import as_params
 from tasks.scenarios import build_scenarios
 from metrics.metrics import compute_metrics
 from controllers.controllers import (
@@ -18,6 +19,7 @@ def init_state(cfg):
                  s=cfg["s0"], v=cfg["v0"], a=cfg["a0"], mf=cfg["mf0"], ms=cfg["ms0"], u=cfg["u_base"])
 
 def run_one(controller, scenario, seed, cfg):
+    cfg = as_params(cfg)
     rng = random.Random(seed)
     st = init_state(cfg)
     trace = {k: [] for k in ["t","pe","reward","u_exog","phi","g","p","i","s","v","a","mf","ms","u","ccog","cap","perf"]}
@@ -29,7 +31,7 @@ def run_one(controller, scenario, seed, cfg):
         trace["phi"].append(st.phi); trace["g"].append(st.g); trace["p"].append(st.p); trace["i"].append(st.i)
         trace["s"].append(st.s); trace["v"].append(st.v); trace["a"].append(st.a)
         trace["mf"].append(st.mf); trace["ms"].append(st.ms); trace["u"].append(st.u)
-        trace["ccog"].append(ccog(st)); trace["cap"].append(capacity(st, cfg["omega_s"]))
+        trace["ccog"].append(ccog(st)); trace["cap"].append(capacity(st, cfg.omega_s))
         trace["perf"].append(performance(st, cfg))
     met = compute_metrics(trace, scenario.shock_t, cfg)
     return trace, met
@@ -9,14 +9,33 @@ On environments:
 - GridWorld (basic)
 - StochasticGridWorld (noisy transitions)
 - ChangingGoalGridWorld (transfer learning)
+
+`--batched` runs every agent and seed of an environment as the rows of one
+batch, with the vectorized agents of `agents.batch_q_learning` and the
+table-driven grids of `envs.batch_gridworld` (one Generator per seed, each row
+on its own episode clock). Its results match the scalar agents in
+distribution, not number for number. A batched step costs about as much as
+twenty scalar steps (numpy call overhead on tiny arrays), almost regardless
+of the number of rows, so every environment has a fixed cost of several
+seconds. Measured on one CPU, 200 episodes: the 20-seed ablation (4 agents)
+takes 14.5 s batched and 39.9 s scalar (2.2 s for one scalar seed); this
+script with 10 seeds takes 16.9 s batched and 13.5 s scalar.
+
+(env, agent, seed) jobs run on a process pool (`--workers`). Per-episode rows
+are appended to raw_results.csv as each job finishes, and `--resume` skips the
+runs that are already complete in it.
 """
 
 import os
 import sys
 import csv
+import time
 import argparse
+import multiprocessing as mp
+from collections import Counter
+import yaml
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any
 from dataclasses import dataclass
 
 # Add parent directory to path
@@ -24,6 +43,21 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from envs.gridworld import GridWorld, StochasticGridWorld, ChangingGoalGridWorld, GridWorldConfig
 from agents.q_learning import QLearningAgent, ARCQLearningAgent, QLearningConfig
+from agents.batch_q_learning import BatchQLearningAgent, BatchARCQLearningAgent, BatchAgentStack
+from envs.batch_gridworld import BatchGridWorld, BatchStochasticGridWorld, BatchChangingGoalGridWorld
+
+# Vectorized counterpart of each scalar agent (same constructor kwargs)
+BATCH_AGENTS = {
+    QLearningAgent: BatchQLearningAgent,
+    ARCQLearningAgent: BatchARCQLearningAgent,
+}
+
+# Vectorized counterpart of each scalar environment (same constructor kwargs)
+BATCH_ENVS = {
+    GridWorld: BatchGridWorld,
+    StochasticGridWorld: BatchStochasticGridWorld,
+    ChangingGoalGridWorld: BatchChangingGoalGridWorld,
+}
 
 @dataclass
 class ExperimentConfig:
@@ -119,8 +153,8 @@ def run_experiment(agent_class, env_class, config: ExperimentConfig,
         ep_result["epsilon"] = agent.epsilon
         
         # ARC-specific metrics
-        if hasattr(agent, 'arousal_history') and agent.arousal_history:
-            ep_result["mean_arousal"] = np.mean(agent.arousal_history)
+        if agent.stats.count("arousal"):
+            ep_result["mean_arousal"] = agent.stats.mean("arousal")
             ep_result["blocked_updates"] = agent.blocked_updates
         
         results.append(ep_result)
@@ -128,6 +162,360 @@ def run_experiment(agent_class, env_class, config: ExperimentConfig,
     return results
 
 
+def run_experiment_batched(agent_class, env_class, config: ExperimentConfig,
+                           seeds: List[int], agent_kwargs: Dict = None, env_kwargs: Dict = None,
+                           n_eval: int = 5) -> List[Dict]:
+    """
+    `run_experiment` for several seeds at once (one cell of `run_cells_batched`).
+
+    Returns the episode-wise results grouped by seed, like concatenating
+    `run_experiment` over `seeds`.
+    """
+    return run_cells_batched([(agent_class, agent_kwargs, seeds)], env_class, config,
+                             env_kwargs=env_kwargs, n_eval=n_eval)[0]
+
+
+def _agent_groups(cells) -> List[tuple]:
+    """
+    `(agent_class, shared kwargs, cell indices)` of the agents that run `cells`.
+
+    Cells of one class whose kwargs differ only in the class's `row_kwargs`
+    share an agent.
+    """
+    groups = []
+    for c, (agent_class, agent_kwargs, _) in enumerate(cells):
+        shared = {k: v for k, v in (agent_kwargs or {}).items() if k not in agent_class.row_kwargs}
+        for group in groups:
+            if group[0] is agent_class and group[1] == shared:
+                group[2].append(c)
+                break
+        else:
+            groups.append((agent_class, shared, [c]))
+    return groups
+
+
+def run_cells_batched(cells, env_class, config: ExperimentConfig, env_kwargs: Dict = None,
+                      n_eval: int = 5) -> List[List[Dict]]:
+    """
+    `run_experiment` for every seed of several agent cells on one environment at once.
+
+    `cells` are `(agent_class, agent_kwargs, seeds)` with batched agent classes
+    (see `BATCH_AGENTS`). Every (cell, seed) is a row of one batch: one
+    `BATCH_ENVS` counterpart of `env_class` with `auto_reset`, and one agent
+    (see `_agent_groups`), so the per-step overhead is paid once for all cells.
+    A row draws from its own per-seed Generators, exactly as when its cell
+    runs alone, so results do not depend on which cells share the batch.
+
+    Every row runs the sequence of `run_experiment` on its own clock: a
+    training episode, followed by `n_eval` greedy evaluation episodes after
+    every `eval_every`-th one. A row starts its next episode on the step after
+    the previous one ended, so no row waits for a slower one, and each step
+    acts for all rows that still have episodes left. Returns one result list
+    per cell, grouped by seed like concatenating `run_experiment` over them.
+    """
+    env_kwargs = env_kwargs or {}
+
+    # Rows are (cell, seed) pairs, contiguous per agent
+    groups = _agent_groups(cells)
+    rows_of = [[(c, seed) for c in cs for seed in cells[c][2]] for _, _, cs in groups]
+    row_cell = [c for rows in rows_of for c, _ in rows]
+    row_seed = [seed for rows in rows_of for _, seed in rows]
+    names = [cells[c][0].name for c in row_cell]
+    n = len(row_cell)
+
+    # Slips get their own stream per row, independent of the agent's
+    env = BATCH_ENVS[env_class](n, seeds=[[seed, 1] for seed in row_seed], auto_reset=True, **env_kwargs)
+
+    q_config = QLearningConfig(n_states=env.n_states, n_actions=env.n_actions)
+    agents = []
+    for (agent_class, shared, _), rows in zip(groups, rows_of):
+        per_row = {k: [(cells[c][1] or {}).get(k, default) for c, _ in rows]
+                   for k, default in agent_class.row_kwargs.items()}
+        agents.append(agent_class([seed for _, seed in rows], config=q_config, **shared, **per_row))
+    agent = agents[0] if len(agents) == 1 else BatchAgentStack(agents)
+
+    def start_training(rows):
+        agent.reset_episode_stats(rows)
+        signals = env.signals(rows)
+        agent.on_reset(rows, signals["u_exog"], signals["goal_changed"])
+
+    episode = np.zeros(n, dtype=np.int64)     # Training episodes finished
+    eval_left = np.zeros(n, dtype=np.int64)   # Evaluation episodes left before the next training episode
+    eval_reward = np.zeros(n)
+    eval_success = np.zeros(n)
+    train_epsilon = np.zeros(n)               # Epsilon of the evaluating seeds (theirs is 0 meanwhile)
+    total_reward = np.zeros(n)
+    steps = np.zeros(n, dtype=np.int64)
+    pending = [None] * n                      # Training results waiting for their evaluation
+    results = [[] for _ in range(n)]
+
+    rows = np.arange(n)
+    env.reset(rows)
+    start_training(rows)
+    while rows.size:
+        states = env.state[rows]
+        actions = agent.select_actions(states, rows)
+        next_states, rewards, term, trunc, signals = env.step(actions, rows)
+        done = term | trunc
+
+        # Evaluation steps do not learn
+        learn = eval_left[rows] == 0
+        k = slice(None) if learn.all() else np.flatnonzero(learn)
+        agent.update(states[k], actions[k], rewards[k], next_states[k], done[k], rows[k],
+                     pe=signals["pe"][k], u_exog=signals["u_exog"][k],
+                     goal_changed=signals["goal_changed"][k])
+
+        total_reward[rows] += rewards
+        steps[rows] += 1
+        if not done.any():
+            continue
+
+        # Only the goal cell terminates an episode
+        finished, reached = rows[done], term[done]
+        evaluating = eval_left[finished] > 0
+
+        trained = finished[~evaluating]
+        if trained.size:
+            agent.decay_epsilon(trained)
+            for r, goal in zip(trained.tolist(), reached[~evaluating].tolist()):
+                ep_result = {
+                    "total_reward": float(total_reward[r]),
+                    "steps": int(steps[r]),
+                    "reached_goal": goal,
+                    "trap_hits": int(env.final_trap_hits[r]),
+                    "episode": int(episode[r]),
+                    "seed": row_seed[r],
+                    "agent": names[r],
+                    "env": env_class.__name__,
+                    "epsilon": float(agent.epsilon[r]),
+                    **agent.episode_info(r),
+                }
+                if episode[r] % config.eval_every == 0:
+                    pending[r] = ep_result
+                else:
+                    results[r].append(ep_result)
+            episode[trained] += 1
+
+            # Periodic evaluation: greedy episodes before the next training episode
+            to_eval = trained[(episode[trained] - 1) % config.eval_every == 0]
+            eval_left[to_eval] = n_eval
+            eval_reward[to_eval] = 0.0
+            eval_success[to_eval] = 0.0
+            train_epsilon[to_eval] = agent.epsilon[to_eval]
+            agent.epsilon[to_eval] = 0.0
+
+        evaluated = finished[evaluating]
+        if evaluated.size:
+            eval_reward[evaluated] += total_reward[evaluated]
+            eval_success[evaluated] += reached[evaluating]
+            eval_left[evaluated] -= 1
+            evaluated = evaluated[eval_left[evaluated] == 0]
+            agent.epsilon[evaluated] = train_epsilon[evaluated]
+            for r in evaluated.tolist():
+                pending[r]["eval_reward"] = float(eval_reward[r] / n_eval)
+                pending[r]["eval_success_rate"] = float(eval_success[r] / n_eval)
+                results[r].append(pending[r])
+                pending[r] = None
+
+        total_reward[finished] = 0.0
+        steps[finished] = 0
+        starting = finished[(eval_left[finished] == 0) & (episode[finished] < config.n_episodes)]
+        if starting.size:
+            start_training(starting)
+        rows = rows[(eval_left[rows] > 0) | (episode[rows] < config.n_episodes)]
+
+    out = [[] for _ in cells]
+    for r, c in enumerate(row_cell):
+        out[c].extend(results[r])
+    return out
+
+
+# --- Parallel runner ---
+# Job = `(env_class, env_kwargs, runs)`, with runs `(label, agent_class,
+# agent_kwargs, seeds)` on that environment: a single cell and seed for the
+# scalar agents, and every cell and seed of the environment with --batched,
+# since those train together in one batch. Jobs are dispatched to a process pool and consumed with an ordered
+# imap. raw_results.csv therefore gets the same rows in the same order for any
+# number of workers, and each job's rows are written and flushed as soon as it
+# is consumed. A run is identified by (agent, env, seed) in the file.
+
+ARC_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "configs", "v2.yaml")
+
+RAW_FIELDS = sorted([
+    "total_reward", "steps", "reached_goal", "trap_hits", "eval_reward", "eval_success_rate",
+    "episode", "seed", "agent", "env", "epsilon", "mean_arousal", "blocked_updates",
+])
+_INT_FIELDS = ("steps", "trap_hits", "episode", "seed", "blocked_updates")
+
+def load_arc_config(path: str = ARC_CONFIG_PATH) -> Dict[str, Any]:
+    """ARC configuration for the ARC agents (parsed once, shared by every job)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def plan_jobs(cells, seeds: List[int], batched: bool = False, done=frozenset()) -> List[tuple]:
+    """
+    Jobs for `cells` x `seeds`, skipping the (agent, env, seed) runs in `done`.
+
+    `cells` are `(label, agent_class, agent_kwargs, env_class, env_kwargs)`; `label`
+    is the agent name written to the results. Agent classes are the scalar ones.
+    """
+    jobs = []
+    for label, agent_class, agent_kwargs, env_class, env_kwargs in cells:
+        todo = tuple(seed for seed in seeds if (label, env_class.__name__, seed) not in done)
+        if not todo:
+            continue
+        if not batched:
+            jobs.extend((env_class, env_kwargs, ((label, agent_class, agent_kwargs, (seed,)),)) for seed in todo)
+            continue
+        run = (label, agent_class, agent_kwargs, todo)
+        for j, (job_env, job_kwargs, runs) in enumerate(jobs):
+            if job_env is env_class and job_kwargs == env_kwargs:
+                jobs[j] = (job_env, job_kwargs, runs + (run,))
+                break
+        else:
+            jobs.append((env_class, env_kwargs, (run,)))
+    return jobs
+
+_WORKER = {}
+
+def _init_l6_worker(config: ExperimentConfig, arc_cfg: Dict[str, Any], batched: bool):
+    _WORKER["config"] = config
+    _WORKER["arc_cfg"] = arc_cfg
+    _WORKER["batched"] = batched
+
+def _run_l6_job(job):
+    env_class, env_kwargs, runs = job
+    config = _WORKER["config"]
+    cells = []
+    for _, agent_class, agent_kwargs, seeds in runs:
+        agent_kwargs = dict(agent_kwargs)
+        if issubclass(agent_class, ARCQLearningAgent):
+            # The agent adds its defaults to the dict it is given
+            agent_kwargs.setdefault("arc_config", dict(_WORKER["arc_cfg"]))
+        cells.append((agent_class, agent_kwargs, list(seeds)))
+    if _WORKER["batched"]:
+        per_cell = run_cells_batched([(BATCH_AGENTS[agent_class], agent_kwargs, seeds)
+                                      for agent_class, agent_kwargs, seeds in cells],
+                                     env_class, config, env_kwargs=env_kwargs)
+    else:
+        per_cell = [[r for seed in seeds
+                     for r in run_experiment(agent_class, env_class, config, seed,
+                                             agent_kwargs=agent_kwargs, env_kwargs=env_kwargs)]
+                    for agent_class, agent_kwargs, seeds in cells]
+    results = []
+    for (label, _, _, _), cell_results in zip(runs, per_cell):
+        for r in cell_results:
+            r["agent"] = label
+        results.extend(cell_results)
+    return job, results
+
+def run_jobs(jobs: List[tuple], config: ExperimentConfig, arc_cfg: Dict[str, Any],
+             batched: bool = False, workers: int = 1):
+    """Yield `(job, results)` in job order; `workers > 1` spreads the jobs over a process pool."""
+    if not jobs:
+        return
+    if workers <= 1:
+        _init_l6_worker(config, arc_cfg, batched)
+        try:
+            for job in jobs:
+                yield _run_l6_job(job)
+        finally:
+            _WORKER.clear()
+        return
+    with mp.Pool(processes=min(workers, len(jobs)), initializer=_init_l6_worker,
+                 initargs=(config, arc_cfg, batched)) as pool:
+        for result in pool.imap(_run_l6_job, jobs):
+            yield result
+
+def _parse_raw_row(row: Dict[str, str]) -> Dict[str, Any]:
+    out = {}
+    for k, v in row.items():
+        if not v:
+            continue  # Column not set for this episode
+        if k in ("agent", "env"):
+            out[k] = v
+        elif k == "reached_goal":
+            out[k] = v == "True"
+        elif k in _INT_FIELDS:
+            out[k] = int(v)
+        else:
+            out[k] = float(v)
+    return out
+
+def read_raw_results(path: str):
+    """Stream the typed episode rows of a raw_results.csv."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield _parse_raw_row(row)
+
+def _drop_partial_line(path: str):
+    # A run killed mid-write leaves a last line without its newline
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        tail = f.read()
+        if tail and not tail.endswith(b"\n"):
+            f.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+
+def completed_runs(path: str, n_episodes: int) -> set:
+    """
+    (agent, env, seed) runs with all `n_episodes` rows in raw_results.csv at `path`.
+
+    Rows of incomplete runs are removed from the file so that they can be rerun.
+    """
+    if not os.path.exists(path):
+        return set()
+    _drop_partial_line(path)
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        fields = csv.DictReader(f).fieldnames
+    if fields is None:
+        return set()
+    if fields != RAW_FIELDS:
+        raise ValueError(f"Cannot resume {path}: columns {fields} do not match {RAW_FIELDS}")
+    counts = Counter((r["agent"], r["env"], r["seed"]) for r in read_raw_results(path))
+    for key, n in counts.items():
+        if n > n_episodes:
+            raise ValueError(f"Cannot resume {path}: {key} has {n} episodes, expected {n_episodes}")
+    done = {key for key, n in counts.items() if n == n_episodes}
+    if len(done) < len(counts):
+        tmp = path + ".tmp"
+        with open(path, "r", newline="", encoding="utf-8") as src, \
+             open(tmp, "w", newline="", encoding="utf-8") as dst:
+            w = csv.DictWriter(dst, fieldnames=RAW_FIELDS)
+            w.writeheader()
+            w.writerows(row for row in csv.DictReader(src)
+                        if (row["agent"], row["env"], int(row["seed"])) in done)
+        os.replace(tmp, path)
+    return done
+
+def stream_jobs(jobs: List[tuple], raw_path: str, config: ExperimentConfig, arc_cfg: Dict[str, Any],
+                batched: bool = False, workers: int = 1, append: bool = False):
+    """
+    Run `jobs` and append their episode rows to `raw_path` as they finish.
+
+    Prints the tail reward of every finished run, plus jobs/s and an ETA. With
+    `append`, rows go after the ones already in the file (see `completed_runs`).
+    """
+    append = append and os.path.exists(raw_path) and os.path.getsize(raw_path) > 0
+    t0 = time.perf_counter()
+    with open(raw_path, "a" if append else "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=RAW_FIELDS)
+        if not append:
+            w.writeheader()
+        for n_done, (job, results) in enumerate(run_jobs(jobs, config, arc_cfg, batched, workers), 1):
+            w.writerows(results)
+            f.flush()
+            env_class, _, runs = job
+            for label, _, _, seeds in runs:
+                for seed in seeds:
+                    run = [r for r in results if r["agent"] == label and r["seed"] == seed]
+                    tail_mean = summarize_seed_run(run, tail_frac=0.2)
+                    print(f"  {env_class.__name__} + {label} seed {seed}: tail_mean_reward={tail_mean:.2f}")
+            rate = n_done / max(time.perf_counter() - t0, 1e-9)
+            print(f"  [{n_done}/{len(jobs)} jobs] {rate:.2f} jobs/s, ETA {(len(jobs) - n_done) / rate:.0f}s")
+
+
 def summarize_seed_run(results: List[Dict[str, Any]], tail_frac: float = 0.2) -> float:
     """Mean episodic reward over the last `tail_frac` of episodes."""
     if not results:
@@ -137,21 +525,19 @@ def summarize_seed_run(results: List[Dict[str, Any]], tail_frac: float = 0.2) ->
     tail = results[start:]
     return float(np.mean([r["total_reward"] for r in tail]))
 
-def aggregate_results(all_results: List[Dict], config: ExperimentConfig) -> Dict[str, Any]:
-    """Aggregate results across seeds for summary statistics."""
+def aggregate_results(all_results: Iterable[Dict], config: ExperimentConfig) -> Dict[str, Any]:
+    """Aggregate results across seeds for summary statistics (one pass over `all_results`)."""
     # Group by agent, env, episode
     from collections import defaultdict
-    grouped = defaultdict(list)
+    grouped = defaultdict(lambda: ([], []))
     
     for r in all_results:
-        key = (r["agent"], r["env"], r["episode"])
-        grouped[key].append(r)
+        rewards, successes = grouped[(r["agent"], r["env"], r["episode"])]
+        rewards.append(r["total_reward"])
+        successes.append(1.0 if r["reached_goal"] else 0.0)
     
     summary = []
-    for (agent, env, episode), group in grouped.items():
-        rewards = [r["total_reward"] for r in group]
-        successes = [1.0 if r["reached_goal"] else 0.0 for r in group]
-        
+    for (agent, env, episode), (rewards, successes) in grouped.items():
         summary.append({
             "agent": agent,
             "env": env,
@@ -159,13 +545,13 @@ def aggregate_results(all_results: List[Dict], config: ExperimentConfig) -> Dict
             "reward_mean": np.mean(rewards),
             "reward_std": np.std(rewards),
             "success_rate": np.mean(successes),
-            "n_seeds": len(group),
+            "n_seeds": len(rewards),
         })
     
     return summary
 
-def compute_final_metrics(all_results: List[Dict], config: ExperimentConfig) -> Dict[str, Dict]:
-    """Compute final comparison metrics between agents."""
+def compute_final_metrics(all_results: Iterable[Dict], config: ExperimentConfig) -> Dict[str, Dict]:
+    """Compute final comparison metrics between agents (one pass over `all_results`)."""
     from collections import defaultdict
     
     # Group by agent and env
@@ -198,15 +584,22 @@ def main():
     parser.add_argument("--episodes", type=int, default=200, help="Training episodes")
     parser.add_argument("--seeds", type=int, default=10, help="Number of seeds")
     parser.add_argument("--outdir", type=str, default="outputs_L6", help="Output directory")
+    parser.add_argument("--batched", action="store_true",
+                        help="Run all agents and seeds of an environment as one vectorized batch "
+                             "(fixed cost per environment, see the module docstring)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes (0 = all CPUs). Output does not depend on it.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep the complete runs in raw_results.csv and run only the missing ones")
     args = parser.parse_args()
     
     config = ExperimentConfig(n_episodes=args.episodes, n_seeds=args.seeds)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
     
     # Create output directory
     out_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), args.outdir)
     os.makedirs(out_dir, exist_ok=True)
-    
-    all_results = []
+    raw_path = os.path.join(out_dir, "raw_results.csv")
     
     # Experiment configurations
     experiments = [
@@ -220,41 +613,24 @@ def main():
         ("arc", ARCQLearningAgent, {}),
     ]
     
+    cells = [(agent_class.name, agent_class, agent_kwargs, env_class, env_kwargs)
+             for _, env_class, env_kwargs in experiments
+             for _, agent_class, agent_kwargs in agents]
+    done = completed_runs(raw_path, config.n_episodes) if args.resume else set()
+    jobs = plan_jobs(cells, list(range(config.n_seeds)), batched=args.batched, done=done)
+    
     print(f"Running L6 experiments: {config.n_episodes} episodes x {config.n_seeds} seeds")
+    if done:
+        print(f"Resuming: {len(done)} runs already in {raw_path}")
+    print(f"{len(jobs)} jobs, workers={workers}")
     print("=" * 60)
     
-    for env_name, env_class, env_kwargs in experiments:
-        for agent_name, agent_class, agent_kwargs in agents:
-            print(f"\n{env_name} + {agent_name}:")
-            
-            for seed in range(config.n_seeds):
-                results = run_experiment(
-                    agent_class, env_class, config, seed,
-                    agent_kwargs=agent_kwargs, env_kwargs=env_kwargs
-                )
-                all_results.extend(results)
-                tail_mean = summarize_seed_run(results, tail_frac=0.2)
-                print(f"  Seed {seed}: tail_mean_reward={tail_mean:.2f}")
-    
-    # Collect all possible keys from all results
-    all_keys = set()
-    for r in all_results:
-        all_keys.update(r.keys())
-    all_keys = sorted(all_keys)
-    
-    # Save raw results with consistent columns
-    raw_path = os.path.join(out_dir, "raw_results.csv")
-    with open(raw_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=all_keys, extrasaction='ignore')
-        w.writeheader()
-        for r in all_results:
-            # Fill missing keys with None
-            row = {k: r.get(k, None) for k in all_keys}
-            w.writerow(row)
+    stream_jobs(jobs, raw_path, config, load_arc_config(), batched=args.batched, workers=workers,
+                append=args.resume)
     print(f"\nWrote raw results: {raw_path}")
     
     # Save aggregated summary
-    summary = aggregate_results(all_results, config)
+    summary = aggregate_results(read_raw_results(raw_path), config)
     summary_path = os.path.join(out_dir, "summary.csv")
     with open(summary_path, "w", newline="", encoding="utf-8") as f:
         if summary:
@@ -264,7 +640,7 @@ def main():
     print(f"Wrote summary: {summary_path}")
     
     # Print final comparison
-    final = compute_final_metrics(all_results, config)
+    final = compute_final_metrics(read_raw_results(raw_path), config)
     print("\n" + "=" * 60)
     print("FINAL COMPARISON (last 20% of episodes)")
     print("=" * 60)
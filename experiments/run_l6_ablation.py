@@ -1,6 +1,9 @@
 """
 L6 Ablation Experiment Runner
 Tests the contribution of Memory Gating vs Shift Detection in ChangingGoalGridWorld.
+
+Uses the parallel runner of run_l6 (`--workers`, `--resume`); per-episode rows
+stream to raw_results.csv in the output directory.
 """
 
 import os
@@ -15,18 +18,29 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from envs.gridworld import ChangingGoalGridWorld
 from agents.q_learning import QLearningAgent, ARCQLearningAgent, QLearningConfig
-from experiments.run_l6 import ExperimentConfig, run_experiment, compute_final_metrics
+from experiments.run_l6 import (
+    ExperimentConfig, compute_final_metrics, load_arc_config, plan_jobs, stream_jobs, completed_runs, read_raw_results,
+)
 
 def main():
     parser = argparse.ArgumentParser(description="L6 Ablation Study")
     parser.add_argument("--episodes", type=int, default=200)
     parser.add_argument("--seeds", type=int, default=20)
     parser.add_argument("--outdir", type=str, default="outputs_L6_ablation")
+    parser.add_argument("--batched", action="store_true",
+                        help="Run all agents and seeds as one vectorized batch "
+                             "(fixed cost, see experiments/run_l6.py)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes (0 = all CPUs). Output does not depend on it.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep the complete runs in raw_results.csv and run only the missing ones")
     args = parser.parse_args()
     
     config = ExperimentConfig(n_episodes=args.episodes, n_seeds=args.seeds)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
     out_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), args.outdir)
     os.makedirs(out_dir, exist_ok=True)
+    raw_path = os.path.join(out_dir, "raw_results.csv")
     
     # Environment: The non-stationary one where these mechanisms matter
     env_class = ChangingGoalGridWorld
@@ -40,25 +54,23 @@ def main():
         ("arc_no_gating", ARCQLearningAgent, {"use_shift_detection": True, "use_mem_gating": False}),
     ]
     
-    all_results = []
+    # Agent names in the results are the ablation labels
+    cells = [(agent_name, agent_class, agent_kwargs, env_class, env_kwargs)
+             for agent_name, agent_class, agent_kwargs in agent_configs]
+    done = completed_runs(raw_path, config.n_episodes) if args.resume else set()
+    jobs = plan_jobs(cells, list(range(config.n_seeds)), batched=args.batched, done=done)
     
     print(f"Running L6 Ablation: {config.n_episodes} episodes x {config.n_seeds} seeds")
+    if done:
+        print(f"Resuming: {len(done)} runs already in {raw_path}")
+    print(f"{len(jobs)} jobs, workers={workers}")
     print("=" * 60)
     
-    for agent_name, agent_class, agent_kwargs in agent_configs:
-        print(f"\nEvaluating {agent_name}...")
-        for seed in range(config.n_seeds):
-            results = run_experiment(
-                agent_class, env_class, config, seed,
-                agent_kwargs=agent_kwargs, env_kwargs=env_kwargs
-            )
-            # Override agent name in results for logging
-            for r in results:
-                r["agent"] = agent_name
-            all_results.extend(results)
+    stream_jobs(jobs, raw_path, config, load_arc_config(), batched=args.batched, workers=workers,
+                append=args.resume)
             
     # Compute and save final metrics
-    final = compute_final_metrics(all_results, config)
+    final = compute_final_metrics(read_raw_results(raw_path), config)
     
     final_path = os.path.join(out_dir, "ablation_metrics.csv")
     with open(final_path, "w", newline="", encoding="utf-8") as f:
@@ -0,0 +1,174 @@
+"""
+Columnar trace store: one NPZ file per sweep.
+
+Layout of ``traces.npz``:
+- ``data``:       float32 ``(n_runs, horizon, n_channels)``
+- ``channels``:   channel names (last axis of ``data``)
+- ``scenario``, ``controller``, ``seed``: one entry per run (first axis)
+
+Channels are the exogenous inputs, the 10 ASSB state variables, the derived
+readouts and the five control channels (``u_ctrl`` at step t is the action that
+produced the state at step t). ``data`` is streamed to disk chunk by chunk, so
+the writer never holds the whole sweep in memory. Written uncompressed (the
+default) it can be memory-mapped: loading a run or a seed slice then reads only
+those bytes.
+
+Usage:
+    store = TraceStore("outputs/traces.npz")
+    run = store.run("reward_flip", "arc_v1", seed=3)         # {"perf": (H,), ...}
+    sl = store.select("reward_flip", "arc_v1", seeds=[1, 2])  # {"perf": (2, H), ...}
+"""
+
+import zipfile
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+
+from sim.batch import STATE_FIELDS, CONTROL_FIELDS, controls_to_array
+
+EXOG_CHANNELS = ("pe", "reward", "u_exog")
+DERIVED_CHANNELS = ("ccog", "cap", "perf")
+CHANNELS = EXOG_CHANNELS + STATE_FIELDS + DERIVED_CHANNELS + CONTROL_FIELDS
+
+_DTYPE = np.dtype("<f4")
+
+
+def trace_to_array(trace: Dict[str, Any]) -> np.ndarray:
+    """Pack a `run_one`-style trace dict into a float32 ``(horizon, len(CHANNELS))`` array."""
+    n_ctrl = len(CONTROL_FIELDS)
+    cols = [np.asarray(trace[ch], dtype=np.float64) for ch in CHANNELS[:-n_ctrl]]
+    out = np.empty((len(cols[0]), len(CHANNELS)), dtype=_DTYPE)
+    out[:, :-n_ctrl] = np.stack(cols, axis=1)
+    out[:, -n_ctrl:] = controls_to_array(trace["control"])
+    return out
+
+
+class TraceStoreWriter:
+    """
+    Streams runs into a ``traces.npz``. The total shape must be known up front
+    (``n_runs`` x ``horizon``); runs are appended in the order they should be stored.
+    """
+
+    def __init__(self, path: str, n_runs: int, horizon: int, compress: bool = False):
+        self.path = path
+        self.n_runs = n_runs
+        self.horizon = horizon
+        self._scenario: List[str] = []
+        self._controller: List[str] = []
+        self._seed: List[int] = []
+        mode = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self._zf = zipfile.ZipFile(path, "w", compression=mode, allowZip64=True)
+        self._fh = self._zf.open("data.npy", "w", force_zip64=True)
+        header = {"descr": _DTYPE.str, "fortran_order": False, "shape": (n_runs, horizon, len(CHANNELS))}
+        np.lib.format.write_array_header_1_0(self._fh, header)
+
+    def append(self, scenario: str, controller: str, seeds: Sequence[int], block: np.ndarray) -> None:
+        """Append ``block`` of shape ``(len(seeds), horizon, len(CHANNELS))``."""
+        if block.shape != (len(seeds), self.horizon, len(CHANNELS)):
+            raise ValueError(f"Trace block shape {block.shape} does not match "
+                             f"({len(seeds)}, {self.horizon}, {len(CHANNELS)})")
+        if len(self._seed) + len(seeds) > self.n_runs:
+            raise ValueError(f"More runs than declared (n_runs={self.n_runs})")
+        self._fh.write(np.ascontiguousarray(block, dtype=_DTYPE).tobytes())
+        self._scenario.extend([scenario] * len(seeds))
+        self._controller.extend([controller] * len(seeds))
+        self._seed.extend(int(s) for s in seeds)
+
+    def close(self) -> None:
+        if len(self._seed) != self.n_runs:
+            raise ValueError(f"Trace store got {len(self._seed)} runs, expected {self.n_runs}")
+        self._fh.close()
+        for name, arr in (("channels", np.array(CHANNELS)),
+                          ("scenario", np.array(self._scenario)),
+                          ("controller", np.array(self._controller)),
+                          ("seed", np.array(self._seed, dtype=np.int64))):
+            with self._zf.open(f"{name}.npy", "w") as fh:
+                np.lib.format.write_array(fh, arr, allow_pickle=False)
+        self._zf.close()
+
+    def __enter__(self) -> "TraceStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._fh.close()
+            self._zf.close()
+
+
+def _mmap_member(path: str, zf: zipfile.ZipFile, name: str) -> Optional[np.ndarray]:
+    """Memory-map an uncompressed ``.npy`` member of a zip file (None if it is compressed)."""
+    info = zf.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        local = f.read(30)
+        name_len = int.from_bytes(local[26:28], "little")
+        extra_len = int.from_bytes(local[28:30], "little")
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset,
+                     order="F" if fortran else "C")
+
+
+class TraceStore:
+    """Read-only view of a ``traces.npz`` written by `TraceStoreWriter`."""
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        with zipfile.ZipFile(path) as zf:
+            data = _mmap_member(path, zf, "data.npy") if mmap else None
+        with np.load(path, allow_pickle=False) as npz:
+            self.data = data if data is not None else npz["data"]
+            self.channels: Tuple[str, ...] = tuple(npz["channels"].tolist())
+            self.scenario = npz["scenario"]
+            self.controller = npz["controller"]
+            self.seed = npz["seed"]
+        self._channel_index = {ch: j for j, ch in enumerate(self.channels)}
+        self._run_index = {(sc, ct, int(sd)): k for k, (sc, ct, sd) in
+                           enumerate(zip(self.scenario.tolist(), self.controller.tolist(), self.seed.tolist()))}
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def horizon(self) -> int:
+        return self.data.shape[1]
+
+    def index(self, scenario: str, controller: str, seed: int) -> int:
+        try:
+            return self._run_index[(scenario, controller, int(seed))]
+        except KeyError:
+            raise KeyError(f"No run for scenario={scenario!r}, controller={controller!r}, seed={seed}") from None
+
+    def channel(self, name: str) -> int:
+        return self._channel_index[name]
+
+    def run(self, scenario: str, controller: str, seed: int) -> Dict[str, np.ndarray]:
+        """Channels of a single run, each a ``(horizon,)`` array."""
+        block = np.asarray(self.data[self.index(scenario, controller, seed)])
+        return {ch: block[:, j] for ch, j in self._channel_index.items()}
+
+    def select(self, scenario: str, controller: str,
+               seeds: Optional[Sequence[int]] = None) -> Dict[str, np.ndarray]:
+        """
+        Channels for several seeds of one (scenario, controller), each ``(n_seeds, horizon)``.
+        ``seeds=None`` takes every stored seed in stored order; the result also
+        carries the matching ``"seed"`` array.
+        """
+        if seeds is None:
+            rows = np.flatnonzero((self.scenario == scenario) & (self.controller == controller))
+            if rows.size == 0:
+                raise KeyError(f"No runs for scenario={scenario!r}, controller={controller!r}")
+        else:
+            rows = np.array([self.index(scenario, controller, s) for s in seeds], dtype=np.int64)
+        block = np.asarray(self.data[rows])
+        out = {ch: block[:, :, j] for ch, j in self._channel_index.items()}
+        out["seed"] = self.seed[rows]
+        return out
@@ -0,0 +1,66 @@
+"""
+Check metrics.batch.compute_metrics_batch against the scalar metrics.compute_metrics.
+
+Simulates every scenario x controller for the config's sweep seeds (or
+`--seeds`) with the scalar runner, then compares each metric of the batched
+version for exact equality.
+Mismatches are listed with their distance in ulps.
+
+Usage:
+  python experiments/verify_batch_metrics.py --config configs/v2.yaml [--seeds 1 2 3]
+"""
+
+import os
+import sys
+import argparse
+import yaml
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim.params import DynamicsParams
+from sim.batch import controls_to_array
+from tasks.scenarios import build_scenarios
+from metrics.batch import compute_metrics_batch, unstack_metrics
+from experiments.run import run_one, SWEEP_CONTROLLERS
+
+
+def _ulps(x: float, y: float) -> int:
+    a, b = np.array([x, y], dtype=np.float64).view(np.int64)
+    return abs(int(a) - int(b))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="configs/v2.yaml")
+    ap.add_argument("--seeds", nargs="+", type=int, default=None,
+                    help="Seeds to check (default: the config's sweep seeds)")
+    args = ap.parse_args()
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    params = DynamicsParams.from_config(cfg)
+    if args.seeds is None:
+        args.seeds = list(cfg["seeds"])
+
+    n_checked, mismatches = 0, []
+    for sc in build_scenarios(cfg):
+        for ctrl_cls in SWEEP_CONTROLLERS:
+            results = [run_one(ctrl_cls(), sc, seed, params) for seed in args.seeds]
+            arr = lambda k: np.array([tr[k] for tr, _ in results])
+            control = np.stack([controls_to_array(tr["control"]) for tr, _ in results])
+            batch = unstack_metrics(compute_metrics_batch(arr("perf"), arr("a"), arr("s"), sc.shock_t, params,
+                                                          mf=arr("mf"), control=control))
+            for seed, (_, ref), got in zip(args.seeds, results, batch):
+                n_checked += 1
+                for k, v in ref.items():
+                    if got[k] != v:
+                        mismatches.append((sc.name, ctrl_cls.name, seed, k, v, got[k]))
+
+    for sc_name, ctrl_name, seed, k, v, g in mismatches:
+        print(f"MISMATCH {sc_name}/{ctrl_name}/seed{seed} {k}: scalar={v!r} batch={g!r} ({_ulps(v, g)} ulp)")
+    print(f"{n_checked} runs checked, {len(mismatches)} metric mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
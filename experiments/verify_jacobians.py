@@ -0,0 +1,80 @@
+"""
+Check sim.linearize against forward differences of the batched ASSB step.
+
+Samples random operating points (states, controls and exogenous inputs,
+including saturated and above-threshold regions), perturbs each input column
+by +eps and compares the resulting difference quotients with the analytic
+A, B and E blocks. Points whose perturbation crosses a breakpoint (clip01,
+max(0, .), abs) legitimately disagree, so the exit status only fails if more
+than 0.1% of the points exceed --tol.
+
+Usage:
+  python experiments/verify_jacobians.py --config configs/v2.yaml --points 2000
+"""
+
+import os
+import sys
+import argparse
+import yaml
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim.params import DynamicsParams
+from sim.batch import step_dynamics_batch, STATE_FIELDS, CONTROL_FIELDS
+from sim.linearize import linearize_batch, EXOG_FIELDS
+
+
+def _finite_differences(x, pe, r, u_exog, control, params, eps):
+    base = step_dynamics_batch(x, pe, r, u_exog, control, params)
+    A = np.empty(x.shape + (x.shape[1],))
+    B = np.empty(x.shape + (control.shape[1],))
+    E = np.empty(x.shape + (3,))
+    for j in range(x.shape[1]):
+        xp = x.copy()
+        xp[:, j] += eps
+        A[:, :, j] = (step_dynamics_batch(xp, pe, r, u_exog, control, params) - base) / eps
+    for j in range(control.shape[1]):
+        cp = control.copy()
+        cp[:, j] += eps
+        B[:, :, j] = (step_dynamics_batch(x, pe, r, u_exog, cp, params) - base) / eps
+    E[:, :, 0] = (step_dynamics_batch(x, pe + eps, r, u_exog, control, params) - base) / eps
+    E[:, :, 1] = (step_dynamics_batch(x, pe, r + eps, u_exog, control, params) - base) / eps
+    E[:, :, 2] = (step_dynamics_batch(x, pe, r, u_exog + eps, control, params) - base) / eps
+    return A, B, E
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="configs/v2.yaml")
+    ap.add_argument("--points", type=int, default=2000)
+    ap.add_argument("--eps", type=float, default=1e-7)
+    ap.add_argument("--tol", type=float, default=1e-5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    with open(args.config, "r", encoding="utf-8") as f:
+        params = DynamicsParams.from_config(yaml.safe_load(f))
+
+    rng = np.random.default_rng(args.seed)
+    n = args.points
+    x = rng.uniform(-0.05, 1.05, (n, len(STATE_FIELDS))).clip(0.0, 1.0)
+    control = rng.random((n, len(CONTROL_FIELDS)))
+    pe, r, u_exog = rng.random(n), rng.uniform(-1.0, 1.0, n), rng.uniform(0.0, 1.2, n)
+
+    analytic = linearize_batch(x, pe, r, u_exog, control, params)
+    numeric = _finite_differences(x, pe, r, u_exog, control, params, args.eps)
+
+    worst = 0.0
+    for name, cols, an, nu in zip("ABE", (STATE_FIELDS, CONTROL_FIELDS, EXOG_FIELDS), analytic, numeric):
+        err = np.abs(an - nu)
+        bad = (err > args.tol).any(axis=(1, 2))
+        print(f"{name}: max |analytic - fd| = {err.max():.2e} (points over tol: {bad.sum()}/{n})")
+        if bad.any():
+            k, row, j = np.unravel_index(np.argmax(err), err.shape)
+            print(f"   worst: point {k}, d {STATE_FIELDS[row]} / d {cols[j]}: {an[k, row, j]:.6g} vs {nu[k, row, j]:.6g}")
+        worst = max(worst, float(np.quantile(err.max(axis=(1, 2)), 0.999)))
+    sys.exit(0 if worst <= args.tol else 1)
+
+
+if __name__ == "__main__":
+    main()
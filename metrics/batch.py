@@ -0,0 +1,187 @@
+"""
+Versión vectorizada de `metrics.metrics.compute_metrics`.
+
+Recibe matrices `(n_runs, horizon)` (una fila por corrida) y calcula todas las
+métricas de todas las corridas a la vez. Cada métrica replica la función
+escalar término a término:
+- las sumas de Python (`sum(...)`, acumulación secuencial) se reproducen con
+  `np.cumsum` sobre el eje temporal, no con `np.sum` (que suma por pares);
+- las rachas de rumiación se cuentan por inicios de racha (run-length);
+- los "primer t que cumple" se resuelven con `argmax` sobre máscaras.
+
+Las desviaciones al cuadrado usan `np.float_power(d, 2.0)`, que llama a `pow()`
+de la libm como `(x - m)**2` en Python; `d * d` y `np.power` (que convierte el
+exponente 2 en un cuadrado) difieren en el último ulp para algunos valores.
+
+Con entradas float64 el resultado es idéntico bit a bit a la versión escalar,
+salvo desde Python 3.12, donde `sum()` de floats es compensada y puede
+diferir en el último ulp.
+Verificación: `experiments/verify_batch_metrics.py`.
+"""
+
+from typing import Dict, Any, Optional
+import numpy as np
+
+from sim.batch import U_DMG, U_ATT, U_MEM, U_CALM, U_REAPP
+
+
+def _seqsum(x: np.ndarray) -> np.ndarray:
+    """Suma secuencial por fila (como `sum()` de Python). Filas vacías -> 0.0."""
+    if x.shape[1] == 0:
+        return np.zeros(x.shape[0])
+    return np.cumsum(x, axis=1)[:, -1]
+
+
+def _square(d: np.ndarray) -> np.ndarray:
+    """`d**2` elemento a elemento con la misma `pow()` que el `**2` escalar."""
+    return np.float_power(d, 2.0)
+
+
+def _first_true(mask: np.ndarray):
+    """(índice del primer True por fila, fila tiene algún True)."""
+    if mask.shape[1] == 0:
+        return np.zeros(mask.shape[0], dtype=np.int64), np.zeros(mask.shape[0], dtype=bool)
+    return mask.argmax(axis=1), mask.any(axis=1)
+
+
+def control_effort_batch(control: np.ndarray) -> np.ndarray:
+    """control: `(n_runs, horizon, 5)` en orden `CONTROL_FIELDS`."""
+    n_runs, horizon = control.shape[:2]
+    if horizon == 0:
+        return np.zeros(n_runs)
+    step = (np.abs(control[:, :, U_DMG]) + np.abs(control[:, :, U_ATT]) + np.abs(control[:, :, U_CALM])
+            + np.abs(control[:, :, U_REAPP]) + np.abs(1.0 - control[:, :, U_MEM]))
+    return _seqsum(step) / horizon
+
+
+def recovery_time_batch(perf: np.ndarray, a: np.ndarray, shock_t: int, cfg: Dict[str, Any]) -> np.ndarray:
+    w = cfg["baseline_window"]
+    horizon = perf.shape[1]
+    rt_max = cfg.get("rt_max", horizon - shock_t)
+
+    pre_start = max(0, shock_t - w)
+    baseline = _seqsum(perf[:, pre_start:shock_t]) / max(1, (shock_t - pre_start))
+
+    target_low = np.maximum(0.0, baseline - cfg["rt_eps"])[:, None]
+    target_high = np.minimum(1.0, baseline + cfg["rt_eps"])[:, None]
+    post_perf = perf[:, shock_t:]
+    ok = (target_low <= post_perf) & (post_perf <= target_high) & (a[:, shock_t:] <= cfg["a_safe"] + cfg["rt_a_eps"])
+    first, found = _first_true(ok)
+
+    rt = np.where(found, first, rt_max).astype(np.float64)
+    rt[baseline < 0.20] = rt_max
+    return rt
+
+
+def rt_normalized_batch(rt: np.ndarray, cfg: Dict[str, Any]) -> np.ndarray:
+    return np.minimum(1.0, rt / cfg.get("rt_max", 100))
+
+
+def overshoot_batch(a: np.ndarray, cfg: Dict[str, Any]) -> np.ndarray:
+    return np.maximum(0.0, a.max(axis=1) - cfg["a_safe"])
+
+
+def rumination_index_batch(s: np.ndarray, cfg: Dict[str, Any]) -> np.ndarray:
+    horizon = s.shape[1]
+    above = s > cfg["s_rum_tau"]
+    n_above = above.sum(axis=1)
+    # Inicio de racha: por encima en t y no en t-1
+    starts = above.copy()
+    starts[:, 1:] &= ~above[:, :-1]
+    n_runs = starts.sum(axis=1)
+    frac = n_above / max(1, horizon)
+    persistence = np.where(n_runs > 0, (n_above / np.maximum(1, n_runs)) / max(1, horizon), 0.0)
+    return frac + cfg["ri_persistence_weight"] * persistence
+
+
+def stability_post_shock_batch(perf: np.ndarray, shock_t: int) -> np.ndarray:
+    post = perf[:, shock_t:]
+    n = post.shape[1]
+    if n < 2:
+        return np.zeros(perf.shape[0])
+    m = _seqsum(post) / n
+    return np.sqrt(_seqsum(_square(post - m[:, None])) / n)
+
+
+def narrative_dominance_ratio_batch(s: np.ndarray, perf: np.ndarray, shock_t: int,
+                                    cfg: Dict[str, Any]) -> np.ndarray:
+    s_safe = cfg.get("s_safe", 0.55)
+    post_s = s[:, shock_t:]
+    post_perf = perf[:, shock_t:]
+    n = post_s.shape[1]
+    if n < 2:
+        return np.zeros(s.shape[0])
+    s_high = post_s[:, 1:] > s_safe
+    perf_improving = post_perf[:, 1:] > post_perf[:, :-1] + 0.01
+    return (s_high & ~perf_improving).sum(axis=1) / max(1, n - 1)
+
+
+def retention_index_batch(perf: np.ndarray, phase1_end: int = 50, phase3_start: int = 100) -> np.ndarray:
+    if perf.shape[1] < phase3_start + 10:
+        return np.zeros(perf.shape[0])
+    phase1_perf = _seqsum(perf[:, 10:phase1_end]) / max(1, phase1_end - 10)
+    phase3_perf = _seqsum(perf[:, phase3_start:phase3_start + 50]) / 50
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.minimum(1.0, phase3_perf / phase1_perf)
+    return np.where(phase1_perf < 0.1, 0.0, ratio)
+
+
+def adaptation_speed_batch(perf: np.ndarray, phase2_start: int = 50, window: int = 20) -> np.ndarray:
+    phase2 = perf[:, phase2_start:]
+    n = phase2.shape[1]
+    if n < window:
+        return np.full(perf.shape[0], float(n))
+    target = 0.8 * phase2[:, :50].max(axis=1)
+    first, found = _first_true(phase2 >= target[:, None])
+    return np.where(found, first, n).astype(np.float64)
+
+
+def memory_stability_batch(mf: np.ndarray) -> np.ndarray:
+    n = mf.shape[1]
+    if n < 2:
+        return np.ones(mf.shape[0])
+    m = _seqsum(mf) / n
+    var = _seqsum(_square(mf - m[:, None])) / n
+    return np.maximum(0.0, 1.0 - var * 10)
+
+
+def compute_metrics_batch(perf: np.ndarray, a: np.ndarray, s: np.ndarray, shock_t: int, cfg: Dict[str, Any],
+                          mf: Optional[np.ndarray] = None, control: Optional[np.ndarray] = None
+                          ) -> Dict[str, np.ndarray]:
+    """
+    `compute_metrics` para `n_runs` corridas a la vez.
+
+    perf, a, s, mf: `(n_runs, horizon)`; control: `(n_runs, horizon, 5)`.
+    Retorna un array `(n_runs,)` por métrica (mismas claves que la versión escalar).
+    """
+    n_runs, horizon = perf.shape
+    if mf is None:
+        mf = np.zeros_like(perf)
+
+    mean_perf = _seqsum(perf) / max(1, horizon)
+    v = _seqsum(_square(perf - mean_perf[:, None])) / max(1, horizon)
+
+    rt = recovery_time_batch(perf, a, shock_t, cfg)
+
+    return {
+        "RT": rt,
+        "RT_norm": rt_normalized_batch(rt, cfg),
+        "Overshoot": overshoot_batch(a, cfg),
+        "RI": rumination_index_batch(s, cfg),
+        "NDR": narrative_dominance_ratio_batch(s, perf, shock_t, cfg),
+        "ControlEffort": control_effort_batch(control) if control is not None else np.zeros(n_runs),
+        "PerfMean": mean_perf,
+        "PerfStd": np.sqrt(v),
+        "StabilityPost": stability_post_shock_batch(perf, shock_t),
+        # L2 metrics
+        "Retention": retention_index_batch(perf),
+        "AdaptSpeed": adaptation_speed_batch(perf),
+        "MemStability": memory_stability_batch(mf),
+    }
+
+
+def unstack_metrics(batch: Dict[str, np.ndarray]) -> list:
+    """Dict de arrays `(n_runs,)` -> lista de dicts de floats (formato de `compute_metrics`)."""
+    keys = list(batch.keys())
+    cols = [batch[k].tolist() for k in keys]
+    return [dict(zip(keys, map(float, row))) for row in zip(*cols)]
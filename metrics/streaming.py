@@ -0,0 +1,202 @@
+"""
+Acumuladores online de las métricas de `metrics.metrics.compute_metrics`.
+
+`StreamingMetrics.update(...)` se llama una vez por step con los valores del
+step (los mismos que `run_one` guarda en la traza) y `result()` devuelve el
+mismo dict que `compute_metrics`, sin guardar la traza: memoria O(1) en el
+horizonte (el único buffer es la ventana fija de 50 steps de AdaptSpeed).
+
+Equivalencias con la versión escalar:
+- PerfMean, RT, Overshoot, RI, NDR, ControlEffort, Retention y AdaptSpeed
+  usan las mismas sumas secuenciales/comparaciones -> idénticos.
+- PerfStd, StabilityPost y MemStability usan Welford (una pasada) en vez de
+  media + suma de cuadrados (dos pasadas) -> iguales salvo redondeo (~1e-15).
+"""
+
+import math
+from collections import deque
+from typing import Dict, Any
+
+
+class Welford:
+    """Media y varianza poblacional online."""
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x: float) -> None:
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    @property
+    def var(self) -> float:
+        return self.m2 / self.n if self.n else 0.0
+
+
+class StreamingMetrics:
+    """
+    Métricas de una corrida, actualizadas step a step.
+
+    Parámetros de fase iguales a los defaults de `retention_index`
+    (phase1_end=50, phase3_start=100) y `adaptation_speed` (phase2_start=50, window=20).
+    """
+
+    PHASE1_END = 50
+    PHASE2_START = 50
+    PHASE3_START = 100
+    ADAPT_WINDOW = 20
+    ADAPT_MAX_SPAN = 50
+
+    def __init__(self, shock_t: int, cfg: Dict[str, Any]):
+        self.shock_t = shock_t
+        self.a_safe = cfg["a_safe"]
+        self.s_safe = cfg.get("s_safe", 0.55)
+        self.s_rum_tau = cfg["s_rum_tau"]
+        self.ri_w = cfg["ri_persistence_weight"]
+        self.rt_eps = cfg["rt_eps"]
+        self.rt_a_eps = cfg["rt_a_eps"]
+        self.rt_max_cfg = cfg.get("rt_max")
+        self.rt_norm_max = cfg.get("rt_max", 100)
+        self.pre_start = max(0, shock_t - cfg["baseline_window"])
+
+        self.t = 0
+        # PerfMean / PerfStd
+        self.perf_sum = 0.0
+        self.perf_stats = Welford()
+        # RT
+        self.baseline_sum = 0.0
+        self.baseline = None
+        self.target_low = self.target_high = None
+        self.rt = None
+        # Overshoot
+        self.a_max = -math.inf
+        # RI
+        self.n_above = 0
+        self.n_runs = 0
+        self.prev_above = False
+        # NDR / StabilityPost
+        self.prev_perf = None
+        self.ndr_count = 0
+        self.post_stats = Welford()
+        # ControlEffort
+        self.effort_sum = 0.0
+        self.n_control = 0
+        # Retention
+        self.phase1_sum = 0.0
+        self.phase3_sum = 0.0
+        # AdaptSpeed: ventana phase2[:50] hasta conocer el máximo, luego búsqueda online
+        self.adapt_buf = deque(maxlen=self.ADAPT_MAX_SPAN)
+        self.adapt_target = None
+        self.adapt_first = None
+        # MemStability
+        self.mf_stats = Welford()
+
+    def update(self, perf: float, a: float, s: float, mf: float = 0.0, control: Dict[str, float] = None) -> None:
+        t = self.t
+        self.perf_sum += perf
+        self.perf_stats.update(perf)
+
+        # RT: baseline pre-shock, luego primer step que vuelve a la banda con arousal bajo
+        if self.pre_start <= t < self.shock_t:
+            self.baseline_sum += perf
+        if t == self.shock_t:
+            baseline = self.baseline_sum / max(1, (self.shock_t - self.pre_start))
+            self.baseline = baseline
+            self.target_low = max(0.0, baseline - self.rt_eps)
+            self.target_high = min(1.0, baseline + self.rt_eps)
+        if t >= self.shock_t and self.rt is None:
+            if self.target_low <= perf <= self.target_high and a <= self.a_safe + self.rt_a_eps:
+                self.rt = t - self.shock_t
+
+        if a > self.a_max:
+            self.a_max = a
+
+        above = s > self.s_rum_tau
+        if above:
+            self.n_above += 1
+            if not self.prev_above:
+                self.n_runs += 1
+        self.prev_above = above
+
+        if t >= self.shock_t:
+            if t > self.shock_t and s > self.s_safe and not (perf > self.prev_perf + 0.01):
+                self.ndr_count += 1
+            self.post_stats.update(perf)
+        self.prev_perf = perf
+
+        if isinstance(control, dict):
+            self.effort_sum += (abs(float(control.get("u_dmg", 0.0))) + abs(float(control.get("u_att", 0.0)))
+                                + abs(float(control.get("u_calm", 0.0))) + abs(float(control.get("u_reapp", 0.0)))
+                                + abs(1.0 - float(control.get("u_mem", 1.0))))
+            self.n_control += 1
+
+        if 10 <= t < self.PHASE1_END:
+            self.phase1_sum += perf
+        if self.PHASE3_START <= t < self.PHASE3_START + 50:
+            self.phase3_sum += perf
+
+        if t >= self.PHASE2_START and self.adapt_first is None:
+            if self.adapt_target is None:
+                self.adapt_buf.append(perf)
+                if len(self.adapt_buf) == self.ADAPT_MAX_SPAN:
+                    self._resolve_adapt_target()
+            elif perf >= self.adapt_target:
+                self.adapt_first = t - self.PHASE2_START
+
+        self.mf_stats.update(mf)
+        self.t += 1
+
+    def _resolve_adapt_target(self) -> None:
+        self.adapt_target = 0.8 * max(self.adapt_buf)
+        for i, p in enumerate(self.adapt_buf):
+            if p >= self.adapt_target:
+                self.adapt_first = i
+                break
+        self.adapt_buf.clear()
+
+    def result(self) -> Dict[str, float]:
+        n = self.t
+        rt_max = self.rt_max_cfg if self.rt_max_cfg is not None else n - self.shock_t
+        if self.shock_t >= n or self.baseline < 0.20 or self.rt is None:
+            rt = rt_max
+        else:
+            rt = self.rt
+
+        ri_persistence = (self.n_above / max(1, self.n_runs)) / max(1, n) if self.n_runs else 0.0
+        n_post = max(0, n - self.shock_t)
+
+        retention = 0.0
+        if n >= self.PHASE3_START + 10:
+            phase1_perf = self.phase1_sum / max(1, self.PHASE1_END - 10)
+            phase3_perf = self.phase3_sum / 50
+            if phase1_perf >= 0.1:
+                retention = min(1.0, phase3_perf / phase1_perf)
+
+        n_phase2 = max(0, n - self.PHASE2_START)
+        if n_phase2 < self.ADAPT_WINDOW:
+            adapt = float(n_phase2)
+        else:
+            if self.adapt_target is None and self.adapt_first is None:
+                self._resolve_adapt_target()
+            adapt = float(self.adapt_first) if self.adapt_first is not None else float(n_phase2)
+
+        return {
+            "RT": float(rt),
+            "RT_norm": float(min(1.0, rt / self.rt_norm_max)),
+            "Overshoot": float(max(0.0, self.a_max - self.a_safe)),
+            "RI": float(self.n_above / max(1, n) + self.ri_w * ri_persistence),
+            "NDR": float(self.ndr_count / max(1, n_post - 1)) if n_post >= 2 else 0.0,
+            "ControlEffort": float(self.effort_sum / max(1, self.n_control)),
+            "PerfMean": float(self.perf_sum / max(1, n)),
+            "PerfStd": float(math.sqrt(self.perf_stats.var)),
+            "StabilityPost": float(math.sqrt(self.post_stats.var)) if n_post >= 2 else 0.0,
+            # L2 metrics
+            "Retention": float(retention),
+            "AdaptSpeed": adapt,
+            "MemStability": float(max(0.0, 1.0 - self.mf_stats.var * 10)) if n >= 2 else 1.0,
+        }
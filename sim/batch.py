@@ -0,0 +1,129 @@
+"""
+Batched (structure-of-arrays) ASSB engine.
+
+Holds N trajectories as one contiguous ``(N, 10)`` float64 array whose columns
+follow ``STATE_FIELDS`` and advances them all at once. Every expression mirrors
+``sim.dynamics.step_dynamics`` term by term (same operand order, same clipping),
+so a batch row is bit-identical to the scalar path for the same inputs.
+"""
+
+from typing import Dict, Any, List, Sequence, Union
+import numpy as np
+
+from .state import State
+from .params import DynamicsParams, coefficients
+
+STATE_FIELDS = ("phi", "g", "p", "i", "s", "v", "a", "mf", "ms", "u")
+CONTROL_FIELDS = ("u_dmg", "u_att", "u_mem", "u_calm", "u_reapp")
+CONTROL_DEFAULTS = (0.0, 0.0, 1.0, 0.0, 0.0)
+
+PHI, G, P, I, S, V, A, MF, MS, U = range(len(STATE_FIELDS))
+U_DMG, U_ATT, U_MEM, U_CALM, U_REAPP = range(len(CONTROL_FIELDS))
+
+
+def init_batch(cfg: Dict[str, Any], n: int) -> np.ndarray:
+    """Initial state for N trajectories (same values as ``experiments.run.init_state``)."""
+    row = [cfg["phi0"], cfg["g0"], cfg["p0"], cfg["i0"], cfg["s0"],
+           cfg["v0"], cfg["a0"], cfg["mf0"], cfg["ms0"], cfg["u_base"]]
+    return np.tile(np.asarray(row, dtype=np.float64), (n, 1))
+
+
+def states_to_array(states: Sequence[State]) -> np.ndarray:
+    return np.array([[getattr(st, f) for f in STATE_FIELDS] for st in states], dtype=np.float64)
+
+
+def row_to_state(row: np.ndarray) -> State:
+    return State(*row.tolist())
+
+
+def array_to_states(x: np.ndarray) -> List[State]:
+    return [State(*r) for r in x.tolist()]
+
+
+def controls_to_array(controls: Sequence[Dict[str, float]]) -> np.ndarray:
+    """Stack per-trajectory control dicts into an ``(N, 5)`` array (missing keys -> defaults)."""
+    return np.array([[c.get(k, d) for k, d in zip(CONTROL_FIELDS, CONTROL_DEFAULTS)] for c in controls],
+                    dtype=np.float64)
+
+
+def array_to_controls(u: np.ndarray) -> List[Dict[str, float]]:
+    return [dict(zip(CONTROL_FIELDS, r)) for r in u.tolist()]
+
+
+def _clip01(x: np.ndarray) -> np.ndarray:
+    # In place: every caller passes a fresh temporary. np.clip's Python-level
+    # dispatch costs more than the clipping itself on small arrays.
+    np.maximum(x, 0.0, out=x)
+    return np.minimum(x, 1.0, out=x)
+
+
+def step_dynamics_batch(x: np.ndarray, pe: np.ndarray, reward: np.ndarray, u_exog: np.ndarray,
+                        control: np.ndarray, cfg: Union[Dict[str, Any], DynamicsParams]) -> np.ndarray:
+    """
+    Vectorized ``step_dynamics``.
+
+    x: ``(N, 10)`` state array, pe/reward/u_exog: ``(N,)`` (or scalars),
+    control: ``(N, 5)`` in ``CONTROL_FIELDS`` order. Returns a new ``(N, 10)`` array.
+    """
+    c = coefficients(cfg)
+    u_dmg = control[:, U_DMG]
+    u_att = control[:, U_ATT]
+    u_mem = control[:, U_MEM]
+    u_calm = control[:, U_CALM]
+    u_reapp = control[:, U_REAPP]
+
+    phi, g, p, i, s = x[:, PHI], x[:, G], x[:, P], x[:, I], x[:, S]
+    v, a, mf, ms = x[:, V], x[:, A], x[:, MF], x[:, MS]
+
+    out = np.empty_like(x)
+
+    u_eff = _clip01(u_exog * (1.0 - c.k_u_att * u_att))
+
+    i_next = _clip01(i + c.k_i_att * u_att - c.mu_i * (i - c.i0) - c.k_i_u * u_eff)
+    p_next = _clip01(p - c.k_p_pe * pe - c.k_p_u * u_eff + c.k_p_i * i_next + c.mu_p * (c.p0 - p))
+    g_next = _clip01(g + c.k_g_i * i_next + c.k_g_p * p_next - c.k_g_u * u_eff
+                     - c.k_g_a * np.maximum(0.0, a - c.a_safe) + c.mu_g * (c.g0 - g))
+    out[:, PHI] = _clip01(phi + c.k_phi_gp * (g_next * p_next) - c.mu_phi * (phi - c.phi0))
+
+    s_drive = c.k_s_u * u_eff + c.k_s_pe * pe
+    s_next = _clip01(s + s_drive - c.mu_s * (s - c.s0) - c.k_s_dmg * u_dmg)
+
+    a_next = _clip01(a + c.k_a_pe * pe + c.k_a_u * u_eff + c.k_a_s * np.maximum(0.0, s_next - c.s_safe)
+                     - c.mu_a * (a - c.a0) - c.k_a_calm * u_calm)
+
+    v_next = _clip01(v + c.k_v_r * (0.5 * (reward + 1.0)) - c.k_v_pe * pe - c.k_v_u * u_eff
+                     - c.mu_v * (v - c.v0) + c.k_v_reapp * u_reapp)
+
+    priority = _clip01(c.w_mem_pe * pe + c.w_mem_a * np.abs(a_next - c.a0) + c.w_mem_v * np.abs(v_next - c.v0))
+    write = priority * u_mem
+
+    eta = c.eta0 * _clip01(1.0 + c.k_eta_a * np.maximum(0.0, a_next - c.a_safe))
+    mf_next = _clip01(mf + eta * write - c.mu_mf * (mf - c.mf0))
+    out[:, MS] = _clip01(ms + c.k_ms * mf_next - c.mu_ms * (ms - c.ms0))
+
+    out[:, G] = g_next
+    out[:, P] = p_next
+    out[:, I] = i_next
+    out[:, S] = s_next
+    out[:, V] = v_next
+    out[:, A] = a_next
+    out[:, MF] = mf_next
+    out[:, U] = u_eff
+    return out
+
+
+def ccog_batch(x: np.ndarray) -> np.ndarray:
+    return _clip01(x[:, PHI] * x[:, G] * x[:, P] * x[:, I])
+
+
+def capacity_batch(x: np.ndarray, omega_s: float) -> np.ndarray:
+    return _clip01(ccog_batch(x) * (1.0 + omega_s * x[:, S]))
+
+
+def performance_batch(x: np.ndarray, cfg: Union[Dict[str, Any], DynamicsParams]) -> np.ndarray:
+    c = coefficients(cfg)
+    cap = capacity_batch(x, c.omega_s)
+    penalty = (c.w_u * x[:, U] +
+               c.w_a * np.maximum(0.0, x[:, A] - c.a_safe) +
+               c.w_s * np.maximum(0.0, x[:, S] - c.s_safe))
+    return _clip01(c.perf_bias + c.perf_gain * cap - penalty)
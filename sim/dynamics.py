@@ -1,7 +1,47 @@
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from .state import State, clip01
+from .params import DynamicsParams
 
-def step_dynamics(st: State, pe: float, reward: float, u_exog: float, control: Dict[str, float], cfg: Dict[str, Any]) -> State:
+def step_dynamics(st: State, pe: float, reward: float, u_exog: float, control: Dict[str, float],
+                  cfg: Union[Dict[str, Any], DynamicsParams]) -> State:
+    if not isinstance(cfg, DynamicsParams):
+        return _step_dynamics_dict(st, pe, reward, u_exog, control, cfg)
+    c = cfg
+    u_dmg  = control.get("u_dmg", 0.0)
+    u_att  = control.get("u_att", 0.0)
+    u_mem  = control.get("u_mem", 1.0)
+    u_calm = control.get("u_calm", 0.0)
+    u_reapp= control.get("u_reapp", 0.0)
+
+    u_eff = clip01(u_exog * (1.0 - c.k_u_att * u_att))
+
+    i_next = clip01(st.i + c.k_i_att * u_att - c.mu_i * (st.i - c.i0) - c.k_i_u * u_eff)
+    p_next = clip01(st.p - c.k_p_pe * pe - c.k_p_u * u_eff + c.k_p_i * i_next + c.mu_p * (c.p0 - st.p))
+    g_next = clip01(st.g + c.k_g_i * i_next + c.k_g_p * p_next - c.k_g_u * u_eff - c.k_g_a * max(0.0, st.a - c.a_safe) + c.mu_g * (c.g0 - st.g))
+    phi_next = clip01(st.phi + c.k_phi_gp * (g_next * p_next) - c.mu_phi * (st.phi - c.phi0))
+
+    s_drive = c.k_s_u * u_eff + c.k_s_pe * pe
+    s_next = clip01(st.s + s_drive - c.mu_s * (st.s - c.s0) - c.k_s_dmg * u_dmg)
+
+    a_next = clip01(st.a + c.k_a_pe * pe + c.k_a_u * u_eff + c.k_a_s * max(0.0, s_next - c.s_safe)
+                    - c.mu_a * (st.a - c.a0) - c.k_a_calm * u_calm)
+
+    v_next = clip01(st.v + c.k_v_r * (0.5 * (reward + 1.0)) - c.k_v_pe * pe - c.k_v_u * u_eff
+                    - c.mu_v * (st.v - c.v0) + c.k_v_reapp * u_reapp)
+
+    priority = clip01(c.w_mem_pe * pe + c.w_mem_a * abs(a_next - c.a0) + c.w_mem_v * abs(v_next - c.v0))
+    write = priority * u_mem
+
+    eta = c.eta0 * clip01(1.0 + c.k_eta_a * max(0.0, a_next - c.a_safe))
+    mf_next = clip01(st.mf + eta * write - c.mu_mf * (st.mf - c.mf0))
+    ms_next = clip01(st.ms + c.k_ms * mf_next - c.mu_ms * (st.ms - c.ms0))
+
+    return State(phi=phi_next, g=g_next, p=p_next, i=i_next, s=s_next, v=v_next, a=a_next, mf=mf_next, ms=ms_next, u=u_eff)
+
+def _step_dynamics_dict(st: State, pe: float, reward: float, u_exog: float, control: Dict[str, float],
+                        cfg: Dict[str, Any]) -> State:
+    # Raw config dict, read in place: compiling it per call would cost more than
+    # the step itself, and a cached compile can miss later edits to the dict.
     u_dmg  = control.get("u_dmg", 0.0)
     u_att  = control.get("u_att", 0.0)
     u_mem  = control.get("u_mem", 1.0)
@@ -0,0 +1,150 @@
+"""
+Analytic Jacobians of the ASSB step.
+
+`linearize(st, pe, reward, u_exog, control, cfg)` returns the exact partial
+derivatives of `sim.dynamics.step_dynamics` at one operating point:
+
+    A = d x_next / d x          (10, 10)  rows/cols in `STATE_FIELDS` order
+    B = d x_next / d control    (10, 5)   cols in `CONTROL_FIELDS` order
+    E = d x_next / d (pe, reward, u_exog)  (10, 3)
+
+`linearize_batch` does the same for N operating points at once (arrays with a
+leading N axis), mirroring `sim.batch.step_dynamics_batch`.
+
+The step is piecewise smooth. Each non-smooth term is differentiated on the
+piece the point lies in, taking the right-hand derivative at exact breakpoints
+(the value a forward difference converges to):
+- clip01(z): 1 for 0 <= z < 1, 0 when saturated (z < 0 or z >= 1);
+- max(0, y): 1 for y >= 0, else 0;
+- abs(y): +1 for y >= 0, else -1.
+
+Note that `u` in the next state is the effective exogenous load, which does
+not depend on the current `u`: its row of A is zero and the dependence shows
+up in E (u_exog) and B (u_att).
+
+Verification against finite differences: `experiments/verify_jacobians.py`.
+"""
+
+from typing import Dict, Any, Tuple, Union
+import numpy as np
+
+from .state import State
+from .params import DynamicsParams, as_params
+from .batch import (STATE_FIELDS, CONTROL_FIELDS, states_to_array, controls_to_array,
+                    PHI, G, P, I, S, V, A, MF, MS, U, U_DMG, U_ATT, U_MEM, U_CALM, U_REAPP)
+
+EXOG_FIELDS = ("pe", "reward", "u_exog")
+
+# Columns of the forward-mode gradients: state, then control, then exogenous inputs
+_NX, _NU = len(STATE_FIELDS), len(CONTROL_FIELDS)
+_C0, _E0 = _NX, _NX + _NU
+_NZ = _NX + _NU + len(EXOG_FIELDS)
+_PE, _R, _UEX = _E0, _E0 + 1, _E0 + 2
+
+
+def _d_clip01(z: np.ndarray) -> np.ndarray:
+    return ((z >= 0.0) & (z < 1.0)).astype(np.float64)
+
+
+def _d_relu(y: np.ndarray) -> np.ndarray:
+    return (y >= 0.0).astype(np.float64)
+
+
+def _d_abs(y: np.ndarray) -> np.ndarray:
+    return np.where(y >= 0.0, 1.0, -1.0)
+
+
+def linearize_batch(x: np.ndarray, pe, reward, u_exog, control: np.ndarray,
+                    cfg: Union[Dict[str, Any], DynamicsParams]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Jacobians at N operating points.
+
+    x: ``(N, 10)``, pe/reward/u_exog: ``(N,)`` (or scalars), control: ``(N, 5)``.
+    Returns ``A (N, 10, 10)``, ``B (N, 10, 5)``, ``E (N, 10, 3)``.
+    """
+    c = as_params(cfg)
+    n = x.shape[0]
+    pe, reward, u_exog = (np.broadcast_to(np.asarray(v, dtype=np.float64), (n,)) for v in (pe, reward, u_exog))
+    u_dmg, u_att, u_mem = control[:, U_DMG], control[:, U_ATT], control[:, U_MEM]
+    phi, g, p, i, s = x[:, PHI], x[:, G], x[:, P], x[:, I], x[:, S]
+    v, a, mf, ms = x[:, V], x[:, A], x[:, MF], x[:, MS]
+
+    def e(j: int, scale=1.0) -> np.ndarray:
+        out = np.zeros((n, _NZ))
+        out[:, j] = scale
+        return out
+
+    def col(w: np.ndarray) -> np.ndarray:
+        return w[:, None]
+
+    # u_eff = clip01(u_exog * (1 - k_u_att * u_att))
+    z = u_exog * (1.0 - c.k_u_att * u_att)
+    u_eff = np.clip(z, 0.0, 1.0)
+    d_u = col(_d_clip01(z)) * (e(_UEX, 1.0 - c.k_u_att * u_att) + e(_C0 + U_ATT, -c.k_u_att * u_exog))
+
+    z = i + c.k_i_att * u_att - c.mu_i * (i - c.i0) - c.k_i_u * u_eff
+    i_next = np.clip(z, 0.0, 1.0)
+    d_i = col(_d_clip01(z)) * (e(I, 1.0 - c.mu_i) + e(_C0 + U_ATT, c.k_i_att) - c.k_i_u * d_u)
+
+    z = p - c.k_p_pe * pe - c.k_p_u * u_eff + c.k_p_i * i_next + c.mu_p * (c.p0 - p)
+    p_next = np.clip(z, 0.0, 1.0)
+    d_p = col(_d_clip01(z)) * (e(P, 1.0 - c.mu_p) - e(_PE, c.k_p_pe) - c.k_p_u * d_u + c.k_p_i * d_i)
+
+    a_exc = a - c.a_safe
+    z = (g + c.k_g_i * i_next + c.k_g_p * p_next - c.k_g_u * u_eff - c.k_g_a * np.maximum(0.0, a_exc)
+         + c.mu_g * (c.g0 - g))
+    g_next = np.clip(z, 0.0, 1.0)
+    d_g = col(_d_clip01(z)) * (e(G, 1.0 - c.mu_g) + c.k_g_i * d_i + c.k_g_p * d_p - c.k_g_u * d_u
+                               - e(A, c.k_g_a * _d_relu(a_exc)))
+
+    z = phi + c.k_phi_gp * (g_next * p_next) - c.mu_phi * (phi - c.phi0)
+    d_phi = col(_d_clip01(z)) * (e(PHI, 1.0 - c.mu_phi) + c.k_phi_gp * (col(p_next) * d_g + col(g_next) * d_p))
+
+    z = s + c.k_s_u * u_eff + c.k_s_pe * pe - c.mu_s * (s - c.s0) - c.k_s_dmg * u_dmg
+    s_next = np.clip(z, 0.0, 1.0)
+    d_s = col(_d_clip01(z)) * (e(S, 1.0 - c.mu_s) + c.k_s_u * d_u + e(_PE, c.k_s_pe) - e(_C0 + U_DMG, c.k_s_dmg))
+
+    s_exc = s_next - c.s_safe
+    z = (a + c.k_a_pe * pe + c.k_a_u * u_eff + c.k_a_s * np.maximum(0.0, s_exc)
+         - c.mu_a * (a - c.a0) - c.k_a_calm * control[:, U_CALM])
+    a_next = np.clip(z, 0.0, 1.0)
+    d_a = col(_d_clip01(z)) * (e(A, 1.0 - c.mu_a) + e(_PE, c.k_a_pe) + c.k_a_u * d_u
+                               + c.k_a_s * col(_d_relu(s_exc)) * d_s - e(_C0 + U_CALM, c.k_a_calm))
+
+    z = (v + c.k_v_r * (0.5 * (reward + 1.0)) - c.k_v_pe * pe - c.k_v_u * u_eff
+         - c.mu_v * (v - c.v0) + c.k_v_reapp * control[:, U_REAPP])
+    v_next = np.clip(z, 0.0, 1.0)
+    d_v = col(_d_clip01(z)) * (e(V, 1.0 - c.mu_v) + e(_R, 0.5 * c.k_v_r) - e(_PE, c.k_v_pe) - c.k_v_u * d_u
+                               + e(_C0 + U_REAPP, c.k_v_reapp))
+
+    # Memory write
+    z = c.w_mem_pe * pe + c.w_mem_a * np.abs(a_next - c.a0) + c.w_mem_v * np.abs(v_next - c.v0)
+    priority = np.clip(z, 0.0, 1.0)
+    d_priority = col(_d_clip01(z)) * (e(_PE, c.w_mem_pe) + c.w_mem_a * col(_d_abs(a_next - c.a0)) * d_a
+                                      + c.w_mem_v * col(_d_abs(v_next - c.v0)) * d_v)
+    write = priority * u_mem
+    d_write = col(u_mem) * d_priority + e(_C0 + U_MEM, priority)
+
+    a_exc_next = a_next - c.a_safe
+    z = 1.0 + c.k_eta_a * np.maximum(0.0, a_exc_next)
+    eta = c.eta0 * np.clip(z, 0.0, 1.0)
+    d_eta = col(c.eta0 * _d_clip01(z) * c.k_eta_a * _d_relu(a_exc_next)) * d_a
+
+    z = mf + eta * write - c.mu_mf * (mf - c.mf0)
+    d_mf = col(_d_clip01(z)) * (e(MF, 1.0 - c.mu_mf) + col(write) * d_eta + col(eta) * d_write)
+    mf_next = np.clip(z, 0.0, 1.0)
+
+    z = ms + c.k_ms * mf_next - c.mu_ms * (ms - c.ms0)
+    d_ms = col(_d_clip01(z)) * (e(MS, 1.0 - c.mu_ms) + c.k_ms * d_mf)
+
+    J = np.empty((n, _NX, _NZ))
+    J[:, PHI], J[:, G], J[:, P], J[:, I], J[:, S] = d_phi, d_g, d_p, d_i, d_s
+    J[:, V], J[:, A], J[:, MF], J[:, MS], J[:, U] = d_v, d_a, d_mf, d_ms, d_u
+    return J[:, :, :_C0].copy(), J[:, :, _C0:_E0].copy(), J[:, :, _E0:].copy()
+
+
+def linearize(st: State, pe: float, reward: float, u_exog: float, control: Dict[str, float],
+              cfg: Union[Dict[str, Any], DynamicsParams]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Jacobians ``(A (10, 10), B (10, 5), E (10, 3))`` of `step_dynamics` at one operating point."""
+    A_, B_, E_ = linearize_batch(states_to_array([st]), pe, reward, u_exog, controls_to_array([control]), cfg)
+    return A_[0], B_[0], E_[0]
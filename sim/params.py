@@ -0,0 +1,181 @@
+"""
+Compiled parameter block for the ASSB dynamics.
+
+`DynamicsParams.from_config` validates a YAML config (e.g. ``configs/v2.yaml``)
+once and exposes every coefficient read by ``step_dynamics``, ``performance``
+and the ARCv1 controller family as a typed float attribute, so the hot loop
+does attribute reads instead of per-step ``cfg["k_..."]`` lookups. Missing or
+non-numeric keys fail at construction time, not mid-sweep.
+
+The block still behaves like the config mapping it came from (``params["x"]``,
+``params.get("x", d)``), so controllers and metrics that read optional keys
+keep working when handed a `DynamicsParams` instead of the raw dict.
+
+Raw dicts are still accepted everywhere and are never cached in compiled
+form: ``step_dynamics`` and ``performance`` read them in place as before;
+the controllers and `sim.batch` read them through `coefficients`, a live view
+of the dict.
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Dict, Any, Union, Tuple
+import numpy as np
+
+
+@dataclass(frozen=True)
+class DynamicsParams:
+    # Setpoints / resting levels
+    phi0: float
+    g0: float
+    p0: float
+    i0: float
+    s0: float
+    v0: float
+    a0: float
+    mf0: float
+    ms0: float
+
+    # Safety thresholds
+    a_safe: float
+    s_safe: float
+
+    # Performance readout
+    omega_s: float
+    perf_bias: float
+    perf_gain: float
+    w_u: float
+    w_a: float
+    w_s: float
+
+    # Dynamics
+    k_u_att: float
+    k_i_att: float
+    k_i_u: float
+    mu_i: float
+    k_p_pe: float
+    k_p_u: float
+    k_p_i: float
+    mu_p: float
+    k_g_i: float
+    k_g_p: float
+    k_g_u: float
+    k_g_a: float
+    mu_g: float
+    k_phi_gp: float
+    mu_phi: float
+    k_s_u: float
+    k_s_pe: float
+    k_s_dmg: float
+    mu_s: float
+    k_a_pe: float
+    k_a_u: float
+    k_a_s: float
+    k_a_calm: float
+    mu_a: float
+    k_v_r: float
+    k_v_pe: float
+    k_v_u: float
+    k_v_reapp: float
+    mu_v: float
+    eta0: float
+    k_eta_a: float
+    w_mem_pe: float
+    w_mem_a: float
+    w_mem_v: float
+    mu_mf: float
+    k_ms: float
+    mu_ms: float
+
+    # ARC controller gains
+    arc_w_u: float
+    arc_w_a: float
+    arc_w_s: float
+    arc_k_dmg: float
+    arc_k_att: float
+    arc_k_mem_block: float
+    arc_k_calm: float
+    arc_k_reapp: float
+
+    # Every other config key (horizon, seeds, metric settings, optional gains, ...)
+    extras: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_config(cls, cfg: Union[Dict[str, Any], "DynamicsParams"]) -> "DynamicsParams":
+        if isinstance(cfg, cls):
+            return cfg
+        missing = [k for k in PARAM_NAMES if k not in cfg]
+        if missing:
+            raise ValueError(f"Config is missing dynamics parameters: {', '.join(missing)}")
+        values = {}
+        invalid = []
+        for k in PARAM_NAMES:
+            try:
+                values[k] = float(cfg[k])
+            except (TypeError, ValueError):
+                invalid.append(f"{k}={cfg[k]!r}")
+        if invalid:
+            raise ValueError(f"Non-numeric dynamics parameters: {', '.join(invalid)}")
+        extras = {k: v for k, v in cfg.items() if k not in _PARAM_SET}
+        return cls(**values, extras=extras)
+
+    def as_array(self) -> np.ndarray:
+        """Coefficients packed in `PARAM_NAMES` order."""
+        return np.array([getattr(self, k) for k in PARAM_NAMES], dtype=np.float64)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = dict(self.extras)
+        out.update({k: getattr(self, k) for k in PARAM_NAMES})
+        return out
+
+    # --- read-only mapping interface (drop-in for the raw config dict) ---
+    def __getitem__(self, key: str) -> Any:
+        if key in _PARAM_SET:
+            return getattr(self, key)
+        return self.extras[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in _PARAM_SET or key in self.extras
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _PARAM_SET:
+            return getattr(self, key)
+        return self.extras.get(key, default)
+
+
+PARAM_NAMES: Tuple[str, ...] = tuple(f.name for f in fields(DynamicsParams) if f.name != "extras")
+PARAM_INDEX: Dict[str, int] = {k: j for j, k in enumerate(PARAM_NAMES)}
+_PARAM_SET = frozenset(PARAM_NAMES)
+
+
+def as_params(cfg: Union[Dict[str, Any], DynamicsParams]) -> DynamicsParams:
+    """Return `cfg` unchanged if already compiled, else compile (and validate) it."""
+    return DynamicsParams.from_config(cfg)
+
+
+class ConfigView:
+    """Attribute reads straight from a raw config dict (its live contents, no copy)."""
+
+
+# Last (dict, view) handed out by `coefficients`. A view cannot go stale, so
+# reusing it for the same dict is always safe.
+_last_view: list = [(None, None)]
+
+
+def coefficients(cfg: Union[Dict[str, Any], DynamicsParams]) -> Union[DynamicsParams, ConfigView]:
+    """
+    Coefficients of `cfg` as attributes, for code that runs once per step.
+
+    A `DynamicsParams` is returned as is. A raw dict is wrapped, not compiled:
+    the view's attribute dict *is* the config, so later edits to the dict are
+    always seen. No validation happens on this path; loops should compile once
+    with `as_params`.
+    """
+    last_cfg, last = _last_view[0]
+    if last_cfg is cfg:
+        return last
+    if isinstance(cfg, DynamicsParams):
+        return cfg
+    view = ConfigView()
+    view.__dict__ = cfg
+    _last_view[0] = (cfg, view)
+    return view
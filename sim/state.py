@@ -1,5 +1,6 @@
 from dataclasses import dataclass, asdict
-from typing import Dict, Any
+from typing import Dict, Any, Union
+from .params import DynamicsParams
 
 def clip01(x: float) -> float:
     return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
@@ -26,7 +27,18 @@ def ccog(st: State) -> float:
 def capacity(st: State, omega_s: float) -> float:
     return clip01(ccog(st) * (1.0 + omega_s * st.s))
 
-def performance(st: State, cfg: Dict[str, Any]) -> float:
+def performance(st: State, cfg: Union[Dict[str, Any], DynamicsParams]) -> float:
+    if not isinstance(cfg, DynamicsParams):
+        return _performance_dict(st, cfg)
+    c = cfg
+    cap = capacity(st, c.omega_s)
+    penalty = (c.w_u * st.u +
+               c.w_a * max(0.0, st.a - c.a_safe) +
+               c.w_s * max(0.0, st.s - c.s_safe))
+    return clip01(c.perf_bias + c.perf_gain * cap - penalty)
+
+def _performance_dict(st: State, cfg: Dict[str, Any]) -> float:
+    # Raw config dict, read in place (see `sim.dynamics._step_dynamics_dict`).
     cap = capacity(st, cfg["omega_s"])
     penalty = (cfg["w_u"] * st.u +
                cfg["w_a"] * max(0.0, st.a - cfg["a_safe"]) +
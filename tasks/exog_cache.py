@@ -0,0 +1,133 @@
+"""
+Common-random-numbers cache for the exogenous signals of a sweep.
+
+Every controller in a sweep is run on the same `(scenario, seed)` streams.
+`ExogCache.build` generates each stream once (`Scenario.generate`), packs
+them into one `multiprocessing.shared_memory` block, and `install` puts
+zero-copy, read-only views of that block into each scenario's cache. Pool
+workers receive the picklable `handle` and `attach` to the same block, so
+all processes read literally the same bytes and nothing is regenerated.
+
+Entries are keyed by `Scenario.exog_key`: scenario name, horizon, the
+values of every config key the generator reads, and the seed. A worker
+whose config differs (e.g. a sensitivity sweep) misses the cache and
+generates its own streams instead of reading stale ones.
+"""
+
+from dataclasses import dataclass
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .scenarios import Scenario
+
+
+@dataclass(frozen=True)
+class ExogCacheHandle:
+    """What a worker needs to attach: block name and `key -> (offset, horizon)` (offsets in float64 items)."""
+    shm_name: str
+    size: int
+    index: Dict[Tuple, Tuple[int, int]]
+
+
+class ExogCache:
+    def __init__(self, shm: shared_memory.SharedMemory, size: int,
+                 index: Dict[Tuple, Tuple[int, int]], owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._installed: List[Tuple[Scenario, Tuple]] = []
+        self.index = index
+        buf = np.ndarray((size,), dtype=np.float64, buffer=shm.buf)
+        buf.flags.writeable = False
+        self._buf = buf
+
+    @classmethod
+    def build(cls, scenarios: Sequence[Scenario], seeds: Sequence[int],
+              horizon: Optional[int] = None) -> "ExogCache":
+        """Generate every non-interactive (scenario, seed) stream once into a new shared block."""
+        index: Dict[Tuple, Tuple[int, int]] = {}
+        size = 0
+        for sc in scenarios:
+            if sc.interactive:
+                continue
+            H = sc.horizon if horizon is None else horizon
+            for seed in dict.fromkeys(seeds):
+                index[sc.exog_key(seed, H)] = (size, H)
+                size += 3 * H
+        shm = shared_memory.SharedMemory(create=True, size=max(1, size) * 8)
+        buf = np.ndarray((size,), dtype=np.float64, buffer=shm.buf)
+        for sc in scenarios:
+            if sc.interactive:
+                continue
+            H = sc.horizon if horizon is None else horizon
+            pe, r, u = sc.generate(list(dict.fromkeys(seeds)), H)
+            for k, seed in enumerate(dict.fromkeys(seeds)):
+                off, _ = index[sc.exog_key(seed, H)]
+                block = buf[off:off + 3 * H].reshape(3, H)
+                block[0] = pe[k]; block[1] = r[k]; block[2] = u[k]
+        del buf
+        return cls(shm, size, index, owner=True)
+
+    @property
+    def handle(self) -> ExogCacheHandle:
+        return ExogCacheHandle(self._shm.name, self._buf.shape[0], self.index)
+
+    @classmethod
+    def attach(cls, handle: ExogCacheHandle) -> "ExogCache":
+        shm = shared_memory.SharedMemory(name=handle.shm_name)
+        # The creating process owns the block and unlinks it in `close`. Pool
+        # workers (fork or spawn) share its resource tracker, which then still
+        # holds the block's registration: unregistering here would remove the
+        # owner's entry. Only an unrelated process has a tracker of its own that
+        # would unlink the block when it exits.
+        if multiprocessing.parent_process() is None:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, handle.size, handle.index, owner=False)
+
+    def get(self, key: Tuple) -> Optional[np.ndarray]:
+        """Read-only `(3, horizon)` view for `key`, or None."""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        off, H = entry
+        return self._buf[off:off + 3 * H].reshape(3, H)
+
+    def install(self, scenarios: Sequence[Scenario], seeds: Sequence[int],
+                horizon: Optional[int] = None) -> int:
+        """Seed each scenario's cache with views of this block. Returns the number of hits."""
+        hits = 0
+        for sc in scenarios:
+            if sc.interactive:
+                continue
+            H = sc.horizon if horizon is None else horizon
+            for seed in seeds:
+                key = sc.exog_key(seed, H)
+                view = self.get(key)
+                if view is not None:
+                    sc._cache[key] = view
+                    self._installed.append((sc, key))
+                    hits += 1
+        return hits
+
+    def close(self) -> None:
+        """Release this process's mapping (and free the block if it created it)."""
+        if self._shm is None:
+            return
+        for sc, key in self._installed:
+            sc._cache.pop(key, None)
+        self._installed = []
+        self._buf = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # views still referenced elsewhere; the mapping goes away with them
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> "ExogCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -1,7 +1,12 @@
-from dataclasses import dataclass
-from typing import List, Dict, Any, Tuple, Callable
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple, Callable, Optional, Sequence
 import random
 import math
+import numpy as np
+
+# Vectorized generator: (t (H,), d0 (n, H), d1 (n, H)) -> (pe, reward, u_exog), each broadcastable to (n, H).
+# d0/d1 are the first/second rng.random() draw of each step.
+BatchGenerator = Callable[[np.ndarray, np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray, np.ndarray]]
 
 @dataclass
 class Scenario:
@@ -9,10 +14,73 @@ class Scenario:
     horizon: int
     shock_t: int
     generator: Callable[[int, random.Random], Tuple[float, float, float]]
+    # Interactive scenarios read the agent state (`generator(t, rng, st=st)`) and cannot be pre-generated.
+    interactive: bool = False
+    batch_generator: Optional[BatchGenerator] = None
+    # Config keys the generators read (live, from `config`); part of every cache key.
+    cfg_keys: Tuple[str, ...] = ()
+    config: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+    _cache: Dict[Tuple, np.ndarray] = field(default_factory=dict, repr=False, compare=False)
+
+    def exog_key(self, seed: int, horizon: Optional[int] = None) -> Tuple:
+        """Cache key of one seed's signals: changes whenever a config value the generator reads changes."""
+        H = self.horizon if horizon is None else horizon
+        cfg = self.config or {}
+        return (self.name, H, tuple(cfg.get(k) for k in self.cfg_keys), seed)
+
+    def exog(self, seed: int, horizon: Optional[int] = None) -> np.ndarray:
+        """Read-only `(3, horizon)` view of one seed's `(pe, reward, u_exog)` (no copy on a cache hit)."""
+        key = self.exog_key(seed, horizon)
+        if key not in self._cache:
+            self.generate([seed], horizon)
+        return self._cache[key]
+
+    def generate(self, seeds: Sequence[int], horizon: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Exogenous signals for several seeds at once: `(pe, reward, u_exog)`, each `(len(seeds), horizon)`.
+
+        Identical to calling `generator(t, random.Random(seed))` for t = 0..horizon-1.
+        Each seed's streams are computed once and cached on the scenario, so
+        every controller run on the same seed reuses them.
+        """
+        if self.interactive or self.batch_generator is None:
+            raise ValueError(f"Scenario {self.name!r} is interactive and cannot be pre-generated")
+        H = self.horizon if horizon is None else horizon
+        missing = [s for s in dict.fromkeys(seeds) if self.exog_key(s, H) not in self._cache]
+        if missing:
+            draws = np.stack([_python_random_draws(s, 2 * H).reshape(H, 2) for s in missing])
+            pe, r, u = self.batch_generator(np.arange(H), draws[:, :, 0], draws[:, :, 1])
+            out = np.empty((len(missing), 3, H))
+            out[:, 0] = pe; out[:, 1] = r; out[:, 2] = u
+            for k, s in enumerate(missing):
+                out[k].flags.writeable = False
+                self._cache[self.exog_key(s, H)] = out[k]
+        block = np.stack([self._cache[self.exog_key(s, H)] for s in seeds])
+        return block[:, 0], block[:, 1], block[:, 2]
+
+def _python_random_draws(seed: int, n: int) -> np.ndarray:
+    """First `n` values of `random.Random(seed).random()`, drawn with numpy's MT19937.
+
+    `random.Random(int)` seeds Mersenne Twister with init_by_array over the
+    32-bit words of abs(seed); `RandomState(key)` does the same and its
+    `random_sample` uses the same 53-bit construction as `random()`.
+    """
+    s = abs(int(seed))
+    key = []
+    while s:
+        key.append(s & 0xFFFFFFFF)
+        s >>= 32
+    return np.random.RandomState(key or [0]).random_sample(n)
 
 def _clip01(x: float) -> float:
     return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
 
+def _clip01_v(x: np.ndarray) -> np.ndarray:
+    return np.clip(x, 0.0, 1.0)
+
+def _clip_reward_v(r: np.ndarray) -> np.ndarray:
+    return np.clip(r, -1.0, 1.0)
+
 def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
     H = cfg["horizon"]
     shock_t = cfg["shock_t"]
@@ -23,12 +91,25 @@ def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
         r = (0.2 if t < shock_t else 0.1) + (rng.random()-0.5)*0.1
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
+    def sudden_threat_v(t, d0, d1):
+        post = t >= shock_t
+        u = np.where(post, cfg["u_shock"], cfg["u_base"])
+        pe = _clip01_v(cfg["pe_base"] + np.where(post, 0.15, 0.0) + d0*cfg["pe_noise"])
+        r = np.where(post, 0.1, 0.2) + (d1-0.5)*0.1
+        return pe, _clip_reward_v(r), _clip01_v(u)
+
     def reward_flip(t: int, rng: random.Random):
         u = cfg["u_base"]
         pe = _clip01(cfg["pe_base"] + rng.random()*cfg["pe_noise"] + (0.2 if t == shock_t else 0.0))
         r = (0.3 if t < shock_t else -0.3) + (rng.random()-0.5)*0.1
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
+    def reward_flip_v(t, d0, d1):
+        u = cfg["u_base"]
+        pe = _clip01_v(cfg["pe_base"] + d0*cfg["pe_noise"] + np.where(t == shock_t, 0.2, 0.0))
+        r = np.where(t < shock_t, 0.3, -0.3) + (d1-0.5)*0.1
+        return pe, _clip_reward_v(r), _clip01(u)
+
     def noise_burst(t: int, rng: random.Random):
         u = cfg["u_base"]
         burst = (t >= shock_t and t < shock_t + cfg["burst_len"])
@@ -36,6 +117,13 @@ def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
         r = (0.2 if not burst else 0.05) + (rng.random()-0.5)*0.1
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
+    def noise_burst_v(t, d0, d1):
+        u = cfg["u_base"]
+        burst = (t >= shock_t) & (t < shock_t + cfg["burst_len"])
+        pe = _clip01_v(np.where(burst, 0.65, cfg["pe_base"]) + d0*cfg["pe_noise"])
+        r = np.where(burst, 0.05, 0.2) + (d1-0.5)*0.1
+        return pe, _clip_reward_v(r), _clip01(u)
+
     # =========================================================================
     # L2 SCENARIOS - Memory & Continual Learning
     # =========================================================================
@@ -68,6 +156,13 @@ def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
         
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
+    def distribution_shift_v(t, d0, d1):
+        phase2 = (t >= 50) & (t < 100)
+        u = np.where(phase2, cfg["u_shock"] * 0.6, cfg["u_base"])
+        pe = np.where(phase2, _clip01_v(0.4 + d0*0.2), _clip01_v(cfg["pe_base"] + d0*cfg["pe_noise"]))
+        r = np.where(phase2, -0.2 + (d1-0.5)*0.2, 0.4 + (d1-0.5)*0.1)
+        return pe, _clip_reward_v(r), _clip01_v(u)
+
     def goal_conflict(t: int, rng: random.Random):
         """
         Conflicting goals that require memory gating.
@@ -86,6 +181,14 @@ def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
         
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
+    def goal_conflict_v(t, d0, d1):
+        cycle = 30
+        phase = (t // cycle) % 2
+        u = cfg["u_base"] + 0.1 * np.where(t % cycle < 5, 1, 0)
+        pe = _clip01_v(cfg["pe_base"] + 0.15 * np.where(t % cycle < 3, 1, 0) + d0*cfg["pe_noise"])
+        r = np.where(phase == 0, 0.3 + (d1-0.5)*0.1, -0.3 + (d1-0.5)*0.1)
+        return pe, _clip_reward_v(r), _clip01_v(u)
+
     # =========================================================================
     # L3 SCENARIOS - Anti-Rumination & Stress Tests
     # =========================================================================
@@ -107,6 +210,15 @@ def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
         
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
+    def sustained_contradiction_v(t, d0, d1):
+        # math.sin/cos per step (not np.sin) so values match the scalar generator bit for bit
+        sin_t = np.array([math.sin(k * 0.3) for k in t.tolist()])
+        cos_t = np.array([math.cos(k * 0.3 + 1.5) for k in t.tolist()])
+        u = cfg["u_shock"] * 0.8
+        pe = _clip01_v(0.5 + 0.3 * sin_t + d0*0.1)
+        r = 0.3 * cos_t + (d1-0.5)*0.15
+        return pe, _clip_reward_v(r), _clip01(u)
+
     def gaslighting(t: int, rng: random.Random):
         """
         Simulates external manipulation: reward structure changes unpredictably.
@@ -127,6 +239,15 @@ def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
         
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
+    def gaslighting_v(t, d0, d1):
+        # Two draws per step in both branches: d0 decides the flip, d1 feeds pe.
+        base_reward = np.where((t // 20) % 2 == 0, 0.3, -0.3)
+        flip = d0 < 0.15
+        r = np.where(flip, -base_reward, base_reward)
+        pe = np.where(flip, _clip01_v(0.6 + d1*0.2), _clip01_v(cfg["pe_base"] + d1*cfg["pe_noise"]))
+        u = np.where(flip, cfg["u_shock"] * 0.7, cfg["u_base"])
+        return pe, _clip_reward_v(r), _clip01_v(u)
+
     def instruction_conflict(t: int, rng: random.Random):
         """
         Two conflicting "instructions" (reward signals) simultaneously.
@@ -149,6 +270,15 @@ def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
     
+    def instruction_conflict_v(t, d0, d1):
+        signal_a = np.array([0.4 * math.sin(k * 0.2) for k in t.tolist()])
+        signal_b = np.array([0.4 * math.cos(k * 0.2 + 0.5) for k in t.tolist()])
+        conflict_intensity = np.abs(signal_a - signal_b)
+        pe = _clip01_v(0.2 + conflict_intensity + d0*0.1)
+        r = (signal_a + signal_b) * 0.5 + (d1-0.5)*0.1
+        u = cfg["u_base"] + 0.3 * conflict_intensity
+        return pe, _clip_reward_v(r), _clip01_v(u)
+
     # =========================================================================
     # L5 SCENARIOS - Safety & Manipulation (Adversarial)
     # =========================================================================
@@ -197,18 +327,28 @@ def build_scenarios(cfg: Dict[str, Any]) -> List[Scenario]:
         return pe, max(-1.0, min(1.0, r)), _clip01(u)
 
     return [
-        Scenario("sudden_threat", H, shock_t, sudden_threat),
-        Scenario("reward_flip", H, shock_t, reward_flip),
-        Scenario("noise_burst", H, shock_t, noise_burst),
-        Scenario("distribution_shift", H, 50, distribution_shift),
-        Scenario("goal_conflict", H, 30, goal_conflict),
+        Scenario("sudden_threat", H, shock_t, sudden_threat, batch_generator=sudden_threat_v,
+                 cfg_keys=("shock_t", "u_base", "u_shock", "pe_base", "pe_noise"), config=cfg),
+        Scenario("reward_flip", H, shock_t, reward_flip, batch_generator=reward_flip_v,
+                 cfg_keys=("shock_t", "u_base", "pe_base", "pe_noise"), config=cfg),
+        Scenario("noise_burst", H, shock_t, noise_burst, batch_generator=noise_burst_v,
+                 cfg_keys=("shock_t", "burst_len", "u_base", "pe_base", "pe_noise"), config=cfg),
+        Scenario("distribution_shift", H, 50, distribution_shift, batch_generator=distribution_shift_v,
+                 cfg_keys=("u_base", "u_shock", "pe_base", "pe_noise"), config=cfg),
+        Scenario("goal_conflict", H, 30, goal_conflict, batch_generator=goal_conflict_v,
+                 cfg_keys=("u_base", "pe_base", "pe_noise"), config=cfg),
         # L3 scenarios
-        Scenario("sustained_contradiction", H, 0, sustained_contradiction),
-        Scenario("gaslighting", H, 0, gaslighting),
-        Scenario("instruction_conflict", H, 0, instruction_conflict),
+        Scenario("sustained_contradiction", H, 0, sustained_contradiction, batch_generator=sustained_contradiction_v,
+                 cfg_keys=("u_shock",), config=cfg),
+        Scenario("gaslighting", H, 0, gaslighting, batch_generator=gaslighting_v,
+                 cfg_keys=("u_base", "u_shock", "pe_base", "pe_noise"), config=cfg),
+        Scenario("instruction_conflict", H, 0, instruction_conflict, batch_generator=instruction_conflict_v,
+                 cfg_keys=("u_base",), config=cfg),
         # L5 scenarios
-        Scenario("adversarial_coupling", H, 0, adversarial_coupling),
-        Scenario("random_dopamine", H, 0, random_dopamine),
+        Scenario("adversarial_coupling", H, 0, adversarial_coupling, interactive=True,
+                 cfg_keys=("u_base", "u_shock"), config=cfg),
+        Scenario("random_dopamine", H, 0, random_dopamine, interactive=True,
+                 cfg_keys=("u_base",), config=cfg),
     ]
 
 